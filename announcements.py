@@ -0,0 +1,224 @@
+"""Pre-rendered, cached TTS announcements.
+
+Fixed timer prompts are synthesized once to disk (at startup, or ahead of
+time with `python announcements.py`) and pinned; dynamic phrases are cached
+by content hash with LRU eviction. Synthesis uses pyttsx3, which runs fully
+offline. Every cached file is 16-bit WAV: some pyttsx3 drivers (NSSpeech on
+macOS) write AIFF whatever the extension, so their output is converted.
+SpeechWorker plays announcements from a single queue so the caller never
+waits on synthesis or playback.
+"""
+import hashlib
+import os
+import queue
+import struct
+import threading
+import wave
+from collections import OrderedDict
+
+ANNOUNCEMENTS_DIR = os.path.join("recordings", "announcements")
+MAX_DYNAMIC_ANNOUNCEMENTS = 64
+
+# Prompts spoken by the CPR timers
+FIXED_PROMPTS = [
+    "10 seconds until next pulse check.",
+    "It's been one minute, next pulse check in one minute.",
+    "2 minutes up! Time for pulse check.",
+]
+
+
+def _aiff_rate(extended):
+    """Sample rate from an AIFF 80-bit extended float"""
+    exponent, mantissa = struct.unpack('>HQ', extended)
+    if mantissa == 0:
+        return 0
+    return round(mantissa * 2.0 ** ((exponent & 0x7FFF) - 16383 - 63))
+
+
+def aiff_to_wav(path):
+    """Rewrite an AIFF/AIFF-C file in place as WAV; returns False if it already is one"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:4] != b'FORM' or data[8:12] not in (b'AIFF', b'AIFC'):
+        return False
+    little_endian = False
+    frames = b''
+    position = 12
+    while position + 8 <= len(data):
+        chunk_id, size = struct.unpack('>4sI', data[position:position + 8])
+        body = data[position + 8:position + 8 + size]
+        if chunk_id == b'COMM':
+            channels, _, sample_bits = struct.unpack('>hIh', body[:8])
+            rate = _aiff_rate(body[8:18])
+            little_endian = data[8:12] == b'AIFC' and body[18:22] == b'sowt'
+        elif chunk_id == b'SSND':
+            offset = struct.unpack('>I', body[:4])[0]
+            frames = body[8 + offset:]
+        position += 8 + size + (size & 1)
+    width = (sample_bits + 7) // 8
+    if width == 1:
+        frames = bytes((sample + 128) & 0xFF for sample in frames)  # signed -> unsigned 8-bit
+    elif not little_endian:
+        swapped = bytearray(len(frames))
+        for k in range(width):
+            swapped[k::width] = frames[width - 1 - k::width]
+        frames = bytes(swapped)
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(width)
+        wav.setframerate(rate)
+        wav.writeframes(frames)
+    return True
+
+
+class Pyttsx3Synthesizer:
+    """Offline synthesis to WAV files; pyttsx3 engines are not thread-safe"""
+
+    def __init__(self):
+        self._engine = None
+        self._lock = threading.Lock()
+
+    def __call__(self, text, path):
+        with self._lock:
+            if self._engine is None:
+                import pyttsx3
+                self._engine = pyttsx3.init()
+            self._engine.save_to_file(text, path)
+            self._engine.runAndWait()
+        aiff_to_wav(path)
+
+
+class AnnouncementCache:
+    def __init__(self, cache_dir=ANNOUNCEMENTS_DIR, synthesize=None,
+                 max_dynamic=MAX_DYNAMIC_ANNOUNCEMENTS, voice='default'):
+        self.cache_dir = cache_dir
+        self.synthesize = synthesize or Pyttsx3Synthesizer()
+        self.max_dynamic = max_dynamic
+        self.voice = voice
+        self.pinned = set()
+        self.dynamic = OrderedDict()  # path -> None, least recently used first
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        # Adopt files left by earlier runs, oldest first
+        existing = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir)
+                    if name.endswith('.wav') and '.tmp' not in name]
+        for path in sorted(existing, key=os.path.getmtime):
+            self.dynamic[path] = None
+
+    def path_for(self, text):
+        key = hashlib.sha1(f"{self.voice}\0{text}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def get(self, text, pin=False):
+        """Return the path of the rendered announcement, synthesizing on a miss"""
+        path = self.path_for(text)
+        with self._lock:
+            if pin:
+                self.pinned.add(path)
+                self.dynamic.pop(path, None)
+            if os.path.exists(path):
+                self.hits += 1
+                if path in self.dynamic:
+                    self.dynamic.move_to_end(path)
+                elif path not in self.pinned:
+                    self.dynamic[path] = None
+                return path
+            self.misses += 1
+        # Render to a temp name so a half-written file is never served
+        tmp_path = f"{path}.tmp.wav"
+        self.synthesize(text, tmp_path)
+        os.replace(tmp_path, path)
+        with self._lock:
+            if path not in self.pinned:
+                self.dynamic[path] = None
+                self.dynamic.move_to_end(path)
+                self._evict()
+        return path
+
+    def read(self, text):
+        with open(self.get(text), 'rb') as f:
+            return f.read()
+
+    def warm(self, texts=FIXED_PROMPTS):
+        """Pre-render and pin prompts so they are never evicted"""
+        for text in texts:
+            self.get(text, pin=True)
+
+    def _evict(self):
+        while len(self.dynamic) > self.max_dynamic:
+            path, _ = self.dynamic.popitem(last=False)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def play_wav(path):
+    """Blocking local playback through PyAudio"""
+    import pyaudio
+    audio = pyaudio.PyAudio()
+    try:
+        with wave.open(path, 'rb') as wf:
+            stream = audio.open(format=audio.get_format_from_width(wf.getsampwidth()),
+                                channels=wf.getnchannels(), rate=wf.getframerate(), output=True)
+            data = wf.readframes(1024)
+            while data:
+                stream.write(data)
+                data = wf.readframes(1024)
+            stream.stop_stream()
+            stream.close()
+    finally:
+        audio.terminate()
+
+
+class SpeechWorker(threading.Thread):
+    """Single queue for announcements; say() never blocks the caller"""
+
+    def __init__(self, cache, play=play_wav, max_pending=8):
+        super().__init__(daemon=True, name='speech-worker')
+        self.cache = cache
+        self.play = play
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.dropped = 0
+
+    def say(self, text):
+        try:
+            self.pending.put_nowait(text)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def run(self):
+        while True:
+            text = self.pending.get()
+            if text is None:
+                break
+            try:
+                self.play(self.cache.get(text))
+            except Exception as e:
+                print(f"Error in speech: {e}")
+
+    def stop(self):
+        self.pending.put(None)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_announcement_cache():
+    """Process-wide cache with the fixed prompts already rendered"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnnouncementCache()
+            _cache.warm()
+        return _cache
+
+
+if __name__ == "__main__":
+    cache = AnnouncementCache()
+    cache.warm()
+    for text in FIXED_PROMPTS:
+        print(f"{cache.path_for(text)}: {text}")
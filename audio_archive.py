@@ -0,0 +1,335 @@
+"""Seekable segmented audio archive with clip extraction by sample offset.
+
+A recording is stored as fixed-length segments, each decodable on its own,
+in one data file (<base>.seg) with a JSON sidecar index (<base>.seg.json):
+
+	{"rate": 16000, "channels": 1, "sample_width": 2, "codec": "zlib",
+	 "segment_frames": 80000, "frames": ..., "segments": [[byte_offset, byte_length, first_frame, frames], ...]}
+
+The "zlib" codec deflates per-channel sample deltas (about 70% of raw PCM
+for speech); "pcm" stores the samples as they are. A clip maps its frame
+range to segments by division, reads only those segments through mmap and
+decodes them, so pulling 10 s around an event costs the same at minute 2 as
+at hour 2.
+
+Transcripts carry start_sample / end_sample for every utterance and event
+(frames from the start of the recording, at the transcript's sample_rate),
+which is what clips are cut by.
+
+	python audio_archive.py build recordings/recording_X.wav
+	python audio_archive.py clips recordings/recording_X --event DEFIB_SHOCK --before 5 --after 5
+"""
+import argparse
+import json
+import mmap
+import os
+import wave
+import zlib
+from bisect import bisect_right
+
+import numpy as np
+
+SEGMENT_SECONDS = 5
+CODEC_PCM = 'pcm'
+CODEC_ZLIB = 'zlib'
+ZLIB_LEVEL = 1
+DATA_SUFFIX = '.seg'
+INDEX_SUFFIX = '.seg.json'
+CLIPS_DIR = os.path.join("recordings", "clips")
+
+
+class AudioOffsetMap:
+	"""Maps the ASR timeline (ms of audio sent upstream) onto recording sample offsets.
+
+	With voice activity gating the ASR hears only part of the recording, so
+	its audio_start / audio_end are not recording positions. Every sent
+	chunk is added with its session-timeline span and the recording frame it
+	was captured at; consecutive chunks that are contiguous in both merge
+	into one run, so the map holds one entry per stretch of speech.
+	"""
+
+	def __init__(self, rate):
+		self.rate = rate
+		self.starts_ms = []
+		self.frames = []
+		self._end_ms = None
+		self._end_frame = None
+
+	def __len__(self):
+		return len(self.starts_ms)
+
+	def add(self, start_ms, end_ms, frame, frames):
+		if self._end_ms is None or abs(start_ms - self._end_ms) > 1e-6 or frame != self._end_frame:
+			self.starts_ms.append(start_ms)
+			self.frames.append(frame)
+		self._end_ms = end_ms
+		self._end_frame = frame + frames
+
+	def sample(self, ms):
+		"""Recording frame heard at ms on the ASR timeline"""
+		if not self.starts_ms:
+			return ms_to_sample(ms, self.rate)
+		i = max(bisect_right(self.starts_ms, ms) - 1, 0)
+		return self.frames[i] + ms_to_sample(ms - self.starts_ms[i], self.rate)
+
+	def annotate(self, result):
+		"""Add start_sample / end_sample to a result carrying audio_start / audio_end"""
+		if result.get('audio_start') is not None:
+			result['start_sample'] = self.sample(result['audio_start'])
+		if result.get('audio_end') is not None:
+			result['end_sample'] = self.sample(result['audio_end'])
+		return result
+
+
+def ms_to_sample(ms, rate):
+	return int(round(ms * rate / 1000))
+
+
+def _encode(data, codec, channels):
+	if codec == CODEC_PCM:
+		return data
+	samples = np.frombuffer(data, dtype='<i2').reshape(-1, channels)
+	deltas = np.diff(samples, axis=0, prepend=np.zeros((1, channels), dtype='<i2'))
+	return zlib.compress(deltas.astype('<i2').tobytes(), ZLIB_LEVEL)
+
+
+def _decode(data, codec, channels):
+	if codec == CODEC_PCM:
+		return bytes(data)
+	deltas = np.frombuffer(zlib.decompress(data), dtype='<i2').reshape(-1, channels)
+	return np.cumsum(deltas, axis=0, dtype='<i2').tobytes()
+
+
+class SegmentArchiveWriter:
+	"""Writes audio chunks into independently decodable segments plus the sidecar index.
+
+	Same write()/close() interface as IncrementalWavWriter. Each segment is
+	appended as soon as it fills and the index is written on close; no
+	segment depends on any other, so a clip decodes only its own.
+	"""
+
+	def __init__(self, base, rate, channels=1, sample_width=2, segment_seconds=SEGMENT_SECONDS, codec=CODEC_ZLIB):
+		if sample_width != 2 and codec != CODEC_PCM:
+			raise ValueError(f"codec {codec!r} needs 16-bit samples")
+		self.base = base
+		self.rate = rate
+		self.channels = channels
+		self.sample_width = sample_width
+		self.codec = codec
+		self.frame_bytes = sample_width * channels
+		self.segment_frames = int(segment_seconds * rate)
+		self.segments = []
+		self.frames = 0
+		self.bytes_written = 0
+		self.chunks_written = 0
+		self._pending = bytearray()
+		self._file = open(base + DATA_SUFFIX, 'wb')
+
+	@property
+	def closed(self):
+		return self._file is None
+
+	@property
+	def duration(self):
+		return self.frames / self.rate
+
+	def write(self, data):
+		self._pending += data
+		self.chunks_written += 1
+		self.bytes_written += len(data)
+		segment_bytes = self.segment_frames * self.frame_bytes
+		while len(self._pending) >= segment_bytes:
+			self._write_segment(bytes(self._pending[:segment_bytes]))
+			del self._pending[:segment_bytes]
+
+	def _write_segment(self, data):
+		frames = len(data) // self.frame_bytes
+		encoded = _encode(data[:frames * self.frame_bytes], self.codec, self.channels)
+		self.segments.append([self._file.tell(), len(encoded), self.frames, frames])
+		self._file.write(encoded)
+		self.frames += frames
+
+	def close(self):
+		if self._file is None:
+			return
+		if len(self._pending) >= self.frame_bytes:
+			self._write_segment(bytes(self._pending))
+		self._pending = bytearray()
+		self._file.close()
+		self._file = None
+		index = {
+			'rate': self.rate,
+			'channels': self.channels,
+			'sample_width': self.sample_width,
+			'codec': self.codec,
+			'segment_frames': self.segment_frames,
+			'frames': self.frames,
+			'segments': self.segments,
+		}
+		with open(self.base + INDEX_SUFFIX, 'w') as f:
+			json.dump(index, f, separators=(',', ':'))
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+
+class SegmentArchive:
+	"""Read-only, memory-mapped view of a segment archive"""
+
+	def __init__(self, base):
+		self.base = base
+		with open(base + INDEX_SUFFIX, 'r') as f:
+			index = json.load(f)
+		self.rate = index['rate']
+		self.channels = index['channels']
+		self.sample_width = index['sample_width']
+		self.codec = index['codec']
+		self.segment_frames = index['segment_frames']
+		self.frames = index['frames']
+		self.segments = index['segments']
+		self.frame_bytes = self.sample_width * self.channels
+		self.segments_read = 0
+		self.bytes_read = 0
+		self._file = open(base + DATA_SUFFIX, 'rb')
+		self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.segments else None
+
+	@property
+	def duration(self):
+		return self.frames / self.rate
+
+	def close(self):
+		if self._map is not None:
+			self._map.close()
+			self._map = None
+		self._file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def segment(self, i):
+		"""Decoded PCM of segment i"""
+		offset, length, _, _ = self.segments[i]
+		self.segments_read += 1
+		self.bytes_read += length
+		return _decode(self._map[offset:offset + length], self.codec, self.channels)
+
+	def read(self, start_frame, end_frame):
+		"""PCM for frames [start_frame, end_frame), clamped to the recording"""
+		start_frame = max(0, start_frame)
+		end_frame = min(self.frames, end_frame)
+		if end_frame <= start_frame:
+			return b''
+		first = start_frame // self.segment_frames
+		last = (end_frame - 1) // self.segment_frames
+		parts = []
+		for i in range(first, last + 1):
+			_, _, segment_start, frames = self.segments[i]
+			data = self.segment(i)
+			lo = max(start_frame - segment_start, 0)
+			hi = min(end_frame - segment_start, frames)
+			parts.append(data[lo * self.frame_bytes:hi * self.frame_bytes])
+		return b''.join(parts)
+
+	def clip(self, start_frame, end_frame, path):
+		"""Write frames [start_frame, end_frame) to a WAV; returns the frames written"""
+		data = self.read(start_frame, end_frame)
+		with wave.open(path, 'wb') as wav:
+			wav.setnchannels(self.channels)
+			wav.setsampwidth(self.sample_width)
+			wav.setframerate(self.rate)
+			wav.writeframes(data)
+		return len(data) // self.frame_bytes
+
+
+def build_archive(audio_path, base=None, segment_seconds=SEGMENT_SECONDS, codec=CODEC_ZLIB, rate=16000):
+	"""Segment an existing recording; WAVs are streamed, other formats decoded at rate"""
+	base = base or os.path.splitext(audio_path)[0]
+	if audio_path.lower().endswith('.wav'):
+		with wave.open(audio_path, 'rb') as wav:
+			writer = SegmentArchiveWriter(base, wav.getframerate(), wav.getnchannels(), wav.getsampwidth(),
+										segment_seconds, codec)
+			with writer:
+				while True:
+					data = wav.readframes(writer.segment_frames)
+					if not data:
+						break
+					writer.write(data)
+	else:
+		from code_session import load_pcm
+		with SegmentArchiveWriter(base, rate, 1, 2, segment_seconds, codec) as writer:
+			writer.write(load_pcm(audio_path, rate))
+	return base
+
+
+def event_clips(archive, events, before=5.0, after=5.0, event=None, sample_rate=None):
+	"""(event, start_frame, end_frame) windows around every event with sample offsets"""
+	scale = archive.rate / sample_rate if sample_rate else 1.0
+	windows = []
+	for detected in events:
+		if event and detected.get('event') != event:
+			continue
+		start = detected.get('start_sample')
+		if start is None:
+			continue
+		end = detected.get('end_sample', start)
+		windows.append((detected, int(start * scale - before * archive.rate),
+						int(end * scale + after * archive.rate)))
+	return windows
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Segmented audio archive and event clips")
+	sub = parser.add_subparsers(dest='command', required=True)
+	build = sub.add_parser('build', help="segment a recording (WAV, M4A, ...)")
+	build.add_argument('audio')
+	build.add_argument('--base', help="archive path without suffix (default: next to the audio)")
+	build.add_argument('--segment-seconds', type=float, default=SEGMENT_SECONDS)
+	build.add_argument('--codec', choices=[CODEC_ZLIB, CODEC_PCM], default=CODEC_ZLIB)
+	clips = sub.add_parser('clips', help="cut a WAV around each detected event")
+	clips.add_argument('base', help="archive path without suffix, e.g. recordings/recording_X")
+	clips.add_argument('--transcript', help="transcript JSON (default: <base>_transcript.json)")
+	clips.add_argument('--event', help="only this event type, e.g. DEFIB_SHOCK")
+	clips.add_argument('--before', type=float, default=5.0, help="seconds before the utterance")
+	clips.add_argument('--after', type=float, default=5.0, help="seconds after the utterance")
+	clips.add_argument('--out', default=CLIPS_DIR)
+	args = parser.parse_args()
+
+	if args.command == 'build':
+		base = build_archive(args.audio, args.base, args.segment_seconds, args.codec)
+		with SegmentArchive(base) as archive:
+			size = os.path.getsize(base + DATA_SUFFIX)
+			print(f"{base}{DATA_SUFFIX}: {archive.duration:.1f}s in {len(archive.segments)} segments, "
+				f"{size / max(archive.frames * archive.frame_bytes, 1):.0%} of PCM")
+		return
+
+	transcript = args.transcript or f"{args.base}_transcript.json"
+	with open(transcript, 'r') as f:
+		data = json.load(f)
+	events = data.get('detected_events')
+	if events is None:
+		# Batch transcripts (parse_recording.py) are saved without events
+		from phrase_matcher import get_phrase_matcher
+		from transcript_archive import detect_events
+		events = detect_events(data.get('messages', []), get_phrase_matcher())
+	os.makedirs(args.out, exist_ok=True)
+	name = os.path.basename(args.base)
+	with SegmentArchive(args.base) as archive:
+		windows = event_clips(archive, events, args.before, args.after, args.event, data.get('sample_rate'))
+		skipped = sum(1 for evt in events if (not args.event or evt.get('event') == args.event)
+					and evt.get('start_sample') is None)
+		for i, (detected, start, end) in enumerate(windows):
+			path = os.path.join(args.out, f"{name}_{i:03d}_{detected['event']}.wav")
+			frames = archive.clip(start, end, path)
+			print(f"{path}: {max(start, 0) / archive.rate:.2f}s +{frames / archive.rate:.2f}s '{detected.get('text', '')[:60]}'")
+		print(f"{len(windows)} clips, {archive.segments_read} segment reads of {len(archive.segments)} segments"
+			+ (f"; {skipped} events without sample offsets skipped" if skipped else ""))
+
+
+if __name__ == "__main__":
+	main()
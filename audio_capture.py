@@ -0,0 +1,180 @@
+import asyncio
+import threading
+import time
+
+DROP_OLDEST = 'drop_oldest'  # Overwrite the oldest unread chunk (keeps audio current)
+DROP_NEWEST = 'drop_newest'  # Discard the incoming chunk (keeps audio contiguous)
+PA_INPUT_OVERFLOWED = -9981  # pyaudio.paInputOverflowed, the errno PyAudio raises on input overflow
+
+
+class AudioRingBuffer:
+	"""Fixed-size ring of preallocated audio chunk slots shared by two threads.
+
+	The capture thread writes, one consumer reads. When the consumer falls
+	behind, the overflow policy decides which chunk is lost, and every loss is
+	counted in dropped_chunks instead of blocking the writer.
+	"""
+
+	def __init__(self, slots, chunk_bytes, overflow=DROP_OLDEST):
+		if overflow not in (DROP_OLDEST, DROP_NEWEST):
+			raise ValueError(f"Unknown overflow policy: {overflow}")
+		self.slots = [bytearray(chunk_bytes) for _ in range(slots)]
+		self.lengths = [0] * slots
+		self.captured_at = [0.0] * slots  # time.monotonic() when each slot was filled
+		self.overflow = overflow
+		self.read_index = 0
+		self.count = 0
+		self.written_chunks = 0
+		self.dropped_chunks = 0
+		self.lock = threading.Lock()
+		self.listener = None
+
+	def __len__(self):
+		return self.count
+
+	def put(self, data):
+		"""Copy one chunk into the ring; returns False if a chunk was dropped"""
+		with self.lock:
+			capacity = len(self.slots)
+			dropped = False
+			if self.count == capacity:
+				self.dropped_chunks += 1
+				dropped = True
+				if self.overflow == DROP_NEWEST:
+					return False
+				self.read_index = (self.read_index + 1) % capacity
+				self.count -= 1
+			index = (self.read_index + self.count) % capacity
+			slot = self.slots[index]
+			size = min(len(data), len(slot))
+			slot[:size] = data[:size]
+			self.lengths[index] = size
+			self.captured_at[index] = time.monotonic()
+			self.count += 1
+			self.written_chunks += 1
+			listener = self.listener
+		if listener:
+			listener()
+		return not dropped
+
+	def get(self):
+		"""Pop the oldest chunk as bytes, or None when the ring is empty"""
+		item = self.pop()
+		return item[0] if item else None
+
+	def pop(self):
+		"""Pop the oldest chunk as (bytes, captured_at), or None when the ring is empty"""
+		with self.lock:
+			if self.count == 0:
+				return None
+			index = self.read_index
+			data = bytes(self.slots[index][:self.lengths[index]])
+			self.read_index = (index + 1) % len(self.slots)
+			self.count -= 1
+			return data, self.captured_at[index]
+
+	def stats(self):
+		with self.lock:
+			return {
+				'buffered_chunks': self.count,
+				'written_chunks': self.written_chunks,
+				'dropped_chunks': self.dropped_chunks,
+			}
+
+
+class CaptureThread(threading.Thread):
+	"""Reads the blocking PyAudio stream off the event loop into a ring buffer.
+
+	Input overflows are counted and skipped. Any other read error (device
+	unplugged, stream closed) ends the thread and is kept in `error`.
+	"""
+
+	def __init__(self, stream, frames_per_buffer, ring):
+		super().__init__(daemon=True, name='audio-capture')
+		self.stream = stream
+		self.frames_per_buffer = frames_per_buffer
+		self.ring = ring
+		self.running = threading.Event()
+		self.input_overflows = 0
+		self.error = None
+
+	def run(self):
+		self.running.set()
+		while self.running.is_set():
+			try:
+				data = self.stream.read(self.frames_per_buffer)
+			except OSError as e:
+				if e.errno == PA_INPUT_OVERFLOWED:
+					# The device already lost those frames; keep reading
+					self.input_overflows += 1
+					continue
+				print(f"Capture stopped: {e}")
+				self.error = e
+				self.running.clear()
+				break
+			self.ring.put(data)
+
+	def stop(self, timeout=1.0):
+		self.running.clear()
+		if self.is_alive():
+			self.join(timeout)
+
+	def stats(self):
+		stats = self.ring.stats()
+		stats['input_overflows'] = self.input_overflows
+		if self.error:
+			stats['error'] = str(self.error)
+		return stats
+
+
+class AsyncChunkReader:
+	"""Awaitable consumer side of an AudioRingBuffer"""
+
+	def __init__(self, ring, loop=None):
+		self.ring = ring
+		self.loop = loop or asyncio.get_running_loop()
+		self.ready = asyncio.Event()
+		ring.listener = self._notify
+
+	def _notify(self):
+		# Called from the capture thread
+		self.loop.call_soon_threadsafe(self.ready.set)
+
+	async def get(self, timeout=None):
+		"""Wait for the next chunk; returns None if timeout expires first"""
+		item = await self.pop(timeout)
+		return item[0] if item else None
+
+	async def pop(self, timeout=None):
+		"""Wait for the next (chunk, captured_at); returns None if timeout expires first"""
+		while True:
+			item = self.ring.pop()
+			if item is not None:
+				return item
+			self.ready.clear()
+			# Re-check so a put between pop() and clear() is not missed
+			item = self.ring.pop()
+			if item is not None:
+				return item
+			try:
+				await asyncio.wait_for(self.ready.wait(), timeout)
+			except asyncio.TimeoutError:
+				return None
+
+	def close(self):
+		if self.ring.listener == self._notify:
+			self.ring.listener = None
+
+
+_audio_device = None
+_audio_device_lock = threading.Lock()
+
+
+def get_audio_device():
+	"""Process-wide PyAudio instance; PortAudio initialization (device scan) runs once"""
+	global _audio_device
+	with _audio_device_lock:
+		if _audio_device is None:
+			import pyaudio
+			_audio_device = pyaudio.PyAudio()
+		return _audio_device
@@ -0,0 +1,104 @@
+"""Realtime websocket audio messages: {"audio_data": "<base64 PCM>"}.
+
+Two writers build the same JSON message:
+
+	JsonPayloadWriter      base64 -> str -> dict -> json.dumps, per message (the original send path)
+	TemplatePayloadWriter  base64 straight into a reusable buffer between a fixed prefix and suffix
+
+The JSON around the audio never changes, so TemplatePayloadWriter writes
+the prefix once and only fills in the base64 body and the closing suffix.
+No dict, json.dumps, str decode or UTF-8 re-encode happens per message,
+and when several capture chunks are aggregated into one message they are
+joined in a second reusable buffer. The payload is a memoryview into the
+buffer, valid until the next write(); websockets copies it into a masked
+frame before send() returns, so one writer per connection owner is safe.
+
+send_benchmark.py compares the two on an hour of audio.
+"""
+import base64
+import binascii
+import inspect
+import json
+
+PAYLOAD_JSON = 'json'
+PAYLOAD_TEMPLATE = 'template'
+
+_accepts_text = {}  # websocket class -> whether send() takes text=True for bytes
+
+
+def accepts_text_bytes(ws):
+	"""Whether ws.send(bytes, text=True) sends a text frame (websockets >= 14)"""
+	kind = type(ws)
+	if kind not in _accepts_text:
+		try:
+			_accepts_text[kind] = 'text' in inspect.signature(ws.send).parameters
+		except (TypeError, ValueError):
+			_accepts_text[kind] = False
+	return _accepts_text[kind]
+
+
+async def send_payload(ws, payload):
+	"""Send a writer's payload as a text frame"""
+	if isinstance(payload, str):
+		await ws.send(payload)
+	elif accepts_text_bytes(ws):
+		await ws.send(payload, text=True)
+	else:
+		await ws.send(str(payload, 'ascii'))
+
+
+class JsonPayloadWriter:
+	def write(self, chunks):
+		return json.dumps({"audio_data": base64.b64encode(b''.join(chunks)).decode("utf-8")})
+
+
+class TemplatePayloadWriter:
+	PREFIX = b'{"audio_data":"'
+	SUFFIX = b'"}'
+
+	def __init__(self, max_audio_bytes=0):
+		self._audio = bytearray(max_audio_bytes)
+		self._audio_view = memoryview(self._audio)
+		self._payload = bytearray()
+		self._payload_view = None
+		self._reserve(max_audio_bytes)
+
+	def _reserve(self, audio_bytes):
+		size = len(self.PREFIX) + 4 * ((audio_bytes + 2) // 3) + len(self.SUFFIX)
+		if self._payload_view is not None and len(self._payload) >= size:
+			return
+		self._payload = bytearray(size)
+		self._payload[:len(self.PREFIX)] = self.PREFIX
+		self._payload_view = memoryview(self._payload)
+
+	def _join(self, chunks):
+		if len(chunks) == 1:
+			return chunks[0]
+		size = sum(len(chunk) for chunk in chunks)
+		if len(self._audio) < size:
+			self._audio = bytearray(size)
+			self._audio_view = memoryview(self._audio)
+		position = 0
+		for chunk in chunks:
+			self._audio[position:position + len(chunk)] = chunk
+			position += len(chunk)
+		return self._audio_view[:size]
+
+	def write(self, chunks):
+		"""Payload for chunks (a sequence of PCM bytes), valid until the next write"""
+		audio = self._join(chunks)
+		self._reserve(len(audio))
+		encoded = binascii.b2a_base64(audio, newline=False)
+		start = len(self.PREFIX)
+		end = start + len(encoded)
+		self._payload[start:end] = encoded
+		self._payload[end:end + len(self.SUFFIX)] = self.SUFFIX
+		return self._payload_view[:end + len(self.SUFFIX)]
+
+
+def payload_writer(kind=PAYLOAD_TEMPLATE, max_audio_bytes=0):
+	if kind == PAYLOAD_JSON:
+		return JsonPayloadWriter()
+	if kind == PAYLOAD_TEMPLATE:
+		return TemplatePayloadWriter(max_audio_bytes)
+	raise ValueError(f"unknown payload writer {kind!r}")
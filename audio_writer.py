@@ -0,0 +1,85 @@
+import os
+import struct
+import wave
+
+WAV_HEADER_BYTES = 44
+
+
+class IncrementalWavWriter:
+	"""Append audio chunks to a WAV file on disk as they arrive.
+
+	Memory stays flat however long the session runs. The wave module patches
+	the RIFF/data sizes after every write, and the file is flushed every
+	flush_every chunks, so a crash leaves a playable file holding everything
+	up to the last flush (repair_wav fixes the header if it was cut off).
+	"""
+
+	def __init__(self, path, channels, sample_width, rate, flush_every=5, fsync=False):
+		self.path = path
+		self.sample_width = sample_width
+		self.channels = channels
+		self.rate = rate
+		self.flush_every = flush_every
+		self.fsync = fsync
+		self.chunks_written = 0
+		self.bytes_written = 0
+		self._file = open(path, 'wb')
+		self._wav = wave.open(self._file, 'wb')
+		self._wav.setnchannels(channels)
+		self._wav.setsampwidth(sample_width)
+		self._wav.setframerate(rate)
+
+	@property
+	def closed(self):
+		return self._wav is None
+
+	@property
+	def duration(self):
+		"""Seconds of audio written so far"""
+		return self.bytes_written / (self.sample_width * self.channels * self.rate)
+
+	def write(self, data):
+		self._wav.writeframes(data)
+		self.chunks_written += 1
+		self.bytes_written += len(data)
+		if self.chunks_written % self.flush_every == 0:
+			self.flush()
+
+	def flush(self):
+		self._file.flush()
+		if self.fsync:
+			os.fsync(self._file.fileno())
+
+	def close(self):
+		if self._wav is None:
+			return
+		self._wav.close()  # patches the final header
+		self._file.close()
+		self._wav = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+
+def repair_wav(path):
+	"""Rewrite the RIFF and data sizes of a WAV left behind by a crash.
+
+	Returns the number of audio bytes the repaired header now covers.
+	"""
+	file_size = os.path.getsize(path)
+	with open(path, 'r+b') as f:
+		header = f.read(WAV_HEADER_BYTES)
+		if len(header) < WAV_HEADER_BYTES or header[:4] != b'RIFF' or header[36:40] != b'data':
+			raise ValueError(f"{path} is not a PCM WAV written by IncrementalWavWriter")
+		block_align = struct.unpack('<H', header[32:34])[0] or 1
+		data_size = file_size - WAV_HEADER_BYTES
+		data_size -= data_size % block_align  # drop a partially written frame
+		f.seek(4)
+		f.write(struct.pack('<I', WAV_HEADER_BYTES - 8 + data_size))
+		f.seek(40)
+		f.write(struct.pack('<I', data_size))
+		f.truncate(WAV_HEADER_BYTES + data_size)
+	return data_size
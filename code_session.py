@@ -0,0 +1,699 @@
+"""One resuscitation code as a self-contained session, and a host that runs many.
+
+A CodeSession owns everything that used to be module or Streamlit globals:
+the audio source, the websocket, the speaker maps and detected events (its
+own state dict), its timers and its latency metrics. Sessions share only the
+read-only PhraseMatcher, so one asyncio loop can serve many rooms:
+
+	host = SessionHost()
+	host.add(CodeSession('room-1', MicrophoneSource(pyaudio.PyAudio()), matcher, url=URL, headers=headers))
+	asyncio.run(host.run_all())
+
+Each session keeps resource accounting (audio in/out, messages, CPU time
+spent in its own send/receive work) in session.stats. See load_test.py for
+driving many synthetic sessions against mock_asr_server.py.
+"""
+import asyncio
+import json
+import random
+import time
+import wave
+from collections import deque
+
+import websockets
+
+from audio_archive import AudioOffsetMap
+from audio_capture import AudioRingBuffer, CaptureThread, AsyncChunkReader, DROP_OLDEST
+from audio_payload import payload_writer, send_payload, PAYLOAD_TEMPLATE
+from latency_metrics import LatencyMetrics
+from session_journal import TIMER
+from timer_scheduler import TimerScheduler
+from transcript_pipeline import TranscriptPipeline
+
+RATE = 16000
+CHANNELS = 1
+SAMPLE_WIDTH = 2  # paInt16
+FRAMES_PER_BUFFER = 3200
+RING_BUFFER_SLOTS = 50
+CONNECT_TIMEOUT = 10.0
+RECONNECT_DELAY = 0.5  # first retry after a failed connect; doubles per failure
+MAX_RECONNECT_DELAY = 10.0
+STABLE_CONNECTION_SECONDS = 5.0  # a drop after this long reconnects at once, without backoff
+MAX_CONNECT_FAILURES = 10  # consecutive failed connects before a session gives up
+REPLAY_BUFFER_SECONDS = 30  # unacknowledged audio kept for resending after a reconnect
+FRAMES_PER_MESSAGE = 1  # capture chunks aggregated into one websocket message
+
+# How a connection ended
+LOST = 'lost'
+TERMINATED = 'terminated'
+STOPPED = 'stopped'
+
+# Timers started by detected events: event -> (timer name, seconds, {remaining: prompt}, expiry message)
+EVENT_TIMERS = {
+	'CPR_START': ('CPR', 120, {110: "10 seconds until next pulse check."},
+				"2 minutes up! Time for pulse check."),
+	'MED_EPINEPHRINE': ('Epinephrine', 300, {120: "3 minutes since epinephrine."},
+				"5 minutes since epinephrine. Next dose due."),
+}
+
+
+def load_pcm(path, rate=RATE):
+	"""Decode an audio file to mono 16-bit PCM bytes at rate"""
+	if path.lower().endswith('.wav'):
+		with wave.open(path, 'rb') as wav:
+			if (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()) == (CHANNELS, SAMPLE_WIDTH, rate):
+				return wav.readframes(wav.getnframes())
+	from pydub import AudioSegment
+	audio = AudioSegment.from_file(path).set_frame_rate(rate).set_channels(CHANNELS).set_sample_width(SAMPLE_WIDTH)
+	return audio.raw_data
+
+
+class MicrophoneSource:
+	"""Live PyAudio input read on a capture thread into a ring buffer.
+
+	The stream is opened when the session starts and closed when it ends,
+	so each session gets its own device handle.
+	"""
+
+	def __init__(self, audio, rate=RATE, channels=CHANNELS, sample_format=None, frames_per_buffer=FRAMES_PER_BUFFER,
+				slots=RING_BUFFER_SLOTS, overflow=DROP_OLDEST, input_device_index=None):
+		self.audio = audio
+		self.rate = rate
+		self.channels = channels
+		self.sample_format = sample_format
+		self.frames_per_buffer = frames_per_buffer
+		self.slots = slots
+		self.overflow = overflow
+		self.input_device_index = input_device_index
+		self.chunk_ms = frames_per_buffer * 1000 / rate
+		self.frame_bytes = SAMPLE_WIDTH * channels
+		self.finished = False  # a microphone only runs out when the device fails
+		self.error = None
+		self.stream = None
+		self.capture = None
+		self.reader = None
+
+	async def start(self):
+		import pyaudio
+		sample_format = self.sample_format or pyaudio.paInt16
+		self.frame_bytes = self.audio.get_sample_size(sample_format) * self.channels
+		self.stream = self.audio.open(format=sample_format, channels=self.channels, rate=self.rate, input=True,
+									frames_per_buffer=self.frames_per_buffer,
+									input_device_index=self.input_device_index)
+		ring = AudioRingBuffer(self.slots, self.frames_per_buffer * self.frame_bytes,
+								overflow=self.overflow)
+		self.capture = CaptureThread(self.stream, self.frames_per_buffer, ring)
+		self.reader = AsyncChunkReader(ring)
+		self.capture.start()
+
+	async def read(self, timeout=0.5):
+		"""Next (chunk, captured_at), or None if nothing arrived within timeout"""
+		item = await self.reader.pop(timeout)
+		if item is None and self.capture.error is not None and not len(self.capture.ring):
+			# The device failed: end the audio so the session flushes and reports it
+			self.error = f"microphone: {self.capture.error}"
+			self.finished = True
+		return item
+
+	def close(self):
+		if self.capture:
+			self.capture.stop()
+		if self.reader:
+			self.reader.close()
+		if self.stream:
+			self.stream.stop_stream()
+			self.stream.close()
+			self.stream = None
+
+	def stats(self):
+		return self.capture.stats() if self.capture else {}
+
+
+class PcmSource:
+	"""Replays PCM bytes as if captured live, one chunk per chunk_ms.
+
+	Used for synthetic sessions. With speed 0 chunks are produced as fast as
+	they are consumed; otherwise each chunk is released at its wall-clock
+	deadline and how late the consumer picked it up is tracked in max_lag.
+	seconds longer than the recording loops it, for soak runs.
+	"""
+
+	def __init__(self, pcm, rate=RATE, frames_per_buffer=FRAMES_PER_BUFFER, speed=1.0, offset_chunks=0, seconds=None):
+		self.pcm = memoryview(pcm)
+		self.rate = rate
+		self.frame_bytes = SAMPLE_WIDTH * CHANNELS
+		self.chunk_bytes = frames_per_buffer * SAMPLE_WIDTH * CHANNELS
+		self.chunk_ms = frames_per_buffer * 1000 / rate
+		self.speed = speed
+		self.position = (offset_chunks * self.chunk_bytes) % max(len(pcm), 1)
+		self.remaining = len(pcm) if seconds is None else int(seconds * rate) * SAMPLE_WIDTH * CHANNELS
+		self.finished = False
+		self.error = None
+		self.chunks = 0
+		self.max_lag = 0.0
+		self.total_lag = 0.0
+		self.started_at = None
+
+	async def start(self):
+		self.started_at = time.monotonic()
+
+	async def read(self, timeout=0.5):
+		if self.remaining <= 0:
+			self.finished = True
+			return None
+		captured_at = time.monotonic()
+		if self.speed:
+			# The chunk is "captured" once all of its audio would have been spoken
+			deadline = self.started_at + (self.chunks + 1) * self.chunk_ms / 1000 / self.speed
+			if deadline > captured_at:
+				await asyncio.sleep(deadline - captured_at)
+				captured_at = deadline
+			else:
+				lag = captured_at - deadline
+				self.max_lag = max(self.max_lag, lag)
+				self.total_lag += lag
+		size = min(self.chunk_bytes, self.remaining)
+		end = self.position + size
+		if end <= len(self.pcm):
+			data = bytes(self.pcm[self.position:end])
+		else:
+			# Wrap around so staggered sessions can start mid-recording
+			data = bytes(self.pcm[self.position:]) + bytes(self.pcm[:end - len(self.pcm)])
+		self.position = end % len(self.pcm)
+		self.remaining -= size
+		self.chunks += 1
+		return data, captured_at
+
+	def close(self):
+		self.remaining = 0
+
+	def stats(self):
+		return {
+			'chunks': self.chunks,
+			'max_lag_ms': round(self.max_lag * 1000, 3),
+			'mean_lag_ms': round(self.total_lag / self.chunks * 1000, 3) if self.chunks else 0.0,
+		}
+
+
+class SessionStats:
+	"""Resource accounting for one session"""
+
+	def __init__(self):
+		self.started_at = None
+		self.ended_at = None
+		self.chunks_captured = 0
+		self.chunks_sent = 0
+		self.messages_sent = 0
+		self.bytes_sent = 0
+		self.messages_received = 0
+		self.finals = 0
+		self.partials = 0
+		self.events = 0
+		self.connections = 0
+		self.reconnects = 0
+		self.standby_promotions = 0
+		self.outage_seconds = 0.0
+		self.replayed_chunks = 0
+		self.duplicates_dropped = 0
+		self.cpu_seconds = 0.0  # thread CPU spent in this session's send/receive work
+		self.error = None
+
+	def to_dict(self):
+		end = self.ended_at or time.monotonic()
+		return {
+			'duration_s': round(end - self.started_at, 3) if self.started_at else 0.0,
+			'chunks_captured': self.chunks_captured,
+			'chunks_sent': self.chunks_sent,
+			'messages_sent': self.messages_sent,
+			'bytes_sent': self.bytes_sent,
+			'messages_received': self.messages_received,
+			'finals': self.finals,
+			'partials': self.partials,
+			'events': self.events,
+			'connections': self.connections,
+			'reconnects': self.reconnects,
+			'standby_promotions': self.standby_promotions,
+			'outage_s': round(self.outage_seconds, 3),
+			'replayed_chunks': self.replayed_chunks,
+			'duplicates_dropped': self.duplicates_dropped,
+			'cpu_ms': round(self.cpu_seconds * 1000, 3),
+			'error': self.error,
+		}
+
+
+class ReplayBuffer:
+	"""Audio sent upstream that no FinalTranscript has covered yet.
+
+	Positions are on the session's audio timeline: milliseconds of audio
+	sent since the session started, across every connection. ack() releases
+	audio a final transcript has covered; beyond max_ms the oldest chunks
+	are dropped (and counted) so an outage cannot grow the buffer forever.
+	"""
+
+	def __init__(self, max_ms=REPLAY_BUFFER_SECONDS * 1000):
+		self.max_ms = max_ms
+		self.chunks = deque()  # (start_ms, end_ms, chunk, captured_at)
+		self.total_ms = 0.0
+		self.acked_ms = 0.0
+		self.dropped_chunks = 0
+
+	def append(self, chunk, chunk_ms, captured_at):
+		start = self.total_ms
+		self.total_ms += chunk_ms
+		self.chunks.append((start, self.total_ms, chunk, captured_at))
+		while self.total_ms - self.chunks[0][0] > self.max_ms:
+			self.chunks.popleft()
+			self.dropped_chunks += 1
+		return start, self.total_ms
+
+	def ack(self, end_ms):
+		self.acked_ms = max(self.acked_ms, end_ms)
+		while self.chunks and self.chunks[0][1] <= self.acked_ms:
+			self.chunks.popleft()
+
+	def after(self, position_ms):
+		"""Buffered chunks ending after position_ms, oldest first"""
+		return [item for item in self.chunks if item[1] > position_ms]
+
+
+class CodeSession:
+	"""Capture -> websocket -> transcript pipeline -> timers for one code.
+
+	state holds the speaker maps, transcript and detected events (a plain
+	dict unless the caller passes e.g. st.session_state). on_name and
+	on_event are forwarded to the TranscriptPipeline; without on_event the
+	session starts EVENT_TIMERS on its own scheduler. on_result(result,
+	message) is called after every message the pipeline handled.
+
+	A dropped websocket does not end the session. Capture keeps feeding the
+	ReplayBuffer while the session reconnects with backoff (or promotes the
+	standby connection kept open when standby=True), then every chunk no
+	final has covered yet is resent. Each connection's audio offsets start
+	at zero, so results are shifted onto the session timeline and anything
+	the replay already finalized is dropped; events spoken during the
+	outage are still detected, in order.
+
+	Every sent chunk is also placed in an AudioOffsetMap, so stitched
+	results get start_sample / end_sample: where the utterance sits in the
+	recording written by audio_writer, even with the VAD skipping silence.
+
+	frames_per_message > 1 sends that many capture chunks per websocket
+	message (trading up to that many chunks of latency for fewer sends); a
+	pause in speech flushes a partial message. payload picks the message
+	writer from audio_payload.py.
+	"""
+
+	def __init__(self, session_id, source, matcher, url, headers=None, state=None, scheduler=None,
+				audio_writer=None, journal=None, metrics=None, vad=None, on_name=None, on_event=None,
+				on_result=None, should_run=None, detect_partials=False, log=print, connect=None,
+				standby=False, replay_seconds=REPLAY_BUFFER_SECONDS, frames_per_message=FRAMES_PER_MESSAGE,
+				payload=PAYLOAD_TEMPLATE):
+		self.session_id = session_id
+		self.source = source
+		self.url = url
+		self.headers = headers
+		self.state = state if state is not None else {}
+		self.scheduler = scheduler or TimerScheduler()
+		self.audio_writer = audio_writer
+		self.journal = journal
+		self.metrics = metrics or LatencyMetrics()
+		self.vad = vad
+		self.on_event = on_event
+		self.on_result = on_result
+		self.should_run = should_run or (lambda: True)
+		self.detect_partials = detect_partials
+		self.log = log
+		self.connect = connect or websockets.connect
+		self.use_standby = standby
+		self.frames_per_message = max(1, frames_per_message)
+		self.payloads = payload_writer(payload)
+		self.pipeline = TranscriptPipeline(self.state, matcher, on_name=on_name, on_event=self._on_event,
+											journal=journal, metrics=self.metrics, detect_partials=detect_partials,
+											log=log)
+		self.stats = SessionStats()
+		self.replay = ReplayBuffer(replay_seconds * 1000)
+		self.offsets = AudioOffsetMap(source.rate)
+		self.captured_frames = 0  # recording position, counted over every captured chunk
+		self.stopped = False
+		self.source_done = False
+		self.ws = None  # live connection, None during an outage
+		self.standby = None
+		self.standby_taken = asyncio.Event()
+		self.connection_base_ms = 0.0  # session timeline position of the live connection's audio 0
+		self.sent_ms = 0.0  # session timeline position sent on the live connection
+		self.last_final_end = None
+		self.lost_at = None
+
+	def running(self):
+		return not self.stopped and self.should_run()
+
+	def stop(self):
+		"""Ask the session to finish; safe to call from the session's event loop"""
+		self.stopped = True
+		if self.ws is not None:
+			asyncio.ensure_future(self.ws.close())
+
+	async def run(self):
+		self.stats.started_at = time.monotonic()
+		await self.source.start()
+		tasks = [self._send(), self._connections(), self.scheduler.run_async(self.running)]
+		if self.use_standby:
+			tasks.append(self._maintain_standby())
+		try:
+			await asyncio.gather(*tasks)
+		finally:
+			self.source.close()
+			self.ws = None
+			self.stopped = True
+			if self.standby is not None:
+				await self.standby.close()
+				self.standby = None
+			self.stats.ended_at = time.monotonic()
+
+	async def _connect(self):
+		kwargs = {'ping_interval': 5, 'ping_timeout': 20}
+		if self.headers:
+			kwargs['extra_headers'] = self.headers
+		return await asyncio.wait_for(self.connect(self.url, **kwargs), CONNECT_TIMEOUT)
+
+	async def _open(self):
+		"""Promote the standby connection if it is still open, else connect"""
+		standby, self.standby = self.standby, None
+		self.standby_taken.set()
+		if standby is not None:
+			if standby.close_code is None:
+				self.stats.standby_promotions += 1
+				return standby
+			await standby.close()
+		return await self._connect()
+
+	async def _maintain_standby(self):
+		delay = RECONNECT_DELAY
+		while self.running():
+			if self.ws is not None and (self.standby is None or self.standby.close_code is not None):
+				try:
+					self.standby = await self._connect()
+					delay = RECONNECT_DELAY
+				except Exception as e:
+					self.log(f"[{self.session_id}] Standby connection failed: {e}")
+					await asyncio.sleep(delay)
+					delay = min(delay * 2, MAX_RECONNECT_DELAY)
+					continue
+			self.standby_taken.clear()
+			try:
+				await asyncio.wait_for(self.standby_taken.wait(), 1.0)
+			except asyncio.TimeoutError:
+				pass
+
+	async def _connections(self):
+		"""Keep one live connection until the session ends, reconnecting after drops"""
+		stats = self.stats
+		failures = 0
+		delay = RECONNECT_DELAY
+		while self.running():
+			try:
+				ws = await self._open()
+			except Exception as e:
+				failures += 1
+				self.log(f"[{self.session_id}] Connection failed ({failures}/{MAX_CONNECT_FAILURES}): {e}")
+				if failures >= MAX_CONNECT_FAILURES:
+					stats.error = stats.error or f"connect: {e}"
+					self.stopped = True
+					return
+				await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+				delay = min(delay * 2, MAX_RECONNECT_DELAY)
+				continue
+			failures = 0
+			stats.connections += 1
+			if self.lost_at is not None:
+				outage = time.monotonic() - self.lost_at
+				stats.reconnects += 1
+				stats.outage_seconds += outage
+				self.metrics.observe('reconnect', outage)
+				self.log(f"[{self.session_id}] Reconnected after {outage:.2f}s")
+			else:
+				self.log(f"[{self.session_id}] Connected to realtime websocket")
+			connected_at = time.monotonic()
+			try:
+				await self._resume(ws)
+				outcome = await self._receive(ws)
+			except websockets.ConnectionClosed:
+				outcome = LOST
+			except Exception as e:
+				self.log(f"[{self.session_id}] Error in receive: {e}")
+				stats.error = stats.error or f"receive: {e}"
+				outcome = STOPPED
+			finally:
+				self.ws = None
+				# Closing a dead socket can wait out its close timeout; do not hold up the reconnect
+				asyncio.ensure_future(ws.close())
+			if outcome != LOST or not self.running():
+				# Nothing more will arrive; let send() and the timers wind down
+				self.stopped = True
+				return
+			self.lost_at = time.monotonic()
+			if time.monotonic() - connected_at < STABLE_CONNECTION_SECONDS:
+				# Dropped again soon after connecting: back off
+				await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+				delay = min(delay * 2, MAX_RECONNECT_DELAY)
+			else:
+				delay = RECONNECT_DELAY
+
+	async def _resume(self, ws):
+		"""Resend unacknowledged audio on a new connection, then make it live"""
+		self.metrics.start_stream()
+		pending = self.replay.after(self.replay.acked_ms)
+		self.connection_base_ms = pending[0][0] if pending else self.replay.total_ms
+		sent_ms = self.connection_base_ms
+		replayed = 0
+		# Capture keeps appending while we send, so loop until caught up
+		while True:
+			pending = self.replay.after(sent_ms)
+			if not pending:
+				break
+			for i in range(0, len(pending), self.frames_per_message):
+				batch = pending[i:i + self.frames_per_message]
+				await self._send_audio(ws, batch)
+				sent_ms = batch[-1][1]
+				replayed += len(batch)
+		self.sent_ms = sent_ms
+		self.ws = ws
+		if replayed and self.lost_at is not None:
+			self.stats.replayed_chunks += replayed
+			self.log(f"[{self.session_id}] Replayed {replayed} chunks from the outage")
+		if self.source_done:
+			await ws.send(json.dumps({"terminate_session": True}))
+
+	async def _send_audio(self, ws, batch):
+		"""Send replay buffer items (start_ms, end_ms, chunk, captured_at) as one message"""
+		stats = self.stats
+		cpu_started = time.thread_time()
+		payload = self.payloads.write([item[2] for item in batch])
+		stats.cpu_seconds += time.thread_time() - cpu_started
+		await send_payload(ws, payload)
+		for start_ms, end_ms, chunk, captured_at in batch:
+			self.metrics.chunk_sent(end_ms - start_ms, captured_at)
+			stats.bytes_sent += len(chunk)
+		stats.chunks_sent += len(batch)
+		stats.messages_sent += 1
+
+	async def _flush(self, batch):
+		"""Send batched chunks on the live connection; during an outage they wait in the replay buffer"""
+		ws = self.ws
+		if ws is None:
+			return
+		# A reconnect in between may already have replayed some of them
+		batch = [item for item in batch if item[1] > self.sent_ms]
+		if not batch:
+			return
+		try:
+			await self._send_audio(ws, batch)
+		except websockets.ConnectionClosed:
+			if self.ws is ws:
+				self.ws = None
+			return
+		if self.ws is ws:
+			self.sent_ms = batch[-1][1]
+
+	async def _send(self):
+		stats = self.stats
+		chunk_ms = self.source.chunk_ms
+		per_message = self.frames_per_message
+		batch = []  # replay buffer items not sent yet
+		while self.running():
+			try:
+				item = await self.source.read(timeout=0.5)
+				if item is None:
+					if self.source.finished:
+						self.source_done = True
+						if self.source.error:
+							stats.error = stats.error or self.source.error
+						for i in range(0, len(batch), per_message):
+							await self._flush(batch[i:i + per_message])
+						if self.ws is not None:
+							# Ask the server to flush the last transcript and close
+							await self.ws.send(json.dumps({"terminate_session": True}))
+						return
+					continue
+				data, captured_at = item
+				cpu_started = time.thread_time()
+				if self.audio_writer:
+					self.audio_writer.write(data)
+				# Send for real-time transcription, skipping silence when gated
+				chunks = self.vad.process(data) if self.vad else (data,)
+				stats.cpu_seconds += time.thread_time() - cpu_started
+				stats.chunks_captured += 1
+				frame_bytes = self.source.frame_bytes
+				self.captured_frames += len(data) // frame_bytes
+				# Recording frame the first returned chunk starts at
+				chunk_frame = self.captured_frames - sum(len(chunk) for chunk in chunks) // frame_bytes
+				for i, chunk in enumerate(chunks):
+					# Pre-roll chunks were captured one chunk apart before this one
+					chunk_captured_at = captured_at - (len(chunks) - 1 - i) * chunk_ms / 1000
+					start_ms, end_ms = self.replay.append(chunk, chunk_ms, chunk_captured_at)
+					self.offsets.add(start_ms, end_ms, chunk_frame, len(chunk) // frame_bytes)
+					chunk_frame += len(chunk) // frame_bytes
+					batch.append((start_ms, end_ms, chunk, chunk_captured_at))
+				# Send full messages; a pause in speech (nothing to send) flushes a partial one
+				ready = len(batch) - len(batch) % per_message if chunks else len(batch)
+				for i in range(0, ready, per_message):
+					await self._flush(batch[i:i + per_message])
+				del batch[:ready]
+			except Exception as e:
+				self.log(f"[{self.session_id}] Error in send: {e}")
+				stats.error = stats.error or f"send: {e}"
+				self.stopped = True
+				break
+
+	def _stitch(self, result, base_ms):
+		"""Shift a result onto the session timeline; None if already covered by an earlier final"""
+		audio_end = result.get('audio_end')
+		if audio_end is None:
+			return result
+		stitched = dict(result, audio_end=int(audio_end + base_ms))
+		if result.get('audio_start') is not None:
+			stitched['audio_start'] = int(result['audio_start'] + base_ms)
+		if self.last_final_end is not None and stitched['audio_end'] <= self.last_final_end:
+			self.stats.duplicates_dropped += 1
+			return None
+		self.offsets.annotate(stitched)
+		if result.get('message_type') == 'FinalTranscript':
+			self.last_final_end = stitched['audio_end']
+			self.replay.ack(stitched['audio_end'])
+		return stitched
+
+	async def _receive(self, ws):
+		stats = self.stats
+		base_ms = self.connection_base_ms
+		while self.running():
+			try:
+				result_str = await ws.recv()
+			except websockets.ConnectionClosed as e:
+				if self.running():
+					self.log(f"[{self.session_id}] Connection lost: {e}")
+				return LOST
+			received_at = time.monotonic()
+			cpu_started = time.thread_time()
+			result = json.loads(result_str)
+			stats.messages_received += 1
+			message_type = result.get('message_type')
+			if message_type == 'SessionTerminated':
+				return TERMINATED
+			if message_type == 'FinalTranscript':
+				stats.finals += 1
+				self.metrics.final_received(result, received_at)
+			elif message_type == 'PartialTranscript':
+				stats.partials += 1
+				if self.detect_partials:
+					self.metrics.final_received(result, received_at, kind='partial')
+			if message_type in ('FinalTranscript', 'PartialTranscript'):
+				result = self._stitch(result, base_ms)
+			if result is not None:
+				message = self.pipeline.process(result)
+				if self.on_result:
+					self.on_result(result, message)
+			stats.cpu_seconds += time.thread_time() - cpu_started
+		return STOPPED
+
+	def _on_event(self, detected, score):
+		self.stats.events += 1
+		if self.on_event:
+			self.on_event(detected, score)
+		elif detected['event'] in EVENT_TIMERS:
+			self.start_event_timer(detected['event'])
+
+	def start_event_timer(self, event):
+		"""Headless timer: start (or restart) the timer for event and journal it"""
+		name, seconds, _, _ = EVENT_TIMERS[event]
+
+		def on_expire(timer):
+			self.journal_timer('expire', name)
+		self.scheduler.start(name, seconds, on_expire=on_expire)
+		self.journal_timer('start', name, seconds=seconds, event=event)
+
+	def journal_timer(self, action, name, **fields):
+		if self.journal:
+			self.journal.append(TIMER, action=action, timer=name, **fields)
+
+	def report(self):
+		report = {'session_id': self.session_id}
+		report.update(self.stats.to_dict())
+		report['utterances'] = len(self.state.get('text', []))
+		report['source'] = self.source.stats()
+		report['replay_dropped_chunks'] = self.replay.dropped_chunks
+		if self.vad:
+			report['vad'] = self.vad.stats()
+		return report
+
+
+class SessionHost:
+	"""Runs many CodeSessions concurrently on one event loop.
+
+	A session that fails (connection refused, dropped socket, a bug in a
+	callback) records its error and ends without affecting the others.
+	"""
+
+	def __init__(self):
+		self.sessions = {}
+		self.cpu_seconds = 0.0
+		self.wall_seconds = 0.0
+
+	def add(self, session):
+		if session.session_id in self.sessions:
+			raise ValueError(f"Duplicate session id: {session.session_id}")
+		self.sessions[session.session_id] = session
+		return session
+
+	async def run_session(self, session, delay=0.0):
+		if delay:
+			await asyncio.sleep(delay)
+		try:
+			await session.run()
+		except Exception as e:
+			session.stats.error = session.stats.error or f"{type(e).__name__}: {e}"
+			session.log(f"[{session.session_id}] Session failed: {e}")
+
+	async def run_all(self, stagger=0.0):
+		"""Run every added session to completion; stagger spreads their start times"""
+		cpu_started = time.process_time()
+		wall_started = time.monotonic()
+		try:
+			await asyncio.gather(*(self.run_session(session, i * stagger)
+									for i, session in enumerate(self.sessions.values())))
+		finally:
+			self.cpu_seconds = time.process_time() - cpu_started
+			self.wall_seconds = time.monotonic() - wall_started
+
+	def stop_all(self):
+		for session in self.sessions.values():
+			session.stop()
+
+	def report(self):
+		sessions = [session.report() for session in self.sessions.values()]
+		return {
+			'sessions': sessions,
+			'failed': sum(1 for s in sessions if s['error']),
+			'wall_s': round(self.wall_seconds, 3),
+			'process_cpu_s': round(self.cpu_seconds, 3),
+			'cpu_utilization': round(self.cpu_seconds / self.wall_seconds, 4) if self.wall_seconds else 0.0,
+		}
@@ -0,0 +1,170 @@
+import itertools
+import os
+import subprocess
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from audio_archive import build_archive
+
+SEGMENT_SECONDS = 300  # Long recordings are split and encoded in parallel
+
+QUEUED = 'queued'
+ENCODING = 'encoding'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def encode_segment(wav_path, start_frame, nframes, out_path):
+	"""Encode frames [start_frame, start_frame + nframes) of a WAV to M4A"""
+	from pydub import AudioSegment  # imported in the worker, not by the app
+	with wave.open(wav_path, 'rb') as wf:
+		wf.setpos(start_frame)
+		data = wf.readframes(nframes)
+		audio = AudioSegment(
+			data=data,
+			sample_width=wf.getsampwidth(),
+			frame_rate=wf.getframerate(),
+			channels=wf.getnchannels(),
+		)
+	audio.export(out_path, format="ipod")  # ipod format = M4A
+	return out_path
+
+
+def concat_m4a(parts, out_path):
+	"""Join M4A segments without re-encoding using ffmpeg's concat demuxer"""
+	from pydub import AudioSegment
+	with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as listing:
+		for part in parts:
+			listing.write(f"file '{os.path.abspath(part)}'\n")
+	try:
+		subprocess.run(
+			[AudioSegment.converter, '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+				'-i', listing.name, '-c', 'copy', out_path],
+			check=True,
+		)
+	finally:
+		os.remove(listing.name)
+	return out_path
+
+
+class EncodeJob:
+	def __init__(self, job_id, wav_path, m4a_path, delete_wav, archive_base=None):
+		self.id = job_id
+		self.wav_path = wav_path
+		self.m4a_path = m4a_path
+		self.delete_wav = delete_wav
+		self.archive_base = archive_base
+		self.status = QUEUED
+		self.error = None
+		self.segments = 0
+		self.submitted_at = time.time()
+		self.finished_at = None
+
+	@property
+	def done(self):
+		return self.status in (DONE, FAILED)
+
+	def to_dict(self):
+		return {
+			'id': self.id,
+			'wav_path': self.wav_path,
+			'm4a_path': self.m4a_path,
+			'archive_base': self.archive_base,
+			'status': self.status,
+			'error': self.error,
+			'segments': self.segments,
+			'submitted_at': self.submitted_at,
+			'finished_at': self.finished_at,
+		}
+
+
+class EncodePool:
+	"""Background WAV -> M4A encoding so stopping a recording returns at once.
+
+	Jobs are coordinated on a small thread pool; the ffmpeg work for each
+	segment runs in a process pool so several sessions (and the segments of
+	one long session) encode in parallel.
+	"""
+
+	def __init__(self, processes=None, coordinators=2, segment_seconds=SEGMENT_SECONDS):
+		self.segment_seconds = segment_seconds
+		self.processes = ProcessPoolExecutor(max_workers=processes)
+		self.coordinators = ThreadPoolExecutor(max_workers=coordinators, thread_name_prefix='encode-job')
+		self.jobs = {}
+		self._ids = itertools.count(1)
+		self._lock = threading.Lock()
+
+	def submit(self, wav_path, m4a_path, delete_wav=True, archive_base=None):
+		"""Queue a WAV for encoding and return its job id immediately.
+
+		With archive_base the WAV is also written as a segment archive
+		(audio_archive.py) for clip extraction, before it is deleted.
+		"""
+		with self._lock:
+			job = EncodeJob(next(self._ids), wav_path, m4a_path, delete_wav, archive_base)
+			self.jobs[job.id] = job
+		self.coordinators.submit(self._run, job)
+		return job.id
+
+	def status(self, job_id):
+		job = self.jobs.get(job_id)
+		return job.to_dict() if job else None
+
+	def pending(self):
+		return [job.to_dict() for job in self.jobs.values() if not job.done]
+
+	def _run(self, job):
+		job.status = ENCODING
+		parts = []
+		try:
+			with wave.open(job.wav_path, 'rb') as wf:
+				total_frames = wf.getnframes()
+				segment_frames = self.segment_seconds * wf.getframerate()
+			ranges = [(start, min(segment_frames, total_frames - start))
+						for start in range(0, total_frames, segment_frames)] or [(0, 0)]
+			job.segments = len(ranges)
+			archived = self.processes.submit(build_archive, job.wav_path, job.archive_base) if job.archive_base else None
+			if len(ranges) == 1:
+				self.processes.submit(encode_segment, job.wav_path, 0, ranges[0][1], job.m4a_path).result()
+			else:
+				base, _ = os.path.splitext(job.m4a_path)
+				parts = [f"{base}.part{i:03d}.m4a" for i in range(len(ranges))]
+				futures = [self.processes.submit(encode_segment, job.wav_path, start, nframes, part)
+							for (start, nframes), part in zip(ranges, parts)]
+				for future in futures:
+					future.result()
+				concat_m4a(parts, job.m4a_path)
+			if archived:
+				archived.result()
+			if job.delete_wav:
+				os.remove(job.wav_path)
+			job.status = DONE
+		except Exception as e:
+			print(f"Encode error for {job.wav_path}: {e}")
+			job.error = str(e)
+			job.status = FAILED
+		finally:
+			for part in parts:
+				if os.path.exists(part):
+					os.remove(part)
+			job.finished_at = time.time()
+
+	def shutdown(self, wait=True):
+		self.coordinators.shutdown(wait=wait)
+		self.processes.shutdown(wait=wait)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_encode_pool():
+	"""Process-wide pool shared by every Streamlit session and rerun"""
+	global _pool
+	with _pool_lock:
+		if _pool is None:
+			_pool = EncodePool()
+		return _pool
@@ -0,0 +1,128 @@
+"""Detected events, coalesced and indexed by type and time.
+
+One utterance often matches several phrases of the same event ("shock
+delivered", "shocking now"), and partial transcripts repeat what the final
+will say. EventStore.add() merges a detection into the latest record of its
+type when it arrives within coalesce_seconds of that record's first
+detection: the record keeps the best detection's phrase, score and text
+(final transcripts outrank partials, then the higher score wins) and
+counts the detections it absorbed; its timestamp stays that of the first
+detection. Anything later starts a new record. The window does not slide,
+so steady repeats still open a new record (and restart their timer) once
+per window.
+
+Records are kept in time order with a per-type index, so the common
+questions do not scan the session:
+
+	store.latest('MED_EPINEPHRINE')        O(1)
+	store.between(t0, t1, 'DEFIB_SHOCK')   O(log n + k)
+	store.count('CPR_START')               O(1)
+
+The store is list-like (len, iteration, indexing and slicing) so views can
+sync from it like from the plain list it replaces; take_updates() reports
+records changed by a merge since the last call.
+"""
+from bisect import bisect_left, bisect_right
+
+COALESCE_SECONDS = 5.0
+
+
+class EventStore:
+	def __init__(self, coalesce_seconds=COALESCE_SECONDS):
+		self.coalesce_seconds = coalesce_seconds
+		self.records = []
+		self.times = []  # first detection time of each record, non-decreasing
+		self._by_event = {}  # event -> ([times], [record indexes])
+		self._updated = []
+		self.detections = 0
+
+	def __len__(self):
+		return len(self.records)
+
+	def __iter__(self):
+		return iter(self.records)
+
+	def __getitem__(self, index):
+		return self.records[index]
+
+	def add(self, detected, score=None, at=0.0):
+		"""Add one detection at time `at` (seconds); returns (record, created)"""
+		self.detections += 1
+		event = detected['event']
+		index = self._by_event.get(event)
+		if index and at - index[0][-1] <= self.coalesce_seconds:
+			position = index[1][-1]
+			record = self.records[position]
+			self._merge(record, detected, score)
+			self._updated.append(position)
+			return record, False
+		record = dict(detected, score=score, count=1)
+		if self.times and at < self.times[-1]:
+			at = self.times[-1]  # keep the time index sorted if a clock steps back
+		position = len(self.records)
+		self.records.append(record)
+		self.times.append(at)
+		if index is None:
+			index = self._by_event[event] = ([], [])
+		index[0].append(at)
+		index[1].append(position)
+		return record, True
+
+	@staticmethod
+	def _rank(detection):
+		# Final transcripts outrank partials, then the higher score wins
+		score = detection.get('score')
+		return (not detection.get('partial'), -1 if score is None else score)
+
+	def _merge(self, record, detected, score):
+		record['count'] += 1
+		if self._rank(dict(detected, score=score)) > self._rank(record):
+			# phrase and text move together so the phrase is always found in the text
+			record.pop('partial', None)
+			if detected.get('partial'):
+				record['partial'] = True
+			record['score'] = score
+			record['phrase'] = detected['phrase']
+			record['text'] = detected['text']
+		if detected.get('end_sample') is not None:
+			record['end_sample'] = max(record.get('end_sample', 0), detected['end_sample'])
+		if detected.get('start_sample') is not None and record.get('start_sample') is None:
+			record['start_sample'] = detected['start_sample']
+
+	def latest(self, event=None):
+		"""Most recent record, of one event type if given"""
+		if event is None:
+			return self.records[-1] if self.records else None
+		index = self._by_event.get(event)
+		return self.records[index[1][-1]] if index else None
+
+	def latest_time(self, event):
+		index = self._by_event.get(event)
+		return index[0][-1] if index else None
+
+	def between(self, start, end, event=None):
+		"""Records first detected in [start, end], oldest first"""
+		if event is None:
+			return self.records[bisect_left(self.times, start):bisect_right(self.times, end)]
+		index = self._by_event.get(event)
+		if not index:
+			return []
+		times, positions = index
+		return [self.records[i] for i in positions[bisect_left(times, start):bisect_right(times, end)]]
+
+	def count(self, event=None):
+		if event is None:
+			return len(self.records)
+		index = self._by_event.get(event)
+		return len(index[1]) if index else 0
+
+	def event_types(self):
+		return list(self._by_event)
+
+	def take_updates(self):
+		"""Indexes of records changed by a merge since the last call"""
+		updated, self._updated = self._updated, []
+		return sorted(set(updated))
+
+	def to_list(self):
+		return list(self.records)
@@ -0,0 +1,121 @@
+"""Re-run event detection over archived transcripts in bulk.
+
+After an edit to resuscitation_events.yaml, this rescores every saved
+utterance against every phrase. Utterances from all sessions are scored in
+chunks, one phrase x utterance matrix per chunk (rapidfuzz cdist, spread
+over all cores). The hits are the ones the live pipeline would find. Each
+session's events are written as a timeline, and throughput is reported in
+utterance x phrase pairs per second.
+
+	python extract_events.py recordings/ --out recordings/timelines --compare
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+from phrase_matcher import PhraseMatcher, EVENTS_FILE
+from transcript_archive import clock_seconds, session_offset, DEFAULT_PATTERNS
+from transcript_pipeline import sample_offsets
+
+TIMELINES_DIR = os.path.join("recordings", "timelines")
+CHUNK_UTTERANCES = 4096  # utterances scored per matrix; bounds memory at phrases x chunk floats
+
+
+def load_sessions(patterns):
+	"""[(name, messages)] for every transcript JSON matched by patterns"""
+	files = sorted({f for pattern in patterns
+					for f in (glob.glob(os.path.join(pattern, '*.json')) if os.path.isdir(pattern) else glob.glob(pattern))})
+	sessions = []
+	for path in files:
+		try:
+			with open(path, 'r') as f:
+				data = json.load(f)
+		except (OSError, json.JSONDecodeError) as e:
+			print(f"Skipping {path}: {e}")
+			continue
+		if isinstance(data, dict) and 'messages' in data:
+			name = os.path.splitext(os.path.basename(path))[0].replace('_transcript', '')
+			sessions.append((name, data['messages']))
+	return sessions
+
+
+def extract(sessions, matcher, chunk=CHUNK_UTTERANCES, workers=-1):
+	"""Detect events in every session; returns {name: [event, ...]} in utterance order"""
+	owners = []  # (session index, message) per utterance, across all sessions
+	texts = []
+	for index, (_, messages) in enumerate(sessions):
+		for msg in messages:
+			owners.append((index, msg))
+			texts.append(msg.get('text', ''))
+	starts = [clock_seconds(messages[0]['timestamp']) if messages and messages[0].get('timestamp') else None
+			for _, messages in sessions]
+	timelines = {name: [] for name, _ in sessions}
+	for begin in range(0, len(texts), chunk):
+		scores = matcher.score_matrix(texts[begin:begin + chunk], workers=workers)
+		for col, row, score in matcher.hits(scores):
+			index, msg = owners[begin + col]
+			timelines[sessions[index][0]].append({
+				'offset_s': session_offset(msg.get('timestamp'), starts[index]),
+				'timestamp': msg.get('timestamp'),
+				'event': matcher.events[row],
+				'phrase': matcher.phrases[row],
+				'score': score,
+				'speaker': msg.get('speaker'),
+				'text': msg.get('text', ''),
+				**sample_offsets(msg),
+			})
+	return timelines
+
+
+def write_timelines(timelines, out_dir=TIMELINES_DIR, events_file=EVENTS_FILE):
+	os.makedirs(out_dir, exist_ok=True)
+	for name, events in timelines.items():
+		path = os.path.join(out_dir, f"{name}_events.json")
+		with open(path, 'w') as f:
+			json.dump({'session': name, 'events_file': events_file, 'events': events}, f, indent=2)
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Bulk event extraction over saved transcripts")
+	parser.add_argument('paths', nargs='*', default=DEFAULT_PATTERNS, help="transcript files, globs or directories")
+	parser.add_argument('--events', default=EVENTS_FILE, help="event phrase YAML")
+	parser.add_argument('--out', default=TIMELINES_DIR, help="directory for per-session timelines")
+	parser.add_argument('--chunk', type=int, default=CHUNK_UTTERANCES, help="utterances per score matrix")
+	parser.add_argument('--workers', type=int, default=-1, help="scoring threads (-1 = all cores)")
+	parser.add_argument('--no-write', action='store_true', help="only report throughput")
+	parser.add_argument('--compare', action='store_true', help="also time the per-utterance matcher for reference")
+	args = parser.parse_args()
+
+	matcher = PhraseMatcher.from_yaml(args.events)
+	sessions = load_sessions(args.paths)
+	utterances = sum(len(messages) for _, messages in sessions)
+	if not utterances:
+		print("No transcripts found")
+		return
+
+	started = time.perf_counter()
+	timelines = extract(sessions, matcher, args.chunk, args.workers)
+	elapsed = time.perf_counter() - started
+	if not args.no_write:
+		write_timelines(timelines, args.out, args.events)
+
+	pairs = utterances * len(matcher)
+	events = sum(len(events) for events in timelines.values())
+	print(f"{len(sessions)} sessions, {utterances} utterances x {len(matcher)} phrases, {events} events")
+	print(f"  bulk: {elapsed:.3f}s, {pairs / elapsed:,.0f} pairs/sec, {utterances / elapsed:,.0f} utterances/sec")
+	if args.compare:
+		started = time.perf_counter()
+		for _, messages in sessions:
+			for msg in messages:
+				matcher.match(msg.get('text', ''))
+		loop_elapsed = time.perf_counter() - started
+		print(f"  per-utterance match(): {loop_elapsed:.3f}s, {pairs / loop_elapsed:,.0f} pairs/sec "
+			f"({loop_elapsed / elapsed:.1f}x slower)")
+	if not args.no_write:
+		print(f"Timelines written to {args.out}")
+
+
+if __name__ == "__main__":
+	main()
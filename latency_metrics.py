@@ -0,0 +1,208 @@
+"""Per-stage latency instrumentation for capture -> ASR -> detection -> alert.
+
+Stages are timed on the monotonic clock and aggregated into rolling
+histograms, so "the CPR timer started late" can be pinned on the mic, the
+network/ASR, the matcher or Streamlit:
+
+	capture_to_send   chunk captured -> sent on the websocket (queueing, VAD)
+	send_to_final     last audio of an utterance sent -> FinalTranscript received
+	capture_to_final  last audio of an utterance captured -> FinalTranscript received
+	match             phrase matching for one utterance
+	final_to_timer    FinalTranscript received -> timer started
+	final_to_render   FinalTranscript received -> transcript rendered
+	reconnect         websocket lost -> replacement connection live
+
+Snapshots are written to a JSON file periodically and can also be served
+from a local HTTP endpoint.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+
+METRICS_FILE = os.path.join("recordings", "metrics.json")
+WINDOW_SAMPLES = 1000  # Percentiles cover the most recent samples per stage
+BUCKET_BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+
+class RollingHistogram:
+	def __init__(self, window=WINDOW_SAMPLES):
+		self.samples = deque(maxlen=window)
+		self.count = 0
+		self.total = 0.0
+
+	def observe(self, seconds):
+		self.samples.append(seconds)
+		self.count += 1
+		self.total += seconds
+
+	def snapshot(self):
+		ordered = sorted(self.samples)
+		if not ordered:
+			return {'count': self.count}
+
+		def pct(p):
+			return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 3)
+
+		buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+		for value in ordered:
+			buckets[bisect.bisect_left(BUCKET_BOUNDS_MS, value * 1000)] += 1
+		return {
+			'count': self.count,
+			'mean_ms': round(self.total / self.count * 1000, 3),
+			'p50_ms': pct(50),
+			'p95_ms': pct(95),
+			'p99_ms': pct(99),
+			'max_ms': round(ordered[-1] * 1000, 3),
+			'buckets_ms': dict(zip([f"<={b}" for b in BUCKET_BOUNDS_MS] + ['>max'], buckets)),
+		}
+
+
+class AudioClock:
+	"""Maps the ASR's audio timeline (ms of audio sent) back to local times"""
+
+	def __init__(self, max_entries=3000):
+		self.sent_ms = deque(maxlen=max_entries)
+		self.times = deque(maxlen=max_entries)  # (captured_at, sent_at)
+		self.total_ms = 0.0
+
+	def record(self, audio_ms, captured_at, sent_at):
+		self.total_ms += audio_ms
+		self.sent_ms.append(self.total_ms)
+		self.times.append((captured_at, sent_at))
+
+	def lookup(self, audio_end_ms):
+		"""Return (captured_at, sent_at) of the chunk containing audio_end_ms"""
+		if not self.sent_ms:
+			return None
+		index = bisect.bisect_left(self.sent_ms, audio_end_ms)
+		return self.times[min(index, len(self.times) - 1)]
+
+
+class LatencyMetrics:
+	def __init__(self, clock=time.monotonic):
+		self.clock = clock
+		self.histograms = {}
+		self.audio_clock = AudioClock()
+		self.last_final_at = None
+		self._lock = threading.Lock()
+
+	def observe(self, stage, seconds):
+		with self._lock:
+			histogram = self.histograms.get(stage)
+			if histogram is None:
+				histogram = self.histograms[stage] = RollingHistogram()
+			histogram.observe(seconds)
+
+	def start_stream(self):
+		"""Reset the audio timeline when a new ASR connection starts"""
+		with self._lock:
+			self.audio_clock = AudioClock()
+		self.last_final_at = None
+
+	def chunk_sent(self, audio_ms, captured_at, sent_at=None):
+		sent_at = self.clock() if sent_at is None else sent_at
+		self.observe('capture_to_send', sent_at - captured_at)
+		with self._lock:
+			self.audio_clock.record(audio_ms, captured_at, sent_at)
+
+	def final_received(self, result, received_at=None, kind='final'):
+		"""Call when a transcript arrives; uses its audio_end to find the audio.
+
+		kind='partial' records send_to_partial / capture_to_partial instead,
+		for sessions that detect events on partial transcripts.
+		"""
+		received_at = self.clock() if received_at is None else received_at
+		self.last_final_at = received_at
+		audio_end = result.get('audio_end')
+		if audio_end is None:
+			return
+		with self._lock:
+			times = self.audio_clock.lookup(audio_end)
+		if times:
+			captured_at, sent_at = times
+			self.observe(f'send_to_{kind}', received_at - sent_at)
+			self.observe(f'capture_to_{kind}', received_at - captured_at)
+
+	def since_final(self, stage):
+		"""Record the time from the last FinalTranscript to now under stage"""
+		if self.last_final_at is not None:
+			self.observe(stage, self.clock() - self.last_final_at)
+
+	def snapshot(self):
+		with self._lock:
+			stages = {stage: histogram.snapshot() for stage, histogram in self.histograms.items()}
+		return {'updated': time.time(), 'stages': stages}
+
+	def write(self, path=METRICS_FILE):
+		tmp_path = f"{path}.tmp"
+		with open(tmp_path, 'w') as f:
+			json.dump(self.snapshot(), f, indent=2)
+		os.replace(tmp_path, path)
+
+
+class MetricsFileWriter(threading.Thread):
+	"""Writes a metrics snapshot to disk every interval seconds"""
+
+	def __init__(self, metrics, path=METRICS_FILE, interval=5.0):
+		super().__init__(daemon=True, name='metrics-writer')
+		self.metrics = metrics
+		self.path = path
+		self.interval = interval
+		self.stopped = threading.Event()
+
+	def run(self):
+		while not self.stopped.wait(self.interval):
+			self._write()
+
+	def _write(self):
+		try:
+			self.metrics.write(self.path)
+		except OSError as e:
+			print(f"Error writing metrics: {e}")
+
+	def stop(self):
+		self.stopped.set()
+		self._write()
+
+
+def serve_metrics(metrics, port, host='127.0.0.1'):
+	"""Serve GET /metrics as JSON from a daemon thread; returns the server"""
+	from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+	class Handler(BaseHTTPRequestHandler):
+		def do_GET(self):
+			if self.path.rstrip('/') != '/metrics':
+				self.send_error(404)
+				return
+			body = json.dumps(metrics.snapshot()).encode('utf-8')
+			self.send_response(200)
+			self.send_header('Content-Type', 'application/json')
+			self.send_header('Content-Length', str(len(body)))
+			self.end_headers()
+			self.wfile.write(body)
+
+		def log_message(self, format, *args):
+			pass
+
+	server = ThreadingHTTPServer((host, port), Handler)
+	threading.Thread(target=server.serve_forever, daemon=True, name='metrics-http').start()
+	return server
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_latency_metrics(path=METRICS_FILE, port=None):
+	"""Process-wide metrics with the file writer (and HTTP endpoint) started once"""
+	global _metrics
+	with _metrics_lock:
+		if _metrics is None:
+			_metrics = LatencyMetrics()
+			MetricsFileWriter(_metrics, path).start()
+			if port:
+				serve_metrics(_metrics, port)
+		return _metrics
@@ -0,0 +1,140 @@
+"""Find how many concurrent codes one core sustains.
+
+Starts mock_asr_server.py in a subprocess (so its CPU is not counted), then
+for each session count runs that many CodeSessions in this process, each
+streaming recorded audio in real time. A step is sustained when no session
+failed, audio was never sent more than --max-lag-ms behind real time and
+the process used less than --max-cpu of one core.
+
+	python load_test.py --sessions 1,10,50,100 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from audio_payload import PAYLOAD_JSON, PAYLOAD_TEMPLATE
+from code_session import CodeSession, SessionHost, PcmSource, load_pcm, RATE, FRAMES_PER_MESSAGE
+from phrase_matcher import PhraseMatcher
+from session_journal import SessionJournal
+from voice_activity import VoiceActivityGate
+
+DEFAULT_AUDIO = os.path.join("recordings", "live_hackathon_recording.m4a")
+DEFAULT_TRANSCRIPT = os.path.join("recordings", "live_hackathon_recording.json")
+
+
+def start_mock_server(transcript, port, extra_args=()):
+	process = subprocess.Popen([sys.executable, 'mock_asr_server.py', transcript, '--port', str(port), *extra_args],
+								stdout=subprocess.PIPE, text=True)
+	line = process.stdout.readline()
+	if not line:
+		raise RuntimeError("Mock server exited before listening")
+	return process, line.rsplit(' ', 1)[-1].strip()
+
+
+def run_step(count, pcm, matcher, url, args, journal_dir=None):
+	host = SessionHost()
+	journals = []
+	chunks_per_second = 1000 / (args.frames_per_buffer * 1000 / RATE)
+	for i in range(count):
+		journal = None
+		if journal_dir:
+			journal = SessionJournal(os.path.join(journal_dir, f"room_{count}_{i}_journal.jsonl"))
+			journals.append(journal)
+		# Start each room at a different point of the recording
+		source = PcmSource(pcm, frames_per_buffer=args.frames_per_buffer, speed=1.0,
+							offset_chunks=int(i * 7.3 * chunks_per_second), seconds=args.duration)
+		host.add(CodeSession(f"room-{i}", source, matcher, url, journal=journal,
+							vad=None if args.no_vad else VoiceActivityGate(RATE), detect_partials=args.detect_partials,
+							standby=args.standby, frames_per_message=args.frames_per_message, payload=args.payload,
+							log=lambda *a: None))
+	stagger = args.frames_per_buffer / RATE / count
+	asyncio.run(host.run_all(stagger=stagger))
+	for journal in journals:
+		journal.close()
+
+	report = host.report()
+	sessions = report['sessions']
+	max_lag = max((s['source']['max_lag_ms'] for s in sessions), default=0.0)
+	p95s = [metrics.snapshot()['stages'].get('send_to_final', {}).get('p95_ms')
+			for metrics in (session.metrics for session in host.sessions.values())]
+	p95s = [p for p in p95s if p is not None]
+	cpu = report['cpu_utilization']
+	return {
+		'sessions': count,
+		'failed': report['failed'],
+		'cpu_utilization': cpu,
+		'session_cpu_ms': round(sum(s['cpu_ms'] for s in sessions), 1),
+		'max_send_lag_ms': max_lag,
+		'worst_send_to_final_p95_ms': max(p95s) if p95s else None,
+		'finals': sum(s['finals'] for s in sessions),
+		'partials': sum(s['partials'] for s in sessions),
+		'events': sum(s['events'] for s in sessions),
+		'reconnects': sum(s['reconnects'] for s in sessions),
+		'rooms_per_core_estimate': round(count / cpu, 1) if cpu else None,
+		'sustained': (report['failed'] == 0 and max_lag <= args.max_lag_ms and cpu <= args.max_cpu),
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Concurrent session load test against a mock realtime ASR")
+	parser.add_argument('--sessions', default='1,10,50', help="comma separated session counts to try")
+	parser.add_argument('--duration', type=float, default=30.0, help="seconds of audio streamed per session")
+	parser.add_argument('--audio', default=DEFAULT_AUDIO, help="recorded audio to stream")
+	parser.add_argument('--transcript', default=DEFAULT_TRANSCRIPT, help="transcript the mock server replies with")
+	parser.add_argument('--url', help="use an already running server instead of starting one")
+	parser.add_argument('--port', type=int, default=8766)
+	parser.add_argument('--latency', type=float, default=0.0, help="mock server response latency (seconds)")
+	parser.add_argument('--jitter', type=float, default=0.0, help="mock server response jitter (seconds)")
+	parser.add_argument('--partials', type=int, default=3, help="mock partial transcripts per utterance")
+	parser.add_argument('--disconnect-every', type=float, help="mock server drops connections after ~N seconds")
+	parser.add_argument('--standby', action='store_true', help="keep a standby connection per session")
+	parser.add_argument('--detect-partials', action='store_true', help="detect events on partial transcripts")
+	parser.add_argument('--frames-per-buffer', type=int, default=3200)
+	parser.add_argument('--frames-per-message', type=int, default=FRAMES_PER_MESSAGE,
+						help="capture chunks aggregated per websocket message")
+	parser.add_argument('--payload', choices=[PAYLOAD_TEMPLATE, PAYLOAD_JSON], default=PAYLOAD_TEMPLATE,
+						help="audio message writer (json = the original per-message json.dumps path)")
+	parser.add_argument('--max-lag-ms', type=float, default=200.0)
+	parser.add_argument('--max-cpu', type=float, default=0.8)
+	parser.add_argument('--no-vad', action='store_true', help="send every chunk instead of VAD-gated audio")
+	parser.add_argument('--journal', action='store_true', help="journal every session to a temp directory")
+	parser.add_argument('--json', action='store_true', help="print results as JSON")
+	args = parser.parse_args()
+
+	pcm = load_pcm(args.audio)
+	matcher = PhraseMatcher.from_yaml()
+	server = None
+	url = args.url
+	if not url:
+		mock_args = ['--latency', str(args.latency), '--jitter', str(args.jitter), '--partials', str(args.partials)]
+		if args.disconnect_every:
+			mock_args += ['--disconnect-every', str(args.disconnect_every)]
+		server, url = start_mock_server(args.transcript, args.port, mock_args)
+	results = []
+	try:
+		with tempfile.TemporaryDirectory() as journal_dir:
+			for count in (int(n) for n in args.sessions.split(',')):
+				result = run_step(count, pcm, matcher, url, args, journal_dir if args.journal else None)
+				results.append(result)
+				if not args.json:
+					print(f"{count:>5} sessions: cpu {result['cpu_utilization'] * 100:5.1f}%  "
+						f"max lag {result['max_send_lag_ms']:8.1f} ms  "
+						f"send->final p95 {result['worst_send_to_final_p95_ms']} ms  "
+						f"finals {result['finals']}  partials {result['partials']}  events {result['events']}  "
+						f"reconnects {result['reconnects']}  failed {result['failed']}  "
+						f"~{result['rooms_per_core_estimate']} rooms/core  "
+						f"{'OK' if result['sustained'] else 'NOT SUSTAINED'}")
+	finally:
+		if server:
+			server.terminate()
+			server.wait()
+	if args.json:
+		print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,241 @@
+"""Local stand-in for the realtime ASR websocket, scripted from a saved transcript.
+
+Speaks the same protocol as the realtime API: the client sends
+{"audio_data": <base64 PCM>} messages and gets SessionBegins, then
+PartialTranscript / FinalTranscript messages (text, speaker_id, confidence,
+audio_start, audio_end) and SessionTerminated after
+{"terminate_session": true}.
+
+Responses follow the transcript's messages: each one becomes due once the
+client has sent as much audio as had elapsed at that message in the original
+recording, preceded by partials that grow word by word. Transcripts whose
+timestamps collapse to a single second (batch exports stamp every message
+alike) are paced by word count instead. The script loops, so any amount of
+audio keeps producing transcripts. Faults can be injected for
+soak and resilience testing:
+
+	--latency / --jitter     delay every response (order is preserved)
+	--disconnect-every S     drop each connection after ~S seconds (exponential)
+	--disconnect-mode abort  drop the TCP connection instead of a clean close
+
+	python mock_asr_server.py recordings/live_hackathon_recording.json --port 8766 --latency 0.3 --jitter 0.1
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import websockets
+
+from replay import load_messages, to_realtime_results
+
+RATE = 16000
+SAMPLE_WIDTH = 2
+PARTIALS_PER_UTTERANCE = 3  # Growing partials sent ahead of each final
+WORDS_PER_SECOND = 2.5  # Speaking rate used to pace scripts without usable timestamps
+CLOSE = 'close'
+ABORT = 'abort'
+DISCONNECT_CLOSE_CODE = 1011
+
+
+def b64_decoded_size(data):
+	"""Byte length of base64 data without decoding it"""
+	return len(data) * 3 // 4 - data.count('=', -2)
+
+
+def pace_by_words(script, words_per_second=WORDS_PER_SECOND):
+	"""Respace a script whose offsets all collapsed: each final is due once its words have been spoken"""
+	if len(script) < 2 or script[-1][0] > script[0][0]:
+		return script
+	paced = []
+	spoken = 0
+	for _, result in script:
+		spoken += max(1, len(result.get('text', '').split()))
+		paced.append((spoken / words_per_second, result))
+	return paced
+
+
+class MockRealtimeServer:
+	def __init__(self, script, host='127.0.0.1', port=0, rate=RATE, latency=0.0, jitter=0.0,
+				partials=PARTIALS_PER_UTTERANCE, disconnect_every=None, disconnect_mode=CLOSE, seed=None):
+		if not script:
+			raise ValueError("Mock server needs at least one scripted message")
+		if disconnect_mode not in (CLOSE, ABORT):
+			raise ValueError(f"Unknown disconnect mode: {disconnect_mode}")
+		script = pace_by_words(script)
+		self.script = script  # [(offset_seconds, FinalTranscript)]
+		self.host = host
+		self.port = port
+		self.rate = rate
+		self.latency = latency
+		self.jitter = jitter
+		self.partials = partials
+		self.disconnect_every = disconnect_every
+		self.disconnect_mode = disconnect_mode
+		self.random = random.Random(seed)
+		# One pass of the script lasts until a second after its last message
+		self.period_ms = (script[-1][0] + 1) * 1000
+		self.server = None
+		self.connections = 0
+		self.active = 0
+		self.finals_sent = 0
+		self.partials_sent = 0
+		self.audio_seconds = 0.0
+		self.disconnects = 0
+		self.started_at = time.monotonic()
+
+	@classmethod
+	def from_transcript(cls, path, **kwargs):
+		return cls(to_realtime_results(load_messages(path)), **kwargs)
+
+	@property
+	def url(self):
+		return f"ws://{self.host}:{self.port}"
+
+	async def start(self):
+		self.server = await websockets.serve(self._handle, self.host, self.port)
+		self.port = next(iter(self.server.sockets)).getsockname()[1]
+		return self
+
+	async def close(self):
+		if self.server:
+			self.server.close()
+			await self.server.wait_closed()
+
+	def timeline(self):
+		"""Yield (due_ms, result) forever: each script message's partials, then its final"""
+		previous_due = 0.0
+		index = 0
+		while True:
+			loop, position = divmod(index, len(self.script))
+			offset, result = self.script[position]
+			due_ms = loop * self.period_ms + offset * 1000
+			words = result.get('text', '').split()
+			steps = min(self.partials, len(words) - 1)
+			for step in range(1, steps + 1):
+				# Spread partials over the audio between the previous final and this one
+				partial_due = previous_due + (due_ms - previous_due) * step / (steps + 1)
+				partial_text = ' '.join(words[:len(words) * step // (steps + 1)])
+				yield partial_due, dict(result, message_type='PartialTranscript', text=partial_text)
+			yield due_ms, result
+			previous_due = due_ms
+			index += 1
+
+	def response_delay(self):
+		if not self.jitter:
+			return self.latency
+		return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+	async def _send_loop(self, ws, outbox):
+		# Delivers responses at their delayed times without reordering them
+		last_due = 0.0
+		while True:
+			due, payload = await outbox.get()
+			if payload is None:
+				return
+			last_due = max(due, last_due)
+			delay = last_due - time.monotonic()
+			if delay > 0:
+				await asyncio.sleep(delay)
+			await ws.send(payload)
+
+	async def _disconnect_later(self, ws):
+		await asyncio.sleep(self.random.expovariate(1.0 / self.disconnect_every))
+		self.disconnects += 1
+		if self.disconnect_mode == ABORT:
+			ws.transport.abort()
+		else:
+			await ws.close(code=DISCONNECT_CLOSE_CODE, reason='injected disconnect')
+
+	async def _handle(self, ws, path=None):
+		self.connections += 1
+		self.active += 1
+		outbox = asyncio.Queue()
+		sender = asyncio.ensure_future(self._send_loop(ws, outbox))
+		dropper = asyncio.ensure_future(self._disconnect_later(ws)) if self.disconnect_every else None
+		try:
+			await ws.send(json.dumps({'message_type': 'SessionBegins', 'session_id': str(self.connections)}))
+			timeline = self.timeline()
+			next_due, next_result = next(timeline)
+			received_ms = 0.0
+			utterance_start = 0
+			async for message in ws:
+				data = json.loads(message)
+				if data.get('terminate_session'):
+					outbox.put_nowait((time.monotonic(), json.dumps({'message_type': 'SessionTerminated'})))
+					outbox.put_nowait((0.0, None))
+					await sender
+					break
+				audio = data.get('audio_data')
+				if not audio:
+					continue
+				audio_ms = b64_decoded_size(audio) / SAMPLE_WIDTH / self.rate * 1000
+				received_ms += audio_ms
+				self.audio_seconds += audio_ms / 1000
+				while next_due <= received_ms:
+					audio_end = int(received_ms)
+					result = dict(next_result, audio_start=utterance_start, audio_end=audio_end)
+					if result['message_type'] == 'FinalTranscript':
+						utterance_start = audio_end
+						self.finals_sent += 1
+					else:
+						self.partials_sent += 1
+					outbox.put_nowait((time.monotonic() + self.response_delay(), json.dumps(result)))
+					next_due, next_result = next(timeline)
+		except websockets.ConnectionClosed:
+			pass
+		finally:
+			self.active -= 1
+			sender.cancel()
+			if dropper:
+				dropper.cancel()
+
+	def stats(self):
+		return {
+			'uptime_s': round(time.monotonic() - self.started_at, 1),
+			'connections': self.connections,
+			'active': self.active,
+			'finals_sent': self.finals_sent,
+			'partials_sent': self.partials_sent,
+			'audio_seconds': round(self.audio_seconds, 1),
+			'disconnects_injected': self.disconnects,
+		}
+
+
+async def serve_forever(server, stats_interval=None):
+	await server.start()
+	print(f"Mock realtime ASR listening on {server.url}", flush=True)
+	while True:
+		await asyncio.sleep(stats_interval or 3600)
+		if stats_interval:
+			# One JSON line per interval for soak runs
+			print(json.dumps(server.stats()), flush=True)
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Local mock of the realtime ASR websocket")
+	parser.add_argument('transcript', help="saved transcript JSON to script responses from")
+	parser.add_argument('--host', default='127.0.0.1')
+	parser.add_argument('--port', type=int, default=8766)
+	parser.add_argument('--latency', type=float, default=0.0, help="seconds added before every response")
+	parser.add_argument('--jitter', type=float, default=0.0, help="+/- seconds of random extra delay")
+	parser.add_argument('--partials', type=int, default=PARTIALS_PER_UTTERANCE,
+						help="partial transcripts sent before each final (0 disables)")
+	parser.add_argument('--disconnect-every', type=float, help="mean seconds before each connection is dropped")
+	parser.add_argument('--disconnect-mode', choices=[CLOSE, ABORT], default=CLOSE)
+	parser.add_argument('--seed', type=int, help="seed for jitter and disconnect timing")
+	parser.add_argument('--stats-interval', type=float, help="print server stats every N seconds")
+	args = parser.parse_args()
+	server = MockRealtimeServer.from_transcript(args.transcript, host=args.host, port=args.port,
+												latency=args.latency, jitter=args.jitter, partials=args.partials,
+												disconnect_every=args.disconnect_every,
+												disconnect_mode=args.disconnect_mode, seed=args.seed)
+	try:
+		asyncio.run(serve_forever(server, args.stats_interval))
+	except KeyboardInterrupt:
+		pass
+
+
+if __name__ == "__main__":
+	main()
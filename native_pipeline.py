@@ -0,0 +1,300 @@
+"""Queue-based capture -> transcription -> detection pipeline for the native recorder.
+
+Every stage runs on its own thread and hands off through a queue; none of
+them touches Tk:
+
+    capture thread --chunks--> transcription source --results--> DetectionWorker --updates--> UI queue
+
+native_recording.py drains the UI queue on the Tk thread with root.after.
+Transcription sources are pluggable. RealtimeASRSource streams captured
+audio to the realtime websocket. TranscriptFileSource replays a saved
+transcript JSON without audio or network, so the recorder can run offline.
+
+Every source ends its results with one SessionTerminated, and the
+DetectionWorker exits on it. Stopping is therefore graceful: the realtime
+source sends terminate_session and keeps receiving until the server's last
+FinalTranscript and SessionTerminated arrive (or TERMINATE_TIMEOUT passes),
+so what was said just before Stop is still detected.
+"""
+import asyncio
+import json
+import threading
+import time
+import wave
+
+from audio_archive import AudioOffsetMap
+from audio_payload import TemplatePayloadWriter, send_payload
+from code_session import EVENT_TIMERS
+from replay import load_messages, to_realtime_results
+from transcript_pipeline import TranscriptPipeline
+
+RATE = 16000
+CHANNELS = 1
+FRAMES_PER_BUFFER = 3200
+TERMINATE_TIMEOUT = 5.0  # Seconds to wait for SessionTerminated after terminate_session
+
+# UI update kinds posted to the UI queue as (kind, payload)
+UI_MESSAGE = 'message'
+UI_EVENT = 'event'
+UI_NAME = 'name'
+UI_STATUS = 'status'
+UI_TIMER_DONE = 'timer_done'
+
+STOP = None  # sentinel that ends a worker's queue
+
+
+class MicrophoneCapture(threading.Thread):
+    """Reads PyAudio input and hands each chunk to the writer and the source"""
+
+    def __init__(self, audio, writer, source, rate=RATE, channels=CHANNELS, frames_per_buffer=FRAMES_PER_BUFFER):
+        super().__init__(daemon=True, name='native-capture')
+        self.audio = audio
+        self.writer = writer
+        self.source = source
+        self.rate = rate
+        self.channels = channels
+        self.frames_per_buffer = frames_per_buffer
+        self.running = threading.Event()
+
+    def run(self):
+        import pyaudio
+        self.running.set()
+        stream = self.audio.open(format=pyaudio.paInt16, channels=self.channels, rate=self.rate, input=True,
+                                 frames_per_buffer=self.frames_per_buffer)
+        try:
+            while self.running.is_set():
+                data = stream.read(self.frames_per_buffer, exception_on_overflow=False)
+                self.writer.write(data)
+                self.source.feed(data)
+        finally:
+            stream.stop_stream()
+            stream.close()
+            self.source.finish()
+            # Close from the capture thread so no write races the header patch
+            self.writer.close()
+
+    def stop(self, timeout=1.0):
+        self.running.clear()
+        if self.is_alive():
+            self.join(timeout)
+
+
+class WavFileCapture(threading.Thread):
+    """Plays a 16 kHz mono WAV into the pipeline in real time (speed=0: as fast as possible)"""
+
+    def __init__(self, path, writer, source, frames_per_buffer=FRAMES_PER_BUFFER, speed=1.0):
+        super().__init__(daemon=True, name='native-wav-capture')
+        self.path = path
+        self.writer = writer
+        self.source = source
+        self.frames_per_buffer = frames_per_buffer
+        self.speed = speed
+        self.running = threading.Event()
+
+    def run(self):
+        self.running.set()
+        try:
+            with wave.open(self.path, 'rb') as wav:
+                chunk_seconds = self.frames_per_buffer / wav.getframerate()
+                started = time.monotonic()
+                chunks = 0
+                while self.running.is_set():
+                    data = wav.readframes(self.frames_per_buffer)
+                    if not data:
+                        break
+                    chunks += 1
+                    if self.speed:
+                        delay = started + chunks * chunk_seconds / self.speed - time.monotonic()
+                        if delay > 0:
+                            time.sleep(delay)
+                    self.writer.write(data)
+                    self.source.feed(data)
+        finally:
+            self.source.finish()
+            self.writer.close()
+
+    def stop(self, timeout=1.0):
+        self.running.clear()
+        if self.is_alive():
+            self.join(timeout)
+
+
+class TranscriptFileSource:
+    """Replays a saved transcript's messages as FinalTranscripts at their original pace"""
+
+    needs_audio = False
+
+    def __init__(self, path, speed=1.0):
+        self.results = to_realtime_results(load_messages(path))
+        self.speed = speed
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self, out):
+        self.thread = threading.Thread(target=self._run, args=(out,), daemon=True, name='transcript-source')
+        self.thread.start()
+
+    def _run(self, out):
+        started = time.monotonic()
+        try:
+            for offset, result in self.results:
+                if self.speed:
+                    delay = started + offset / self.speed - time.monotonic()
+                    if delay > 0 and self.stopped.wait(delay):
+                        return
+                if self.stopped.is_set():
+                    return
+                out.put(result)
+        finally:
+            out.put({'message_type': 'SessionTerminated'})
+
+    def feed(self, data):
+        pass
+
+    def finish(self):
+        pass
+
+    def stop(self):
+        self.stopped.set()
+
+
+class RealtimeASRSource:
+    """Streams captured audio to the realtime websocket from an asyncio loop on its own thread"""
+
+    needs_audio = True
+
+    def __init__(self, url, headers=None, rate=RATE, terminate_timeout=TERMINATE_TIMEOUT):
+        self.url = url
+        self.headers = headers
+        self.terminate_timeout = terminate_timeout
+        self.terminated = False
+        # Every captured chunk is sent, so ASR offsets map straight onto the recording
+        self.offsets = AudioOffsetMap(rate)
+        self.loop = None
+        self.audio = None
+        self.thread = None
+
+    def start(self, out):
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(out, ready), daemon=True, name='realtime-asr')
+        self.thread.start()
+        ready.wait()
+
+    def _run(self, out, ready):
+        self.loop = asyncio.new_event_loop()
+        self.audio = asyncio.Queue()
+        ready.set()
+        try:
+            self.loop.run_until_complete(self._stream(out))
+        except Exception as e:
+            out.put({'message_type': 'Error', 'error': str(e)})
+        finally:
+            self.loop.close()
+            if not self.terminated:
+                out.put({'message_type': 'SessionTerminated'})
+
+    async def _stream(self, out):
+        import websockets
+        kwargs = {'ping_interval': 5, 'ping_timeout': 20}
+        if self.headers:
+            kwargs['extra_headers'] = self.headers
+        async with websockets.connect(self.url, **kwargs) as ws:
+            payloads = TemplatePayloadWriter()
+
+            async def send():
+                while True:
+                    data = await self.audio.get()
+                    if data is STOP:
+                        # Ask the server to flush the last transcript and close
+                        await ws.send(json.dumps({"terminate_session": True}))
+                        return
+                    await send_payload(ws, payloads.write((data,)))
+
+            async def receive():
+                async for message in ws:
+                    result = json.loads(message)
+                    out.put(self.offsets.annotate(result))
+                    if result.get('message_type') == 'SessionTerminated':
+                        self.terminated = True
+                        return
+
+            sending = asyncio.ensure_future(send())
+            receiving = asyncio.ensure_future(receive())
+            await asyncio.wait((sending, receiving), return_when=asyncio.FIRST_COMPLETED)
+            if not receiving.done():
+                # terminate_session is sent: let the server flush its last results before closing
+                try:
+                    await asyncio.wait_for(receiving, self.terminate_timeout)
+                except asyncio.TimeoutError:
+                    pass
+            sending.cancel()
+            receiving.result()
+
+    def feed(self, data):
+        # Called from the capture thread
+        if self.loop and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.audio.put_nowait, data)
+
+    def finish(self):
+        self.feed(STOP)
+
+    def stop(self):
+        """End the session without dropping its last results; the connection closes on SessionTerminated"""
+        self.finish()
+
+
+class DetectionWorker(threading.Thread):
+    """Runs the transcript pipeline on source results and posts UI updates.
+
+    Detection uses the same resuscitation_events.yaml matcher as the
+    Streamlit app, and detected events start the same EVENT_TIMERS.
+    """
+
+    def __init__(self, results, ui, matcher, scheduler, speak=None, journal=None):
+        super().__init__(daemon=True, name='native-detection')
+        self.results = results
+        self.ui = ui
+        self.scheduler = scheduler
+        self.speak = speak or (lambda text: None)
+        self.state = {}
+        self.pipeline = TranscriptPipeline(self.state, matcher, on_name=self._on_name, on_event=self._on_event,
+                                           journal=journal, log=lambda line: None)
+
+    def run(self):
+        while True:
+            result = self.results.get()
+            if result is STOP:
+                return
+            message_type = result.get('message_type')
+            if message_type == 'SessionTerminated':
+                self.ui.put((UI_STATUS, "Transcription finished."))
+                return
+            if message_type == 'Error':
+                self.ui.put((UI_STATUS, f"Transcription error: {result.get('error')}"))
+                continue
+            message = self.pipeline.process(result)
+            if message is not None:
+                self.ui.put((UI_MESSAGE, message))
+
+    def stop(self):
+        """Exit without waiting for the source's SessionTerminated"""
+        self.results.put(STOP)
+
+    def _on_name(self, letter, name):
+        self.ui.put((UI_NAME, (letter, name)))
+
+    def _on_event(self, detected, score):
+        self.ui.put((UI_EVENT, detected))
+        if detected['event'] in EVENT_TIMERS:
+            self.start_event_timer(detected['event'])
+
+    def start_event_timer(self, event):
+        """Start (or restart) the timer for event; runs on the scheduler's thread"""
+        name, seconds, prompts, done_message = EVENT_TIMERS[event]
+        alerts = {remaining: (lambda timer, prompt=prompt: self.speak(prompt))
+                  for remaining, prompt in prompts.items()}
+
+        def on_expire(timer):
+            self.ui.put((UI_TIMER_DONE, (name, done_message)))
+            self.speak(done_message)
+        self.scheduler.start(name, seconds, on_expire=on_expire, alerts=alerts)
@@ -1,129 +1,150 @@
-import asyncio
-import threading
-import pyaudio
-import wave
+import argparse
 import os
-import re
-import time
-import yaml
+import queue
 from datetime import datetime
-import pyttsx3
 from tkinter import Tk, Button, Label, StringVar, Listbox, END
 
-# Load CPR event phrases from YAML
-with open('resuscitation_events.yaml', 'r') as f:
-    event_map = yaml.safe_load(f)
-
-cpr_start_phrases = [
-    "chest compressions initiated",
-    "i'm on compressions",
-    "cpr started",
-    "starting compressions",
-    "begin cpr now",
-    "compressions going",
-    "starting cycles now"
-]
-
-# TTS engine
-engine = pyttsx3.init()
-def speak_text(text):
-    engine.say(text)
-    engine.runAndWait()
+from announcements import get_announcement_cache, SpeechWorker
+from audio_capture import get_audio_device
+from audio_writer import IncrementalWavWriter
+from native_pipeline import (MicrophoneCapture, WavFileCapture, TranscriptFileSource, RealtimeASRSource,
+                             DetectionWorker, UI_MESSAGE, UI_EVENT, UI_NAME, UI_STATUS, UI_TIMER_DONE,
+                             CHANNELS, RATE)
+from phrase_matcher import get_phrase_matcher
+from timer_scheduler import TimerScheduler, format_remaining
 
 # Audio recording settings
-FRAMES_PER_BUFFER = 3200
-FORMAT = pyaudio.paInt16
-CHANNELS = 1
-RATE = 16000
-p = pyaudio.PyAudio()
+SAMPLE_WIDTH = 2  # paInt16
+
+# Tk is only touched from the main thread: workers post to ui_updates, drained here in batches
+UI_INTERVAL_MS = 100
+UI_BATCH = 200  # most queued updates applied per tick
+
+REALTIME_URL = "wss://api.assemblyai.com/v2/realtime/ws?sample_rate=16000&speaker_labels=true"
 
 RECORDINGS_DIR = "recordings"
 os.makedirs(RECORDINGS_DIR, exist_ok=True)
 
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Code Blue native recorder")
+    parser.add_argument('--transcript', help="replay a saved transcript JSON instead of live audio (offline)")
+    parser.add_argument('--audio', help="stream a 16 kHz mono WAV instead of the microphone")
+    parser.add_argument('--url', help="realtime ASR websocket (e.g. a local mock_asr_server.py)")
+    parser.add_argument('--speed', type=float, default=1.0, help="playback speed for --transcript / --audio")
+    return parser.parse_args()
+
+
+args = parse_args()
+
+# TTS: pre-rendered announcements played from a single queue
+speech = SpeechWorker(get_announcement_cache())
+speech.start()
+
+timer_scheduler = TimerScheduler()
+timer_scheduler.start_thread()
+
 # App state
-recording = False
-frames = []
+ui_updates = queue.Queue()
+running = None  # (capture, source, worker) while recording
 events = []
-timer_task = None
-timer_running = False
+expired_timer_messages = {}  # timer name -> message shown after it runs out
 
-def save_audio_file(audio_chunks, base_filename="recording"):
+
+def open_audio_file(base_filename="recording"):
     wav_filename = os.path.join(RECORDINGS_DIR, f"{base_filename}.wav")
-    with wave.open(wav_filename, 'wb') as wf:
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(p.get_sample_size(FORMAT))
-        wf.setframerate(RATE)
-        wf.writeframes(b''.join(audio_chunks))
-    return wav_filename
-
-def detect_cpr_phrase(text):
-    text_lc = text.lower()
-    for phrase in cpr_start_phrases:
-        if phrase in text_lc:
-            return phrase
-    return None
-
-def log_event(event, phrase, text):
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    events.append({'timestamp': timestamp, 'event': event, 'phrase': phrase, 'text': text})
-    event_listbox.insert(END, f"[{timestamp}] {event}: '{phrase}' in '{text}'")
-
-def cpr_timer():
-    global timer_running
-    timer_running = True
-    for remaining in range(120, 0, -1):
-        mins, secs = divmod(remaining, 60)
-        timer_var.set(f"CPR Timer: {mins:02d}:{secs:02d}")
-        if remaining == 60:
-            speak_text("It's been one minute, next pulse check in one minute.")
-        time.sleep(1)
-    timer_var.set("2 minutes up! Time for pulse check.")
-    speak_text("2 minutes up! Time for pulse check.")
-    timer_running = False
-
-def start_cpr_timer():
-    global timer_task
-    if timer_running:
-        return
-    timer_task = threading.Thread(target=cpr_timer, daemon=True)
-    timer_task.start()
+    return IncrementalWavWriter(wav_filename, CHANNELS, SAMPLE_WIDTH, RATE)
+
+
+def make_source():
+    if args.transcript:
+        return TranscriptFileSource(args.transcript, speed=args.speed)
+    if args.url:
+        return RealtimeASRSource(args.url)
+    from configure import auth_key
+    return RealtimeASRSource(REALTIME_URL, headers=[("Authorization", auth_key)])
+
 
 def start_recording():
-    global recording, frames
-    if recording:
+    global running
+    if running:
         return
-    frames = []
-    recording = True
+    source = make_source()
+    results = queue.Queue()
+    worker = DetectionWorker(results, ui_updates, get_phrase_matcher(), timer_scheduler, speak=speech.say)
+    worker.start()
+    source.start(results)
+    capture = None
+    if source.needs_audio:
+        writer = open_audio_file(f"recording_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        if args.audio:
+            capture = WavFileCapture(args.audio, writer, source, speed=args.speed)
+        else:
+            capture = MicrophoneCapture(get_audio_device(), writer, source)
+        capture.start()
+    running = (capture, source, worker)
     record_button.config(state='disabled')
     stop_button.config(state='normal')
-    status_var.set("Recording...")
-    threading.Thread(target=record_audio, daemon=True).start()
+    status_var.set("Recording..." if capture else f"Replaying {args.transcript}...")
+
 
 def stop_recording():
-    global recording
-    recording = False
+    global running
+    if not running:
+        return
+    capture, source, worker = running
+    running = None
+    if capture:
+        capture.stop()
+    # The source flushes its last results and the worker exits on SessionTerminated
+    source.stop()
     record_button.config(state='normal')
     stop_button.config(state='disabled')
     status_var.set("Stopped.")
-    save_audio_file(frames)
-
-def record_audio():
-    global recording, frames
-    stream = p.open(format=FORMAT, channels=CHANNELS, rate=RATE, input=True, frames_per_buffer=FRAMES_PER_BUFFER)
-    while recording:
-        data = stream.read(FRAMES_PER_BUFFER)
-        frames.append(data)
-        # Simulate real-time transcription (replace with actual ASR in production)
-        # For demo, check for CPR phrase in random text every 5 seconds
-        if len(frames) % (RATE // FRAMES_PER_BUFFER * 5) == 0:
-            # Simulate a CPR phrase being spoken
-            test_text = "CPR started"
-            phrase = detect_cpr_phrase(test_text)
-            if phrase:
-                log_event('CPR_START', phrase, test_text)
-                start_cpr_timer()
-    stream.stop_stream()
-    stream.close()
+
+
+def timer_text():
+    active = timer_scheduler.active()
+    for timer, _ in active:
+        expired_timer_messages.pop(timer.name, None)
+    parts = [f"{timer.label} Timer: {format_remaining(remaining)}" for timer, remaining in active]
+    parts += list(expired_timer_messages.values())
+    return "  |  ".join(parts) or "CPR Timer: --:--"
+
+
+def apply_ui_updates():
+    """Apply queued worker updates on the Tk thread, one widget call per kind per tick"""
+    event_lines = []
+    transcript_lines = []
+    for _ in range(UI_BATCH):
+        try:
+            kind, payload = ui_updates.get_nowait()
+        except queue.Empty:
+            break
+        if kind == UI_MESSAGE:
+            transcript_lines.append(f"[{payload['timestamp']}] {payload['speaker']}: {payload['text']}")
+        elif kind == UI_EVENT:
+            events.append(payload)
+            event_lines.append(f"[{payload['timestamp']}] {payload['event']}: '{payload['phrase']}' in '{payload['text']}'")
+        elif kind == UI_NAME:
+            letter, name = payload
+            status_var.set(f"Person {letter} identified as {name}")
+        elif kind == UI_STATUS:
+            status_var.set(payload)
+        elif kind == UI_TIMER_DONE:
+            name, message = payload
+            expired_timer_messages[name] = message
+    if transcript_lines:
+        transcript_listbox.insert(END, *transcript_lines)
+        transcript_listbox.see(END)
+    if event_lines:
+        event_listbox.insert(END, *event_lines)
+        event_listbox.see(END)
+    text = timer_text()
+    if timer_var.get() != text:
+        timer_var.set(text)
+    root.after(UI_INTERVAL_MS, apply_ui_updates)
+
 
 # GUI setup
 root = Tk()
@@ -140,8 +161,13 @@ record_button.pack(pady=5)
 stop_button = Button(root, text="Stop Recording", command=stop_recording, width=20, state='disabled')
 stop_button.pack(pady=5)
 
+Label(root, text="Transcript:", font=("Arial", 12, "bold")).pack(pady=5)
+transcript_listbox = Listbox(root, width=80, height=8)
+transcript_listbox.pack(pady=5)
+
 Label(root, text="Detected Events:", font=("Arial", 12, "bold")).pack(pady=5)
 event_listbox = Listbox(root, width=80, height=10)
 event_listbox.pack(pady=5)
 
-root.mainloop() 
\ No newline at end of file
+root.after(UI_INTERVAL_MS, apply_ui_updates)
+root.mainloop()
@@ -1,8 +1,16 @@
 import assemblyai as aai
-import os
+import argparse
+import glob
+import hashlib
 import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from types import SimpleNamespace
 from configure import auth_key
+from audio_archive import ms_to_sample
 
 # Configure AssemblyAI
 aai.settings.api_key = auth_key
@@ -12,31 +20,77 @@ RECORDINGS_DIR = "recordings"
 AUDIO_FILE = os.path.join(RECORDINGS_DIR, "code_blue_recording.mp3")
 TRANSCRIPT_FILE = os.path.join(RECORDINGS_DIR, "code_blue_recording_transcript.json")
 
-def process_with_speaker_diarization(audio_file):
+# Batch mode
+AUDIO_EXTENSIONS = ('.mp3', '.m4a', '.wav', '.flac', '.ogg', '.mp4')
+MANIFEST_FILE = os.path.join(RECORDINGS_DIR, "batch_manifest.json")
+CACHE_DIR = os.path.join(RECORDINGS_DIR, ".transcript_cache")
+# Bump when cached transcripts change shape; older entries are transcribed again
+# 2: audio-position timestamps and start_sample / end_sample on every utterance
+CACHE_VERSION = 2
+MAX_WORKERS = 4
+
+# Utterance offsets are stored as frames at the rate recordings are archived at (audio_archive.py)
+SAMPLE_RATE = 16000
+
+# Identity of the default transcriber in cache keys and manifest entries
+ASSEMBLYAI_TRANSCRIBER = 'assemblyai'
+
+class StubTranscriber:
+    """Offline stand-in for aai.Transcriber used to exercise batch mode"""
+    name = 'stub'
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def transcribe(self, audio_file, config=None):
+        time.sleep(self.delay)
+        name = os.path.basename(audio_file)
+        return SimpleNamespace(utterances=[
+            SimpleNamespace(speaker='A', text=f"Stub transcript of {name}.", confidence=1.0),
+        ])
+
+def audio_timestamp(ms):
+    """HH:MM:SS position in the recording"""
+    seconds = int(ms // 1000)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+def transcriber_name(transcriber):
+    """Which transcriber produced a result, so stub output is never served to a real run"""
+    return getattr(transcriber, 'name', ASSEMBLYAI_TRANSCRIBER) if transcriber is not None else ASSEMBLYAI_TRANSCRIBER
+
+def transcribe_file(audio_file, transcriber=None):
+    """Transcribe one file with speaker labels; raises on failure"""
+    config = aai.TranscriptionConfig(
+        speaker_labels=True,
+    )
+    print(f"Processing {audio_file} with diarization config: {config}")
+    transcriber = transcriber or aai.Transcriber()
+    transcript = transcriber.transcribe(audio_file, config=config)
+    messages = []
+    speaker_stats = {}
+    for utterance in transcript.utterances:
+        speaker = utterance.speaker
+        text = utterance.text
+        confidence = utterance.confidence
+        # Utterance start/end are ms into the audio; stamp the audio position, not processing time
+        start_ms = getattr(utterance, 'start', None) or 0
+        end_ms = getattr(utterance, 'end', None) or start_ms
+        messages.append({
+            'timestamp': audio_timestamp(start_ms),
+            'speaker': f"Speaker {speaker}",
+            'text': text,
+            'confidence': confidence,
+            'start_sample': ms_to_sample(start_ms, SAMPLE_RATE),
+            'end_sample': ms_to_sample(end_ms, SAMPLE_RATE),
+        })
+        if speaker not in speaker_stats:
+            speaker_stats[speaker] = 0
+        speaker_stats[speaker] += len(text.split())
+    return messages, speaker_stats
+
+def process_with_speaker_diarization(audio_file, transcriber=None):
     try:
-        config = aai.TranscriptionConfig(
-            speaker_labels=True,
-        )
-        print(f"Processing {audio_file} with diarization config: {config}")
-        transcriber = aai.Transcriber()
-        transcript = transcriber.transcribe(audio_file, config=config)
-        messages = []
-        speaker_stats = {}
-        for utterance in transcript.utterances:
-            speaker = utterance.speaker
-            text = utterance.text
-            confidence = utterance.confidence
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            messages.append({
-                'timestamp': timestamp,
-                'speaker': f"Speaker {speaker}",
-                'text': text,
-                'confidence': confidence
-            })
-            if speaker not in speaker_stats:
-                speaker_stats[speaker] = 0
-            speaker_stats[speaker] += len(text.split())
-        return messages, speaker_stats
+        return transcribe_file(audio_file, transcriber)
     except Exception as e:
         print(f"Diarization Error: {str(e)}")
         return [], {}
@@ -45,18 +99,131 @@ def save_transcript(filename, messages, speaker_stats):
     transcript_data = {
         'messages': messages,
         'speaker_statistics': speaker_stats,
+        'sample_rate': SAMPLE_RATE,
         'recording_date': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }
     with open(filename, 'w') as f:
         json.dump(transcript_data, f, indent=2)
     print(f"Transcript saved as {filename}")
 
+def file_hash(path):
+    """SHA-256 of the audio content, used as the transcription cache key"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def find_audio_files(patterns):
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '*')
+        for path in glob.glob(pattern):
+            if os.path.isfile(path) and path.lower().endswith(AUDIO_EXTENSIONS):
+                files.add(path)
+    return sorted(files)
+
+def transcript_path_for(audio_file):
+    base, _ = os.path.splitext(audio_file)
+    return f"{base}_transcript.json"
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def save_manifest(path, manifest):
+    # Write-then-rename so an interrupted batch never corrupts the manifest
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+def transcribe_cached(audio_file, content_hash, cache_dir, transcriber):
+    """Return (messages, speaker_stats, cached) reusing this transcriber's results for unchanged audio"""
+    cache_file = os.path.join(cache_dir, f"{transcriber_name(transcriber)}-v{CACHE_VERSION}-{content_hash}.json")
+    if os.path.exists(cache_file):
+        with open(cache_file, 'r') as f:
+            cached = json.load(f)
+        return cached['messages'], cached['speaker_statistics'], True
+    messages, speaker_stats = transcribe_file(audio_file, transcriber)
+    with open(cache_file, 'w') as f:
+        json.dump({'messages': messages, 'speaker_statistics': speaker_stats}, f)
+    return messages, speaker_stats, False
+
+def run_batch(patterns, workers=MAX_WORKERS, manifest_file=MANIFEST_FILE, cache_dir=CACHE_DIR, transcriber=None):
+    """Transcribe every matching audio file, skipping ones the manifest marks done"""
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest = load_manifest(manifest_file)
+    manifest_lock = threading.Lock()
+    name = transcriber_name(transcriber)
+    pending = []
+    skipped = 0
+    for audio_file in find_audio_files(patterns):
+        content_hash = file_hash(audio_file)
+        entry = manifest.get(audio_file, {})
+        if (entry.get('status') == 'done' and entry.get('hash') == content_hash and
+                entry.get('transcriber') == name and entry.get('version') == CACHE_VERSION and
+                os.path.exists(entry.get('transcript', ''))):
+            skipped += 1
+            continue
+        pending.append((audio_file, content_hash))
+    print(f"{len(pending)} files to transcribe, {skipped} already done")
+
+    # Identical audio under two names is uploaded once; the second waits and hits the cache
+    hash_locks = {content_hash: threading.Lock() for _, content_hash in pending}
+
+    def work(audio_file, content_hash):
+        with hash_locks[content_hash]:
+            messages, speaker_stats, cached = transcribe_cached(audio_file, content_hash, cache_dir, transcriber)
+        transcript_file = transcript_path_for(audio_file)
+        save_transcript(transcript_file, messages, speaker_stats)
+        return transcript_file, cached
+
+    done = failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(work, audio_file, content_hash): (audio_file, content_hash)
+                   for audio_file, content_hash in pending}
+        for future in as_completed(futures):
+            audio_file, content_hash = futures[future]
+            entry = {'hash': content_hash, 'transcriber': name, 'version': CACHE_VERSION,
+                     'finished': datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+            try:
+                transcript_file, cached = future.result()
+                entry.update(status='done', transcript=transcript_file, cached=cached)
+                done += 1
+            except Exception as e:
+                print(f"Diarization Error for {audio_file}: {str(e)}")
+                entry.update(status='failed', error=str(e))
+                failed += 1
+            with manifest_lock:
+                manifest[audio_file] = entry
+                save_manifest(manifest_file, manifest)
+    print(f"Batch complete: {done} transcribed, {failed} failed, {skipped} skipped")
+    return manifest
+
 def main():
+    parser = argparse.ArgumentParser(description="Transcribe code recordings with speaker diarization")
+    parser.add_argument('paths', nargs='*', help="Audio files, directories or globs (batch mode)")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help="Concurrent transcriptions")
+    parser.add_argument('--manifest', default=MANIFEST_FILE)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--stub', action='store_true', help="Use the offline stub transcriber")
+    args = parser.parse_args()
+
+    transcriber = StubTranscriber() if args.stub else None
+    if args.paths:
+        run_batch(args.paths, workers=args.workers, manifest_file=args.manifest,
+                  cache_dir=args.cache_dir, transcriber=transcriber)
+        return
+
     if not os.path.exists(AUDIO_FILE):
         print(f"Audio file not found: {AUDIO_FILE}")
         return
-    messages, speaker_stats = process_with_speaker_diarization(AUDIO_FILE)
+    messages, speaker_stats = process_with_speaker_diarization(AUDIO_FILE, transcriber)
     save_transcript(TRANSCRIPT_FILE, messages, speaker_stats)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
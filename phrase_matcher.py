@@ -0,0 +1,133 @@
+import os
+import threading
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+EVENTS_FILE = 'resuscitation_events.yaml'
+FUZZY_THRESHOLD = 70
+
+
+def load_utterance_to_event(path=EVENTS_FILE):
+    """Load the YAML event map and flatten it to {lowercased phrase: event}"""
+    import yaml  # only needed when the matcher is (re)built
+    with open(path, 'r') as f:
+        event_map = yaml.safe_load(f)
+    utterance_to_event = {}
+    for event, phrases in event_map.items():
+        for phrase in phrases:
+            utterance_to_event[phrase.lower()] = event
+    return utterance_to_event
+
+
+class PhraseMatcher:
+    """Fuzzy phrase matcher built once from the resuscitation event vocabulary.
+
+    Gives the same hits as calling fuzz.partial_ratio(phrase, text) on every
+    phrase and keeping scores >= threshold, but only scores phrases that can
+    still reach the threshold. Candidates come from a character count index:
+    a phrase sharing C characters with the utterance can score at most
+    200*C/(L+C), where L is the shorter of the two lengths. The bound never
+    drops a real match, so results stay identical to the full scan.
+    """
+
+    def __init__(self, utterance_to_event, threshold=FUZZY_THRESHOLD):
+        self.threshold = threshold
+        # partial_ratio scores are rounded, so 69.5 already counts as 70
+        self.score_cutoff = threshold - 0.5
+        self.phrases = [phrase.lower() for phrase in utterance_to_event]
+        self.events = [utterance_to_event[phrase] for phrase in utterance_to_event]
+        self.phrase_lengths = np.array([len(p) for p in self.phrases], dtype=np.int32)
+
+        # Inverted index: one column per character seen in the vocabulary
+        alphabet = sorted({c for phrase in self.phrases for c in phrase})
+        self.char_index = {c: i for i, c in enumerate(alphabet)}
+        self.char_counts = np.zeros((len(self.phrases), len(alphabet)), dtype=np.int32)
+        for row, phrase in enumerate(self.phrases):
+            for c in phrase:
+                self.char_counts[row, self.char_index[c]] += 1
+
+    @classmethod
+    def from_yaml(cls, path=EVENTS_FILE, threshold=FUZZY_THRESHOLD):
+        return cls(load_utterance_to_event(path), threshold=threshold)
+
+    def __len__(self):
+        return len(self.phrases)
+
+    def _text_counts(self, text):
+        counts = np.zeros(len(self.char_index), dtype=np.int32)
+        for c in set(text):
+            col = self.char_index.get(c)
+            if col is not None:
+                counts[col] = text.count(c)
+        return counts
+
+    def candidates(self, text):
+        """Return indexes of phrases whose score upper bound reaches the threshold"""
+        if not text:
+            return np.empty(0, dtype=np.intp)
+        shared = np.minimum(self.char_counts, self._text_counts(text)).sum(axis=1)
+        shorter = np.minimum(self.phrase_lengths, len(text))
+        reachable = (shared >= shorter) | (
+            200.0 * shared >= self.score_cutoff * (shorter + shared))
+        return np.flatnonzero(reachable)
+
+    def match(self, text):
+        """Return [(event, phrase, score)] for every phrase scoring >= threshold"""
+        text = text.lower()
+        hits = []
+        for row in self.candidates(text):
+            phrase = self.phrases[row]
+            score = int(round(fuzz.partial_ratio(phrase, text, score_cutoff=self.score_cutoff)))
+            if score >= self.threshold:
+                hits.append((self.events[row], phrase, score))
+        return hits
+
+    def score_matrix(self, texts, workers=1):
+        """partial_ratio of every phrase (rows) against every text (columns).
+
+        Scores that cannot round up to the threshold are 0. workers=-1 spreads
+        the matrix over all cores.
+        """
+        return process.cdist(
+            self.phrases, [text.lower() for text in texts],
+            scorer=fuzz.partial_ratio,
+            score_cutoff=self.score_cutoff,
+            dtype=np.float64,
+            workers=workers,
+        )
+
+    def hits(self, scores):
+        """(text index, phrase index, rounded score) for every match in a score matrix, by text then phrase"""
+        rounded = np.rint(scores).astype(np.int32)  # round-half-even, like round()
+        cols, rows = np.nonzero(rounded.T >= self.threshold)
+        return zip(cols.tolist(), rows.tolist(), rounded[rows, cols].tolist())
+
+    def match_many(self, texts, workers=1):
+        """Match a batch of utterances, returning one hit list per text"""
+        results = [[] for _ in texts]
+        if not texts or not self.phrases:
+            return results
+        for col, row, score in self.hits(self.score_matrix(texts, workers)):
+            results[col].append((self.events[row], self.phrases[row], score))
+        return results
+
+
+_matchers = {}
+_matchers_lock = threading.Lock()
+
+
+def get_phrase_matcher(path=EVENTS_FILE, threshold=FUZZY_THRESHOLD):
+    """Process-wide matcher, rebuilt only when the YAML file changes.
+
+    Streamlit re-executes the app script on every interaction; this keeps
+    the YAML parse and index build out of those reruns.
+    """
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    key = (os.path.abspath(path), threshold)
+    with _matchers_lock:
+        cached = _matchers.get(key)
+        if cached is None or cached[0] != version:
+            cached = _matchers[key] = (version, PhraseMatcher.from_yaml(path, threshold=threshold))
+        return cached[1]
@@ -0,0 +1,164 @@
+"""Replay saved transcripts through the realtime pipeline for benchmarking.
+
+Feeds the messages of recordings/*_transcript.json through the same speaker
+assignment, name detection and event detection used by the live receive loop,
+then reports throughput and per-utterance latency percentiles. Detected events
+start EVENT_TIMERS on a TimerScheduler driven by the replay clock, as in a
+headless CodeSession, so timer scheduling is part of the measured latency.
+
+	python replay.py recordings/live_hackathon_recording.json --speed 0
+"""
+import argparse
+import glob
+import json
+import time
+from datetime import datetime
+
+from code_session import EVENT_TIMERS
+from phrase_matcher import PhraseMatcher
+from timer_scheduler import TimerScheduler
+from transcript_pipeline import TranscriptPipeline
+
+
+def load_messages(path):
+	with open(path, 'r') as f:
+		return json.load(f).get('messages', [])
+
+
+def to_realtime_results(messages):
+	"""Turn saved transcript messages into (offset_seconds, FinalTranscript) pairs"""
+	results = []
+	start = None
+	day = 0
+	previous = None
+	for msg in messages:
+		clock = datetime.strptime(msg['timestamp'], "%H:%M:%S")
+		seconds = clock.hour * 3600 + clock.minute * 60 + clock.second
+		if previous is not None and seconds < previous:
+			day += 86400  # recording crossed midnight
+		previous = seconds
+		seconds += day
+		if start is None:
+			start = seconds
+		results.append((seconds - start, {
+			'message_type': 'FinalTranscript',
+			'text': msg.get('text', ''),
+			'speaker_id': msg.get('speaker'),
+			'confidence': msg.get('confidence', 0),
+		}))
+	return results
+
+
+def percentile(sorted_values, pct):
+	if not sorted_values:
+		return 0.0
+	index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+	return sorted_values[index]
+
+
+def timer_events(scheduler, counts):
+	"""on_event starting EVENT_TIMERS on scheduler (alerts and expiry only counted)"""
+	def count(kind):
+		def callback(timer):
+			counts[kind] += 1
+		return callback
+
+	def on_event(detected, score):
+		if detected['event'] not in EVENT_TIMERS:
+			return
+		name, seconds, prompts, _ = EVENT_TIMERS[detected['event']]
+		scheduler.start(name, seconds, on_expire=count('expired'),
+						alerts={remaining: count('alerts') for remaining in prompts})
+		counts['started'] += 1
+	return on_event
+
+
+def replay(results, matcher, speed=0.0, on_event=None):
+	"""Drive one pipeline through results; speed 0 means unthrottled.
+
+	Without on_event, events start timers on a scheduler whose clock is the
+	replay offset; their counts end up in state['timers'].
+	Returns the pipeline state and a list of per-utterance latencies (seconds).
+	"""
+	state = {}
+	now = [0.0]
+	scheduler = TimerScheduler(clock=lambda: now[0])
+	if on_event is None:
+		state['timers'] = {'started': 0, 'alerts': 0, 'expired': 0}
+		on_event = timer_events(scheduler, state['timers'])
+	pipeline = TranscriptPipeline(state, matcher, on_event=on_event, log=lambda line: None)
+	latencies = []
+	wall_start = time.perf_counter()
+	for offset, result in results:
+		if speed > 0:
+			delay = offset / speed - (time.perf_counter() - wall_start)
+			if delay > 0:
+				time.sleep(delay)
+		t0 = time.perf_counter()
+		now[0] = offset
+		scheduler.run_due()
+		pipeline.process(result, now=offset)
+		latencies.append(time.perf_counter() - t0)
+	return state, latencies
+
+
+def report(name, latencies, elapsed, events, detections, timers):
+	ordered = sorted(latencies)
+	rate = len(ordered) / elapsed if elapsed > 0 else float('inf')
+	print(f"{name}: {len(ordered)} utterances, {events} events ({detections} detections), "
+		f"{timers} timer starts, "
+		f"{rate:.1f} utterances/sec")
+	print(f"  latency p50={percentile(ordered, 50) * 1000:.3f}ms "
+		f"p95={percentile(ordered, 95) * 1000:.3f}ms "
+		f"p99={percentile(ordered, 99) * 1000:.3f}ms")
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Replay saved transcripts through the event pipeline")
+	parser.add_argument('paths', nargs='*', default=['recordings/*_transcript.json', 'recordings/live_hackathon_recording.json'],
+						help="Transcript JSON files or globs")
+	parser.add_argument('--speed', type=float, default=0.0,
+						help="Playback speed multiplier (1 = real time, 0 = unthrottled)")
+	parser.add_argument('--repeat', type=int, default=1,
+						help="Replay each file this many times")
+	parser.add_argument('--events', default='resuscitation_events.yaml')
+	args = parser.parse_args()
+
+	matcher = PhraseMatcher.from_yaml(args.events)
+	files = sorted({f for pattern in args.paths for f in glob.glob(pattern)})
+	if not files:
+		print("No transcript files found")
+		return
+
+	all_latencies = []
+	total_elapsed = 0.0
+	total_events = 0
+	total_detections = 0
+	total_timers = 0
+	for path in files:
+		results = to_realtime_results(load_messages(path))
+		latencies = []
+		events = 0
+		detections = 0
+		timers = 0
+		start = time.perf_counter()
+		for _ in range(args.repeat):
+			state, run_latencies = replay(results, matcher, speed=args.speed)
+			latencies.extend(run_latencies)
+			events += len(state['detected_events'])
+			detections += state['detected_events'].detections
+			timers += state['timers']['started']
+		elapsed = time.perf_counter() - start
+		report(path, latencies, elapsed, events, detections, timers)
+		all_latencies.extend(latencies)
+		total_elapsed += elapsed
+		total_events += events
+		total_detections += detections
+		total_timers += timers
+
+	if len(files) > 1:
+		report('total', all_latencies, total_elapsed, total_events, total_detections, total_timers)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,170 @@
+"""Microbenchmark of the realtime audio send path, per hour of audio.
+
+Compares the original per-message path (base64 -> str -> dict -> json.dumps)
+with the templated, buffer-reusing writer, at several frames-per-message
+settings. Messages are framed and masked by websockets' own client
+protocol, so the cost of a send is included, but nothing touches the
+network. Two measurements per configuration:
+
+	send path   writer + websocket framing alone: CPU seconds and bytes
+	            allocated (tracemalloc peak per message) per hour of audio
+	session     a whole CodeSession streaming the hour as fast as it can
+	            (speed 0, no VAD): process CPU seconds per hour of audio
+
+	python send_benchmark.py --frames-per-message 1,2,5 --seconds 3600
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import tracemalloc
+
+from audio_payload import payload_writer, send_payload, PAYLOAD_JSON, PAYLOAD_TEMPLATE
+from code_session import CodeSession, PcmSource, RATE, SAMPLE_WIDTH, FRAMES_PER_BUFFER
+
+RESULTS_FILE = os.path.join("recordings", "send_benchmark.jsonl")
+ALLOCATION_SAMPLES = 500  # messages traced for the allocation estimate
+
+
+class NullWebSocket:
+	"""Frames (and masks) every message like a websockets client, then drops the bytes"""
+
+	close_code = None
+
+	def __init__(self):
+		from websockets.client import ClientProtocol
+		from websockets.protocol import State
+		from websockets.uri import parse_uri
+		self.protocol = ClientProtocol(parse_uri('ws://benchmark/'))
+		self.protocol.state = State.OPEN
+		self.terminated = asyncio.Event()
+		self.wire_bytes = 0
+
+	async def send(self, message, text=None):
+		if isinstance(message, str):
+			if 'terminate_session' in message:
+				self.terminated.set()
+			self.protocol.send_text(message.encode())
+		elif text:
+			self.protocol.send_text(message)
+		else:
+			self.protocol.send_binary(message)
+		for data in self.protocol.data_to_send():
+			self.wire_bytes += len(data)
+
+	async def recv(self):
+		await self.terminated.wait()
+		return json.dumps({'message_type': 'SessionTerminated'})
+
+	async def close(self):
+		pass
+
+
+class YieldingPcmSource(PcmSource):
+	"""PcmSource at speed 0 never suspends; yield once per chunk like a live source so the session connects"""
+
+	async def read(self, timeout=0.5):
+		await asyncio.sleep(0)
+		return await super().read(timeout)
+
+
+def synthetic_pcm(seconds=10):
+	# Content does not matter to the send path; vary it so nothing compresses or caches
+	return os.urandom(int(seconds * RATE) * SAMPLE_WIDTH)
+
+
+def bench_send_path(kind, per_message, seconds, chunk):
+	"""(cpu_seconds, allocated_bytes, messages) to send `seconds` of audio"""
+	chunk_seconds = len(chunk) / SAMPLE_WIDTH / RATE
+	messages = int(seconds / chunk_seconds / per_message)
+	batch = [chunk] * per_message
+	ws = NullWebSocket()
+	writer = payload_writer(kind)
+
+	async def run(count):
+		for _ in range(count):
+			await send_payload(ws, writer.write(batch))
+
+	loop = asyncio.new_event_loop()
+	try:
+		loop.run_until_complete(run(10))  # warm up buffers and caches
+		started = time.process_time()
+		loop.run_until_complete(run(messages))
+		cpu = time.process_time() - started
+
+		samples = min(ALLOCATION_SAMPLES, messages)
+		tracemalloc.start()
+		allocated = 0
+		for _ in range(samples):
+			before = tracemalloc.get_traced_memory()[0]
+			tracemalloc.reset_peak()
+			loop.run_until_complete(run(1))
+			allocated += tracemalloc.get_traced_memory()[1] - before
+		tracemalloc.stop()
+	finally:
+		loop.close()
+	return cpu, allocated / samples * messages, messages
+
+
+def bench_session(kind, per_message, seconds, pcm, matcher):
+	"""Process CPU seconds for one CodeSession to stream `seconds` of audio"""
+	async def connect(url, **kwargs):
+		return NullWebSocket()
+
+	session = CodeSession('bench', YieldingPcmSource(pcm, speed=0, seconds=seconds), matcher, 'ws://benchmark/',
+						connect=connect, frames_per_message=per_message, payload=kind, log=lambda *a: None)
+	started = time.process_time()
+	asyncio.run(session.run())
+	return time.process_time() - started, session.stats
+
+
+def main():
+	parser = argparse.ArgumentParser(description="CPU and allocations of the audio send path per hour of audio")
+	parser.add_argument('--seconds', type=float, default=3600, help="audio streamed per configuration")
+	parser.add_argument('--frames-per-message', default='1,2,5', help="comma separated values to try")
+	parser.add_argument('--frames-per-buffer', type=int, default=FRAMES_PER_BUFFER)
+	parser.add_argument('--no-session', action='store_true', help="only benchmark the send path")
+	parser.add_argument('--output', default=RESULTS_FILE, help="JSONL file results are appended to")
+	args = parser.parse_args()
+
+	from phrase_matcher import get_phrase_matcher
+	matcher = get_phrase_matcher()
+	pcm = synthetic_pcm()
+	chunk = pcm[:args.frames_per_buffer * SAMPLE_WIDTH]
+	hours = args.seconds / 3600
+	configs = [(PAYLOAD_JSON, 1)] + [(PAYLOAD_TEMPLATE, int(n)) for n in args.frames_per_message.split(',')]
+
+	results = []
+	baseline = None
+	print(f"{'payload':<9} {'frames':>6} {'msgs/h':>8} {'send CPU s/h':>13} {'alloc MB/h':>11} {'session CPU s/h':>16}")
+	for kind, per_message in configs:
+		cpu, allocated, messages = bench_send_path(kind, per_message, args.seconds, chunk)
+		result = {
+			'payload': kind,
+			'frames_per_message': per_message,
+			'messages_per_hour': round(messages / hours),
+			'send_cpu_s_per_hour': round(cpu / hours, 3),
+			'allocated_mb_per_hour': round(allocated / hours / 1e6, 1),
+		}
+		if not args.no_session:
+			session_cpu, stats = bench_session(kind, per_message, args.seconds, pcm, matcher)
+			result['session_cpu_s_per_hour'] = round(session_cpu / hours, 3)
+			result['messages_sent'] = stats.messages_sent
+		baseline = baseline or result
+		results.append(result)
+		print(f"{kind:<9} {per_message:>6} {result['messages_per_hour']:>8} {result['send_cpu_s_per_hour']:>13.3f} "
+			f"{result['allocated_mb_per_hour']:>11.1f} {result.get('session_cpu_s_per_hour', float('nan')):>16.3f}")
+	for result in results[1:]:
+		print(f"template x{result['frames_per_message']}: send path "
+			f"{baseline['send_cpu_s_per_hour'] / result['send_cpu_s_per_hour']:.1f}x less CPU, "
+			f"{baseline['allocated_mb_per_hour'] / max(result['allocated_mb_per_hour'], 0.1):.1f}x fewer bytes allocated")
+
+	os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+	with open(args.output, 'a') as f:
+		f.write(json.dumps({'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'seconds': args.seconds,
+							'frames_per_buffer': args.frames_per_buffer, 'results': results}) + '\n')
+
+
+if __name__ == "__main__":
+	main()
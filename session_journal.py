@@ -0,0 +1,162 @@
+"""Append-only JSONL journal of everything that happens during a code.
+
+Every utterance, speaker change, detected event and timer action is appended
+as one JSON line the moment it happens. Writes are group-committed: a
+background thread flushes and fsyncs the file every fsync_interval seconds,
+so a crash loses at most that window. load_journal() rebuilds the saved
+transcript document ({messages, speaker_statistics, speaker_names, ...})
+from a journal, which makes the final JSON export derived data.
+
+	python session_journal.py recordings/recording_X_journal.jsonl [out.json]
+"""
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+
+from event_store import EventStore
+
+FSYNC_INTERVAL = 1.0  # seconds between group commits
+
+SESSION_START = 'session_start'
+SESSION_END = 'session_end'
+UTTERANCE = 'utterance'
+SPEAKER_CHANGE = 'speaker_change'
+SPEAKER_NAME = 'speaker_name'
+EVENT = 'event'
+TIMER = 'timer'
+
+
+class SessionJournal:
+	def __init__(self, path, fsync_interval=FSYNC_INTERVAL):
+		self.path = path
+		self.fsync_interval = fsync_interval
+		self.records = 0
+		self.commits = 0
+		self._file = open(path, 'a', encoding='utf-8')
+		self._lock = threading.Lock()
+		self._dirty = False
+		self._closed = threading.Event()
+		self._flusher = None
+		if fsync_interval > 0:
+			self._flusher = threading.Thread(target=self._flush_loop, daemon=True, name='journal-flush')
+			self._flusher.start()
+
+	def append(self, record_type, **fields):
+		record = {'type': record_type, 'time': datetime.now().isoformat(timespec='milliseconds')}
+		record.update(fields)
+		line = json.dumps(record, separators=(',', ':')) + '\n'
+		with self._lock:
+			if self._file.closed:
+				return
+			self._file.write(line)
+			self.records += 1
+			self._dirty = True
+			if self.fsync_interval <= 0:
+				self._commit()
+
+	def _commit(self):
+		# Caller holds the lock
+		if not self._dirty:
+			return
+		self._file.flush()
+		os.fsync(self._file.fileno())
+		self._dirty = False
+		self.commits += 1
+
+	def _flush_loop(self):
+		while not self._closed.wait(self.fsync_interval):
+			with self._lock:
+				if not self._file.closed:
+					self._commit()
+
+	def commit(self):
+		with self._lock:
+			self._commit()
+
+	def close(self):
+		if self._closed.is_set():
+			return
+		self._closed.set()
+		if self._flusher:
+			self._flusher.join()
+		with self._lock:
+			self._commit()
+			self._file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+
+def read_records(path):
+	"""Yield journal records, stopping at a torn final line left by a crash"""
+	with open(path, 'r', encoding='utf-8') as f:
+		for line in f:
+			if not line.endswith('\n'):
+				break
+			try:
+				yield json.loads(line)
+			except json.JSONDecodeError:
+				break
+
+
+def load_journal(path):
+	"""Rebuild the transcript document saved at the end of a session"""
+	messages = []
+	speaker_stats = {}
+	speaker_names = {}
+	detected_events = EventStore()
+	sample_rate = None
+	last_time = None
+	for record in read_records(path):
+		record_type = record.get('type')
+		last_time = record.get('time', last_time)
+		if record_type == SESSION_START:
+			speaker_names.update(record.get('speaker_names', {}))
+			sample_rate = record.get('sample_rate', sample_rate)
+		elif record_type == UTTERANCE:
+			messages.append(record['message'])
+			speaker_id = record['speaker_id']
+			if speaker_id not in speaker_stats:
+				speaker_stats[speaker_id] = 0
+			speaker_stats[speaker_id] += len(record['message']['text'].split())
+		elif record_type == SPEAKER_NAME:
+			speaker_names[record['speaker_id']] = record['name']
+		elif record_type == EVENT:
+			# Raw detections are journaled; coalesce them as the live session did
+			at = record.get('at')
+			if at is None:
+				at = datetime.fromisoformat(record['time']).timestamp() if record.get('time') else 0.0
+			detected_events.add(record['event'], record.get('score'), at)
+	recording_date = datetime.fromisoformat(last_time) if last_time else datetime.now()
+	transcript_data = {
+		'messages': messages,
+		'speaker_statistics': speaker_stats,
+		'speaker_names': speaker_names,
+		'detected_events': detected_events.to_list(),
+		'recording_date': recording_date.strftime("%Y-%m-%d %H:%M:%S"),
+	}
+	if sample_rate:
+		# start_sample / end_sample on messages and events count frames at this rate
+		transcript_data['sample_rate'] = sample_rate
+	return transcript_data
+
+
+def main():
+	if len(sys.argv) < 2:
+		print("Usage: python session_journal.py JOURNAL.jsonl [OUTPUT.json]")
+		return
+	journal_path = sys.argv[1]
+	output_path = sys.argv[2] if len(sys.argv) > 2 else journal_path.replace('_journal.jsonl', '_transcript.json')
+	transcript_data = load_journal(journal_path)
+	with open(output_path, 'w') as f:
+		json.dump(transcript_data, f, indent=2)
+	print(f"Rebuilt {len(transcript_data['messages'])} messages into {output_path}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,169 @@
+"""Per-session speaker bookkeeping: letters, names, word counts and talk time.
+
+One SpeakerRegistry replaces the speakers / voice_names / speaker_letters /
+next_letter entries that used to live side by side in session state. Every
+speaker is a Speaker record found with one dict lookup, so an utterance
+costs O(1) however long the code runs:
+
+	registry = SpeakerRegistry()
+	speaker = registry.get('A')             # assigns the next letter on first sight
+	registry.detect_name(speaker, "This is Dr. Patel")
+	registry.add_utterance(speaker, text, talk_seconds=2.4, now=time.time())
+	speaker.label                           # 'Patel' or 'Person A'
+
+Rolling-window stats (words and talk time in the last window_seconds) are
+kept as running per-speaker totals over a deque of recent utterances.
+to_dict() / from_dict() serialize the registry for the transcript export.
+"""
+import re
+from collections import deque
+
+LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+WINDOW_SECONDS = 60.0  # rolling window for recent speaking stats
+
+NAME_PATTERNS = [
+	# More specific patterns to avoid false positives
+	r"(?i)(?:my name is|i am|i'm|this is) (?:dr\.|doctor |nurse |tech )?([A-Z][a-z]{1,20}(?: [A-Z][a-z]{1,20})?)",
+	r"(?i)^(?:dr\.|doctor |nurse |tech )([A-Z][a-z]{1,20}(?: [A-Z][a-z]{1,20})?)",
+]
+NAME_EXTRACTORS = [re.compile(pattern) for pattern in NAME_PATTERNS]
+# Every pattern needs one of these; utterances without any skip the regexes
+NAME_TRIGGERS = ("my name is", "i am", "i'm", "this is")
+NAME_TITLES = ("dr.", "doctor ", "nurse ", "tech ")
+
+
+def extract_name(text):
+	"""Name a speaker introduces themselves with, or None"""
+	lowered = text.lower()
+	if not lowered.startswith(NAME_TITLES) and not any(trigger in lowered for trigger in NAME_TRIGGERS):
+		return None
+	for extractor in NAME_EXTRACTORS:
+		match = extractor.search(text)
+		if match:
+			name = match.group(1).strip()
+			# Validate the name - must be 2-30 chars, start with capital, no numbers
+			if (2 <= len(name) <= 30 and
+				name[0].isupper() and
+				not any(c.isdigit() for c in name) and
+				not name.lower().startswith('testing')):  # Prevent "testing" false positive
+				return name
+	return None
+
+
+class Speaker:
+	__slots__ = ('id', 'letter', 'name', 'words', 'utterances', 'talk_seconds', 'window_words', 'window_talk_seconds')
+
+	def __init__(self, speaker_id, letter, name=None):
+		self.id = speaker_id
+		self.letter = letter
+		self.name = name
+		self.words = 0
+		self.utterances = 0
+		self.talk_seconds = 0.0
+		self.window_words = 0
+		self.window_talk_seconds = 0.0
+
+	@property
+	def label(self):
+		return self.name or f"Person {self.letter}"
+
+	def to_dict(self):
+		return {
+			'letter': self.letter,
+			'name': self.name,
+			'words': self.words,
+			'utterances': self.utterances,
+			'talk_seconds': round(self.talk_seconds, 3),
+		}
+
+
+class SpeakerRegistry:
+	__slots__ = ('speakers', 'next_letter', 'window_seconds', '_window')
+
+	def __init__(self, window_seconds=WINDOW_SECONDS):
+		self.speakers = {}  # speaker ID -> Speaker
+		self.next_letter = 0
+		self.window_seconds = window_seconds
+		self._window = deque()  # (time, speaker, words, talk_seconds), oldest first
+
+	def __len__(self):
+		return len(self.speakers)
+
+	def __contains__(self, speaker_id):
+		return speaker_id in self.speakers
+
+	def get(self, speaker_id):
+		"""The speaker's record, assigning the next letter (A, B, C, ...) on first sight"""
+		speaker = self.speakers.get(speaker_id)
+		if speaker is None:
+			speaker = self.speakers[speaker_id] = Speaker(speaker_id, LETTERS[self.next_letter % len(LETTERS)])
+			self.next_letter += 1
+		return speaker
+
+	def label(self, speaker_id):
+		return self.get(speaker_id).label
+
+	def set_name(self, speaker_id, name):
+		self.get(speaker_id).name = name
+
+	def detect_name(self, speaker, text):
+		"""Name the speaker if text is an introduction; speakers already named are skipped"""
+		if speaker.name is not None:
+			return None
+		name = extract_name(text)
+		if name:
+			speaker.name = name
+		return name
+
+	def add_utterance(self, speaker, text, talk_seconds=0.0, now=None):
+		words = len(text.split())
+		speaker.words += words
+		speaker.utterances += 1
+		speaker.talk_seconds += talk_seconds
+		if now is not None:
+			speaker.window_words += words
+			speaker.window_talk_seconds += talk_seconds
+			self._window.append((now, speaker, words, talk_seconds))
+			self._expire(now)
+		return words
+
+	def _expire(self, now):
+		window = self._window
+		cutoff = now - self.window_seconds
+		while window and window[0][0] < cutoff:
+			_, speaker, words, talk_seconds = window.popleft()
+			speaker.window_words -= words
+			speaker.window_talk_seconds -= talk_seconds
+
+	def window_stats(self, now):
+		"""{speaker ID: (words, talk seconds)} spoken in the last window_seconds"""
+		self._expire(now)
+		return {speaker.id: (speaker.window_words, speaker.window_talk_seconds)
+				for speaker in self.speakers.values() if speaker.window_words or speaker.window_talk_seconds}
+
+	def word_counts(self):
+		return {speaker.id: speaker.words for speaker in self.speakers.values() if speaker.utterances}
+
+	def names(self):
+		return {speaker.id: speaker.name for speaker in self.speakers.values() if speaker.name}
+
+	def reset_counts(self):
+		"""Start a new recording: keep letters and names, zero the statistics"""
+		for speaker in self.speakers.values():
+			speaker.words = speaker.utterances = speaker.window_words = 0
+			speaker.talk_seconds = speaker.window_talk_seconds = 0.0
+		self._window.clear()
+
+	def to_dict(self):
+		return {speaker_id: speaker.to_dict() for speaker_id, speaker in self.speakers.items()}
+
+	@classmethod
+	def from_dict(cls, data, window_seconds=WINDOW_SECONDS):
+		registry = cls(window_seconds)
+		for speaker_id, fields in data.items():
+			speaker = registry.speakers[speaker_id] = Speaker(speaker_id, fields['letter'], fields.get('name'))
+			speaker.words = fields.get('words', 0)
+			speaker.utterances = fields.get('utterances', 0)
+			speaker.talk_seconds = fields.get('talk_seconds', 0.0)
+		registry.next_letter = len(registry.speakers)
+		return registry
@@ -0,0 +1,104 @@
+"""Track the Streamlit app's cold start and the cost of a rerun.
+
+Each measurement runs in a fresh interpreter:
+
+	imports       time to import each module the app loads, one at a time
+	first_render  cold run of streaming_recording.py under streamlit's AppTest
+	rerun         median of further runs in the same process (a button click)
+
+Results are printed and appended to recordings/startup_benchmark.jsonl so
+runs can be compared over time.
+
+	python startup_benchmark.py --reruns 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+APP_FILE = "streaming_recording.py"
+RESULTS_FILE = os.path.join("recordings", "startup_benchmark.jsonl")
+APP_MODULES = [
+	'streamlit', 'pyaudio', 'websockets', 'numpy', 'rapidfuzz', 'yaml', 'pydub', 'assemblyai',
+	'phrase_matcher', 'code_session', 'voice_activity', 'latency_metrics', 'encode_pool',
+	'announcements', 'session_journal', 'transcript_view', 'timer_scheduler', 'audio_writer',
+]
+
+IMPORT_SNIPPET = """
+import time
+started = time.perf_counter()
+import {module}
+print(time.perf_counter() - started)
+"""
+
+APP_SNIPPET = """
+import json, statistics, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({app_file!r}, default_timeout=60)
+app.run()
+first = time.perf_counter() - started
+result = {{'first_render_s': round(first, 4)}}
+if app.exception:
+	result['error'] = app.exception[0].message
+else:
+	reruns = []
+	for _ in range({reruns}):
+		started = time.perf_counter()
+		app.run()
+		reruns.append(time.perf_counter() - started)
+	if reruns:
+		result['rerun_median_s'] = round(statistics.median(reruns), 4)
+		result['rerun_max_s'] = round(max(reruns), 4)
+print(json.dumps(result))
+"""
+
+
+def run_snippet(code):
+	completed = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+	if completed.returncode != 0:
+		lines = completed.stderr.strip().splitlines()
+		return None, lines[-1] if lines else f"exit status {completed.returncode}"
+	return completed.stdout.strip().splitlines()[-1], None
+
+
+def time_imports(modules=APP_MODULES):
+	timings = {}
+	for module in modules:
+		output, error = run_snippet(IMPORT_SNIPPET.format(module=module))
+		timings[module] = round(float(output) * 1000, 1) if output else error
+	return timings
+
+
+def time_app(reruns=5, app_file=APP_FILE):
+	output, error = run_snippet(APP_SNIPPET.format(app_file=app_file, reruns=reruns))
+	return json.loads(output) if output else {'error': error}
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Measure import, first-render and rerun time of the app")
+	parser.add_argument('--reruns', type=int, default=5)
+	parser.add_argument('--no-app', action='store_true', help="only time imports")
+	parser.add_argument('--output', default=RESULTS_FILE, help="JSONL file results are appended to")
+	args = parser.parse_args()
+
+	result = {'time': datetime.now().isoformat(timespec='seconds'), 'imports_ms': time_imports()}
+	for module, value in sorted(result['imports_ms'].items(), key=lambda item: -item[1] if isinstance(item[1], float) else 0):
+		print(f"import {module:<18} {value if isinstance(value, str) else f'{value:8.1f} ms'}")
+	if not args.no_app:
+		result['app'] = time_app(args.reruns)
+		app = result['app']
+		if 'error' in app:
+			print(f"app: could not run {APP_FILE}: {app['error']}")
+		else:
+			print(f"first render {app['first_render_s'] * 1000:.0f} ms, "
+				f"rerun median {app.get('rerun_median_s', 0) * 1000:.0f} ms")
+	os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+	with open(args.output, 'a') as f:
+		f.write(json.dumps(result) + '\n')
+
+
+if __name__ == "__main__":
+	main()
@@ -1,24 +1,23 @@
 import streamlit as st
-import websockets
 import asyncio
-import base64
 import json
 from configure import auth_key
 import pyaudio
 from datetime import datetime
-import wave
-import assemblyai as aai
 import os
-import re
-from pydub import AudioSegment
-import time
-import yaml
-from gtts import gTTS
-import io
-from thefuzz import fuzz
-
-# Configure AssemblyAI
-aai.settings.api_key = auth_key
+from encode_pool import get_encode_pool, DONE, FAILED
+from session_journal import SessionJournal, load_journal, SESSION_START, SESSION_END, TIMER
+from timer_scheduler import TimerScheduler, format_remaining
+from announcements import get_announcement_cache
+from phrase_matcher import get_phrase_matcher
+from audio_writer import IncrementalWavWriter
+from transcript_view import RenderModel, WindowedView, format_message, format_event, TRANSCRIPT_WINDOW, EVENT_WINDOW, MAX_FPS
+from latency_metrics import get_latency_metrics
+from voice_activity import VoiceActivityGate
+from audio_capture import DROP_OLDEST, get_audio_device
+from code_session import CodeSession, MicrophoneSource, EVENT_TIMERS
+from speaker_registry import SpeakerRegistry
+from event_store import EventStore
 
 # Configure recordings directory
 RECORDINGS_DIR = "recordings"
@@ -32,39 +31,41 @@ MAX_SPEAKERS = 9  # Maximum number of speakers to detect
 if 'text' not in st.session_state:
 	st.session_state['text'] = []
 	st.session_state['run'] = False
-	st.session_state['audio_chunks'] = []
-	st.session_state['speakers'] = {}  # Track different speakers
-	st.session_state['voice_names'] = {}  # Map speaker IDs to detected names
-	st.session_state['speaker_letters'] = {}  # Map speaker IDs to letters (A, B, C)
-	st.session_state['next_letter'] = 0  # Track next available letter
-	st.session_state.setdefault('detected_events', [])
+	st.session_state['audio_writer'] = None
+	st.session_state['journal'] = None
+	st.session_state['speaker_registry'] = SpeakerRegistry()  # Speaker letters, names and word counts
+	st.session_state.setdefault('detected_events', EventStore())  # Coalesced, indexed detections
+	st.session_state.setdefault('encode_jobs', [])  # Background M4A encodes
+	st.session_state['transcript_model'] = RenderModel(format_message)
+	st.session_state['events_model'] = RenderModel(format_event)
 
 FRAMES_PER_BUFFER = 3200
 FORMAT = pyaudio.paInt16
 CHANNELS = 1
 RATE = 16000
-p = pyaudio.PyAudio()
-
-# starts recording
-stream = p.open(
-	format=FORMAT,
-	channels=CHANNELS,
-	rate=RATE,
-	input=True,
-	frames_per_buffer=FRAMES_PER_BUFFER
-)
-
-# Load resuscitation event utterances from YAML
-with open('resuscitation_events.yaml', 'r') as f:
-	event_map = yaml.safe_load(f)
-utterance_to_event = {}
-for event, phrases in event_map.items():
-	for phrase in phrases:
-		utterance_to_event[phrase.lower()] = event
-
-# Timer state
-cpr_timer_task = None
-cpr_timer_display = None
+RING_BUFFER_SLOTS = 50  # 10 seconds of audio between the capture thread and send()
+RING_BUFFER_OVERFLOW = DROP_OLDEST
+PARTIAL_DETECTION = False  # Opt-in: detect events on PartialTranscript messages for lower latency
+VAD_ENABLED = True  # Only send speech (plus pre-roll/hangover) upstream; recording keeps everything
+STANDBY_CONNECTION = False  # Opt-in: keep a second, idle (billed) websocket open so a dropped connection is replaced instantly
+METRICS_PORT = None  # Set to e.g. 8765 to serve GET /metrics locally
+JOURNAL_FSYNC_INTERVAL = 1.0  # seconds of journal writes grouped per fsync
+# Cached per process: Streamlit reruns reuse the PortAudio instance; each session opens its own stream
+p = get_audio_device()
+
+FUZZY_THRESHOLD = 70  # Adjust as needed for sensitivity
+
+# Prebuilt matcher from the YAML event map, cached per process and rebuilt only when the YAML changes
+phrase_matcher = get_phrase_matcher('resuscitation_events.yaml', threshold=FUZZY_THRESHOLD)
+
+# Render every timer prompt before the first session: a cache miss would run TTS on the receive loop
+announcement_cache = get_announcement_cache()
+announcement_cache.warm([prompt for _, _, prompts, _ in EVENT_TIMERS.values() for prompt in prompts.values()])
+
+# Timer state: every resuscitation timer runs on one monotonic scheduler
+timer_scheduler = TimerScheduler()
+expired_timer_messages = {}  # timer name -> message shown after it runs out
+TIMER_EVENTS = {name: event for event, (name, _, _, _) in EVENT_TIMERS.items()}  # timer name -> event
 
 # List of CPR start phrases (lowercased for matching)
 cpr_start_phrases = [
@@ -82,134 +83,116 @@ cpr_start_phrases = [
 	"starting cycles now"
 ]
 
-FUZZY_THRESHOLD = 70  # Adjust as needed for sensitivity
-
-def cancel_cpr_timer():
-	global cpr_timer_task
-	if cpr_timer_task and not cpr_timer_task.done():
-		cpr_timer_task.cancel()
-		cpr_timer_task = None
-	# Clear the timer display
-	if 'cpr_timer_display' in st.session_state:
-		st.session_state['cpr_timer_display'].empty()
+def render_timers(scheduler):
+	"""Display tick: redraw every running timer in the sidebar"""
+	if 'cpr_timer_display' not in st.session_state:
+		with st.sidebar:
+			st.session_state['cpr_timer_display'] = st.empty()
+	lines = []
+	for timer, remaining in scheduler.active():
+		lines.append(f"## ⏳ {timer.label} Timer: {format_remaining(remaining)}")
+		# The detection that (re)started it, straight from the store's per-type index
+		event = TIMER_EVENTS.get(timer.name)
+		latest = st.session_state['detected_events'].latest(event) if event else None
+		if latest:
+			lines.append(f"*Last {event} at {latest['timestamp']}: '{latest['phrase']}'*")
+	lines += [f"## ⏰ {message}" for message in expired_timer_messages.values()]
+	st.session_state['cpr_timer_display'].markdown("\n".join(lines))
+	if not scheduler.timers:
+		# Leave the final messages up and stop redrawing until a timer restarts
+		scheduler.stop_ticking('display')
 		del st.session_state['cpr_timer_display']
 
-async def cpr_timer(triggered_by_phrase=None):
-	with st.sidebar:
-		if 'cpr_timer_display' not in st.session_state:
-			st.session_state['cpr_timer_display'] = st.empty()
-		timer_area = st.session_state['cpr_timer_display']
-		# Show the trigger phrase if provided
-		if triggered_by_phrase:
-			st.markdown(f"**CPR Timer Triggered By:** '{triggered_by_phrase}'")
-	total_seconds = 120
-	for remaining in range(total_seconds, 0, -1):
-		mins, secs = divmod(remaining, 60)
-		timer_area.markdown(f"## ⏳ CPR Timer: {mins:02d}:{secs:02d}")
-		if remaining == 110 and triggered_by_phrase:
-			speak_text_streamlit("10 seconds until next pulse check.")
-		await asyncio.sleep(1)
-	timer_area.markdown("## ⏰ 2 minutes up! Time for pulse check.")
-	del st.session_state['cpr_timer_display']
-
-def save_audio_file(audio_chunks, base_filename="recording"):
-	# Save audio chunks to WAV file first
+def start_event_timer(event):
+	"""Start (or restart) the timer keyed off a detected event"""
+	name, seconds, prompts, done_message = EVENT_TIMERS[event]
+	expired_timer_messages.pop(name, None)
+	alerts = {remaining: (lambda timer, prompt=prompt: speak_text_streamlit(prompt))
+			for remaining, prompt in prompts.items()}
+	def on_expire(timer):
+		expired_timer_messages[name] = done_message
+		journal_timer('expire', name)
+	timer_scheduler.start(name, seconds, on_expire=on_expire, alerts=alerts)
+	journal_timer('start', name, seconds=seconds, event=event)
+	if 'display' not in timer_scheduler.ticks:
+		timer_scheduler.every('display', 1.0, render_timers)
+
+def journal_timer(action, name, **fields):
+	journal = st.session_state.get('journal')
+	if journal:
+		journal.append(TIMER, action=action, timer=name, **fields)
+
+
+def recording_paths(base_filename="recording"):
 	wav_filename = os.path.join(RECORDINGS_DIR, f"{base_filename}.wav")
 	m4a_filename = os.path.join(RECORDINGS_DIR, f"{base_filename}.m4a")
 	transcript_filename = os.path.join(RECORDINGS_DIR, f"{base_filename}_transcript.json")
+	return wav_filename, m4a_filename, transcript_filename
+
+def journal_path(base_filename="recording"):
+	return os.path.join(RECORDINGS_DIR, f"{base_filename}_journal.jsonl")
+
+def save_audio_file(audio_writer, base_filename="recording"):
+	# Finish the WAV streamed to disk during the session
+	wav_filename, m4a_filename, transcript_filename = recording_paths(base_filename)
+	audio_writer.close()
 	
-	with wave.open(wav_filename, 'wb') as wf:
-		wf.setnchannels(CHANNELS)
-		wf.setsampwidth(p.get_sample_size(FORMAT))
-		wf.setframerate(RATE)
-		wf.writeframes(b''.join(audio_chunks))
-	
-	# Convert to M4A using pydub
-	audio = AudioSegment.from_wav(wav_filename)
-	audio.export(m4a_filename, format="ipod")  # ipod format = M4A
+	# Convert to M4A and a seekable segment archive in the background; the WAV is removed once encoded
+	job_id = get_encode_pool().submit(wav_filename, m4a_filename, delete_wav=True,
+										archive_base=os.path.join(RECORDINGS_DIR, base_filename))
 	
 	# Return all filenames
-	return wav_filename, m4a_filename, transcript_filename
+	return job_id, m4a_filename, transcript_filename
 
 
 def start_listening():
 	st.session_state['text'] = []
-	st.session_state['audio_chunks'] = []
+	# Audio is appended to disk as it arrives instead of kept in memory
+	base_filename = f"recording_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+	wav_filename, _, _ = recording_paths(base_filename)
+	st.session_state['base_filename'] = base_filename
+	st.session_state['audio_writer'] = IncrementalWavWriter(
+		wav_filename, CHANNELS, p.get_sample_size(FORMAT), RATE)
+	# Everything that happens during the code is journaled as it happens
+	st.session_state['journal'] = SessionJournal(journal_path(base_filename), fsync_interval=JOURNAL_FSYNC_INTERVAL)
+	st.session_state['journal'].append(SESSION_START, base_filename=base_filename, sample_rate=RATE,
+										speaker_names=st.session_state['speaker_registry'].names())
 	st.session_state['run'] = True
-	st.session_state['speakers'] = {}
-
-def save_transcript(filename, messages, speaker_stats):
-	"""Save transcript with speaker information to JSON file"""
-	transcript_data = {
-		'messages': messages,
-		'speaker_statistics': speaker_stats,
-		'speaker_names': st.session_state['voice_names'],
-		'recording_date': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-	}
+	st.session_state['speaker_registry'].reset_counts()
+
+def save_transcript(filename, journal_filename):
+	"""Save transcript with speaker information to JSON file, rebuilt from the session journal"""
+	transcript_data = load_journal(journal_filename)
+	transcript_data['speakers'] = st.session_state['speaker_registry'].to_dict()
 	
 	with open(filename, 'w') as f:
 		json.dump(transcript_data, f, indent=2)
 
 def stop_listening():
 	st.session_state['run'] = False
-	if st.session_state['audio_chunks']:
-		with st.spinner('Processing audio for speaker identification...'):
-			# Save audio to files
-			timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-			base_filename = f"recording_{timestamp}"
-			wav_file, m4a_file, transcript_file = save_audio_file(st.session_state['audio_chunks'], base_filename)
-			# Save transcript to JSON file
-			save_transcript(transcript_file, st.session_state['text'], st.session_state['speakers'])
-			
-			# Clean up WAV file but keep M4A and transcript
-			os.remove(wav_file)
-			st.success(f"Recording saved as {m4a_file}\nTranscript saved as {transcript_file}")
-
-def get_next_letter():
-	"""Get next available letter (A, B, C, etc.)"""
-	letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
-	letter_idx = st.session_state['next_letter'] % len(letters)
-	st.session_state['next_letter'] += 1
-	return letters[letter_idx]
-
-def detect_name_from_text(text, speaker_id):
-	"""Detect if speaker is introducing themselves"""
-	patterns = [
-		# More specific patterns to avoid false positives
-		r"(?i)(?:my name is|i am|i'm|this is) (?:dr\.|doctor |nurse |tech )?([A-Z][a-z]{1,20}(?: [A-Z][a-z]{1,20})?)",
-		r"(?i)^(?:dr\.|doctor |nurse |tech )([A-Z][a-z]{1,20}(?: [A-Z][a-z]{1,20})?)",
-	]
-	
-	for pattern in patterns:
-		match = re.search(pattern, text)
-		if match:
-			name = match.group(1).strip()
-			# Validate the name - must be 2-30 chars, start with capital, no numbers
-			if (len(name) >= 2 and len(name) <= 30 and 
-				name[0].isupper() and 
-				not any(c.isdigit() for c in name) and
-				not name.lower().startswith('testing')):  # Prevent "testing" false positive
-				st.session_state['voice_names'][speaker_id] = name
-				return name
-	return None
-
-def get_speaker_name(speaker_id):
-	"""Get speaker name from voice mapping or return Person A/B/C"""
-	if speaker_id in st.session_state['voice_names']:
-		return st.session_state['voice_names'][speaker_id]
-	
-	# Assign letter if not already assigned
-	if speaker_id not in st.session_state['speaker_letters']:
-		st.session_state['speaker_letters'][speaker_id] = get_next_letter()
-	
-	return f"Person {st.session_state['speaker_letters'][speaker_id]}"
+	journal = st.session_state.get('journal')
+	if journal:
+		journal.append(SESSION_END)
+		journal.close()
+	audio_writer = st.session_state.get('audio_writer')
+	if audio_writer and audio_writer.chunks_written:
+		# Save audio to files
+		base_filename = st.session_state['base_filename']
+		job_id, m4a_file, transcript_file = save_audio_file(audio_writer, base_filename)
+		st.session_state['encode_jobs'].append(job_id)
+		# Save transcript to JSON file
+		save_transcript(transcript_file, journal_path(base_filename))
+		st.success(f"Transcript saved as {transcript_file}\nEncoding {m4a_file} in the background")
+	elif audio_writer:
+		# Nothing was captured, drop the empty WAV
+		audio_writer.close()
+		os.remove(audio_writer.path)
+	st.session_state['audio_writer'] = None
+	st.session_state['journal'] = None
 
 def speak_text_streamlit(text):
-	tts = gTTS(text)
-	fp = io.BytesIO()
-	tts.write_to_fp(fp)
-	fp.seek(0)
-	st.audio(fp, format='audio/mp3')
+	# Served from the on-disk announcement cache; no network round trip
+	st.audio(announcement_cache.read(text), format='audio/wav')
 
 st.title('Code Blue Co-Pilot')
 
@@ -231,9 +214,19 @@ with col2:
 	stop_button = st.button('Stop Recording', on_click=stop_listening)
 
 # Display areas
-transcript_header = st.empty()
 transcript_area = st.empty()
 speaker_info = st.empty()
+with st.sidebar:
+	events_area = st.empty()
+
+# Incremental views: rows are formatted once, redraws are windowed and rate-capped
+transcript_view = WindowedView(
+	transcript_area, st.session_state['transcript_model'].sync(st.session_state['text']),
+	TRANSCRIPT_WINDOW, header='### Live Transcript', unsafe_allow_html=True)
+events_view = WindowedView(
+	events_area, st.session_state['events_model'].sync(st.session_state['detected_events']),
+	EVENT_WINDOW, separator="\n\n", header='---\n### Detected Resuscitation Events',
+	footer=lambda hidden: f"*{hidden} earlier events not shown*")
 
 # Updated URL with more specific diarization parameters
 URL = (f"wss://api.assemblyai.com/v2/realtime/ws?sample_rate=16000"
@@ -250,148 +243,87 @@ headers = [
 ]
 
 async def send_receive():
-	global cpr_timer_task
+	metrics = get_latency_metrics(port=METRICS_PORT)
+	source = MicrophoneSource(p, RATE, CHANNELS, FORMAT, FRAMES_PER_BUFFER,
+							slots=RING_BUFFER_SLOTS, overflow=RING_BUFFER_OVERFLOW)
+	vad = VoiceActivityGate(RATE) if VAD_ENABLED else None
+
+	def on_name(current_letter, detected_name):
+		st.info(f"Person {current_letter} identified as {detected_name}")
+
+	def on_event(detected, score):
+		# Timer logic (CPR_START restarts the pulse check timer, epinephrine its interval)
+		if detected['event'] not in EVENT_TIMERS:
+			return
+		text = detected['text']
+		print(f"{detected['event']} timer triggered by: {text}")
+		if detected['event'] == 'CPR_START':
+			st.session_state['last_cpr_trigger_phrase'] = text
+			with st.sidebar:
+				st.markdown(f"**CPR Timer Triggered By:** '{text.lower()}'")
+		start_event_timer(detected['event'])
+		metrics.since_final('final_to_timer')
+
+	def on_result(result, message):
+		if message is not None:
+			# Queue the new rows; the render tick draws them
+			transcript_view.model.sync(st.session_state['text'])
+		events_view.model.sync(st.session_state['detected_events'])
+
+	def render_tick(scheduler):
+		# Coalesced UI updates: at most MAX_FPS redraws, only when rows changed
+		if transcript_view.flush():
+			metrics.since_final('final_to_render')
+		events_view.flush()
+
+	# This browser session is one CodeSession; its state lives in st.session_state
+	session = CodeSession('streamlit', source, phrase_matcher, URL, headers=headers, state=st.session_state,
+						scheduler=timer_scheduler, audio_writer=st.session_state['audio_writer'],
+						journal=st.session_state['journal'], metrics=metrics, vad=vad, on_name=on_name,
+						on_event=on_event, on_result=on_result, should_run=lambda: st.session_state['run'],
+						detect_partials=PARTIAL_DETECTION, standby=STANDBY_CONNECTION)
+	timer_scheduler.every('render', 1.0 / MAX_FPS, render_tick)
 	try:
-		async with websockets.connect(
-			URL,
-			ping_interval=5,
-			ping_timeout=20,
-			extra_headers=headers
-		) as _ws:
-			await asyncio.sleep(0.1)
-			print("Connected to AssemblyAI websocket with speaker detection")
-
-			async def send():
-				while st.session_state['run']:
-					try:
-						data = stream.read(FRAMES_PER_BUFFER)
-						# Store audio chunk for later processing
-						st.session_state['audio_chunks'].append(data)
-						# Send for real-time transcription
-						data_b64 = base64.b64encode(data).decode("utf-8")
-						json_data = json.dumps({"audio_data": str(data_b64)})
-						await _ws.send(json_data)
-					except Exception as e:
-						print(f"Error in send: {e}")
-						break
-					await asyncio.sleep(0.01)
-
-			async def receive():
-				global cpr_timer_task
-				current_speaker = None
-				speaker_change_threshold = 0.2  # More sensitive threshold for speaker changes
-				min_segment_duration = 1.0  # Minimum duration (seconds) before allowing speaker change
-				last_change_time = time.time()
-				
-				while st.session_state['run']:
-					try:
-						result_str = await _ws.recv()
-						result = json.loads(result_str)
-
-						if result.get('message_type') == 'FinalTranscript':
-							text = result.get('text', '').strip()
-							speaker_id = result.get('speaker_id') or result.get('speaker') or 'Unknown'
-							confidence = result.get('confidence', 0)
-							current_time = time.time()
-							
-							# Enhanced speaker change logic
-							time_since_last_change = current_time - last_change_time
-							should_change_speaker = (
-								confidence > speaker_change_threshold and
-								time_since_last_change >= min_segment_duration and
-								speaker_id != current_speaker
-							)
-							
-							if should_change_speaker:
-								print(f"Speaker change: {current_speaker} -> {speaker_id} "
-										f"(conf: {confidence}, time: {time_since_last_change:.1f}s)")
-								current_speaker = speaker_id
-								last_change_time = current_time
-							elif current_speaker is None:
-								current_speaker = speaker_id
-								last_change_time = current_time
-							
-							# Use the determined speaker
-							effective_speaker = current_speaker or speaker_id
-
-							# Try to detect name if not already known
-							if effective_speaker not in st.session_state['voice_names']:
-								detected_name = detect_name_from_text(text, effective_speaker)
-								if detected_name:
-									current_letter = st.session_state['speaker_letters'].get(effective_speaker, '?')
-									st.info(f"Person {current_letter} identified as {detected_name}")
-								
-							# Get or assign letter if needed
-							if effective_speaker not in st.session_state['speaker_letters']:
-								st.session_state['speaker_letters'][effective_speaker] = get_next_letter()
-
-							# Get current speaker name or letter designation
-							speaker_name = get_speaker_name(effective_speaker)
-							
-							# Update speaker statistics
-							if effective_speaker not in st.session_state['speakers']:
-								st.session_state['speakers'][effective_speaker] = 0
-							st.session_state['speakers'][effective_speaker] += len(text.split())
-							
-							# Event detection logic
-							detected = False
-							for phrase, event in utterance_to_event.items():
-								score = fuzz.partial_ratio(phrase.lower(), text.lower())
-								if score >= FUZZY_THRESHOLD:
-									st.session_state['detected_events'].append({
-										'timestamp': datetime.now().strftime("%H:%M:%S"),
-										'event': event,
-										'phrase': phrase,
-										'text': text
-									})
-									detected = True
-									# CPR timer logic (fuzzy match for CPR_START)
-									if event == 'CPR_START' and score >= FUZZY_THRESHOLD:
-										print(f"CPR timer triggered by: {text}")
-										cancel_cpr_timer()
-										st.session_state['last_cpr_trigger_phrase'] = text
-										cpr_timer_task = asyncio.create_task(cpr_timer(triggered_by_phrase=text.lower()))
-
-							# Create message with confidence score
-							message = {
-								'timestamp': datetime.now().strftime("%H:%M:%S"),
-								'speaker': speaker_name,
-								'text': text,
-								'confidence': confidence
-							}
-							st.session_state['text'].append(message)
-							
-							# Update displays with confidence scores
-							transcript_header.markdown('### Live Transcript')
-							messages_display = ""
-							for msg in st.session_state['text'][-10:]:  # Show last 10 messages
-								messages_display += f"<div style='font-size:1.5em;'>[{msg['timestamp']}]: {msg['text']}</div>\n"
-							transcript_area.markdown(messages_display, unsafe_allow_html=True)
-
-					except Exception as e:
-						print(f"Error in receive: {e}")
-						break
-
-			await asyncio.gather(send(), receive())
+		# Reconnects (replaying the audio from the gap) are handled inside the session
+		await session.run()
+		if session.stats.error:
+			st.error(f"Session error: {session.stats.error}")
 	except Exception as e:
 		print(f"Connection error: {e}")
 		st.error(f"Connection error: {e}")
-
+	finally:
+		st.session_state['capture_stats'] = source.stats()
+		print(f"Capture stats: {st.session_state['capture_stats']}")
+		if vad:
+			st.session_state['vad_stats'] = vad.stats()
+			print(f"VAD stats: {st.session_state['vad_stats']}")
+
+transcript_view.flush(force=True)
 if st.session_state['run']:
 	asyncio.run(send_receive())
 
 # Move Detected Resuscitation Events to the sidebar (always active, real-time)
 with st.sidebar:
 	# Detected Resuscitation Events first
-	if st.session_state['detected_events']:
-		st.markdown('---\n### Detected Resuscitation Events')
-		for evt in st.session_state['detected_events']:
-			st.markdown(f"[{evt['timestamp']}] **{evt['event']}**: '{evt['phrase']}' in '{evt['text']}'")
+	events_view.flush(force=True)
 	# CPR Timer (trigger phrase and timer display)
 	if 'cpr_timer_display' in st.session_state:
 		# Show the trigger phrase if provided (store in session state if needed)
 		if st.session_state.get('last_cpr_trigger_phrase'):
 			st.markdown(f"**CPR Timer Triggered By:** '{st.session_state['last_cpr_trigger_phrase']}'")
+	# Background M4A encoding status
+	for job_id in list(st.session_state['encode_jobs']):
+		job = get_encode_pool().status(job_id)
+		if job is None:
+			st.session_state['encode_jobs'].remove(job_id)
+		elif job['status'] == DONE:
+			st.success(f"Recording saved as {job['m4a_path']}")
+			st.session_state['encode_jobs'].remove(job_id)
+		elif job['status'] == FAILED:
+			st.error(f"Encoding {job['m4a_path']} failed: {job['error']}")
+			st.session_state['encode_jobs'].remove(job_id)
+		else:
+			st.info(f"Encoding {job['m4a_path']}... ({job['status']})")
 	# Play Trigger Phrase button
 	if st.session_state.get('last_cpr_trigger_phrase'):
 		if st.button("🔊 Play Trigger Phrase"):
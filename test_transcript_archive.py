@@ -0,0 +1,44 @@
+import json
+
+from transcript_archive import TranscriptArchive
+
+
+def event(name, timestamp):
+	return {'event': name, 'phrase': name.lower(), 'text': name.lower(), 'timestamp': timestamp}
+
+
+def archive_with(tmp_path, events):
+	transcript = tmp_path / "code_transcript.json"
+	transcript.write_text(json.dumps({
+		'messages': [{'timestamp': '10:00:00', 'speaker': 'A', 'text': "I'm starting compressions"}],
+		'detected_events': events,
+	}))
+	archive = TranscriptArchive(str(tmp_path / "archive.sqlite3"))
+	archive.ingest([str(transcript)])
+	return archive
+
+
+def test_within_pairs_different_events(tmp_path):
+	archive = archive_with(tmp_path, [
+		event('DEFIB_SHOCK', '10:00:10'),
+		event('MED_AMIODARONE', '10:02:00'),
+		event('MED_AMIODARONE', '10:09:00'),
+	])
+	rows = archive.within('DEFIB_SHOCK', 'MED_AMIODARONE', 300)
+	assert [row['gap_s'] for row in rows] == [110.0]
+
+
+def test_within_same_event_skips_self_and_counts_pairs_once(tmp_path):
+	archive = archive_with(tmp_path, [
+		event('CPR_START', '10:00:00'),
+		event('CPR_START', '10:00:00'),
+		event('CPR_START', '10:00:30'),
+		event('CPR_START', '10:05:00'),
+	])
+	rows = archive.within('CPR_START', 'CPR_START', 60)
+	assert sorted(row['gap_s'] for row in rows) == [0.0, 30.0, 30.0]
+
+
+def test_search_quotes_apostrophes(tmp_path):
+	archive = archive_with(tmp_path, [])
+	assert len(archive.search("I'm")) == 1
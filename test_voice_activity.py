@@ -0,0 +1,45 @@
+import numpy as np
+
+from voice_activity import VoiceActivityGate
+
+RATE = 16000
+CHUNK = 3200  # 200 ms, as captured by streaming_recording.py
+
+
+def lowpass_noise(level_db, chunks, seed=0):
+	"""Stationary low-pass noise at level_db RMS: low ZCR, so it looks voiced to a naive gate"""
+	rng = np.random.default_rng(seed)
+	white = rng.standard_normal(CHUNK * chunks)
+	noise = np.convolve(white, np.ones(16) / 16, mode='same')
+	noise *= 10 ** (level_db / 20) / np.sqrt(np.mean(noise * noise))
+	pcm = (noise * 32767).astype(np.int16)
+	return [pcm[i * CHUNK:(i + 1) * CHUNK].tobytes() for i in range(chunks)]
+
+
+def tone(level_db, seconds=0.2, freq=220):
+	t = np.arange(int(RATE * seconds)) / RATE
+	return np.sin(2 * np.pi * freq * t) * np.sqrt(2) * 10 ** (level_db / 20)
+
+
+def test_stationary_noise_is_suppressed():
+	for level_db in (-38, -30):
+		gate = VoiceActivityGate(RATE)
+		for chunk in lowpass_noise(level_db, 300):
+			gate.process(chunk)
+		assert gate.noise_floor_db > level_db - 3
+		assert gate.suppressed_fraction > 0.8
+
+
+def test_speech_over_noise_still_passes():
+	gate = VoiceActivityGate(RATE)
+	noise = lowpass_noise(-38, 200)
+	for chunk in noise[:100]:
+		gate.process(chunk)
+	floor = gate.noise_floor_db
+	background = np.frombuffer(noise[100], dtype=np.int16) / 32767
+	# Words with short gaps: 400 ms voiced, 200 ms of background only
+	for i in range(30):
+		voiced = i % 3 != 2
+		samples = background + (tone(-15) if voiced else 0)
+		assert gate.is_speech((samples * 32767).astype(np.int16).tobytes()) == voiced
+	assert gate.noise_floor_db < floor + 3
@@ -0,0 +1,184 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+EXPIRE = 'expire'
+ALERT = 'alert'
+TICK = 'tick'
+
+
+class Timer:
+	"""One named countdown; deadlines are on the monotonic clock"""
+
+	def __init__(self, name, duration, started_at, on_expire=None, alerts=None, label=None):
+		self.name = name
+		self.label = label or name
+		self.duration = duration
+		self.started_at = started_at
+		self.deadline = started_at + duration
+		self.on_expire = on_expire
+		self.alerts = alerts or {}  # remaining seconds -> callback(timer)
+
+	def remaining(self, now):
+		return max(0.0, self.deadline - now)
+
+
+class TimerScheduler:
+	"""Many concurrent named timers driven by one heap of deadlines.
+
+	Only the next due item causes a wakeup, so timers do not drift the way a
+	loop of sleep(1) calls does and an idle timer costs nothing. Display
+	updates come from a separate repeating tick (see every()) rather than
+	from the timers themselves. Drive it with run_async() inside an asyncio
+	loop or run_thread() on a plain thread.
+	"""
+
+	def __init__(self, clock=time.monotonic):
+		self.clock = clock
+		self.timers = {}
+		self.ticks = {}
+		self._heap = []  # (due, seq, kind, name, owner, payload)
+		self._seq = itertools.count()
+		self._lock = threading.RLock()
+		self._wakeup = None
+		self._stop_event = None
+
+	def _push(self, due, kind, name, owner, payload=None):
+		was_next = self._heap[0][0] if self._heap else None
+		heapq.heappush(self._heap, (due, next(self._seq), kind, name, owner, payload))
+		if self._wakeup and (was_next is None or due < was_next):
+			self._wakeup()
+
+	def start(self, name, duration, on_expire=None, alerts=None, label=None):
+		"""Start (or restart) a named timer; a running timer of that name is cancelled"""
+		with self._lock:
+			timer = Timer(name, duration, self.clock(), on_expire=on_expire, alerts=alerts, label=label)
+			self.timers[name] = timer
+			for remaining, callback in timer.alerts.items():
+				if 0 < remaining < duration:
+					self._push(timer.deadline - remaining, ALERT, name, timer, callback)
+			self._push(timer.deadline, EXPIRE, name, timer, on_expire)
+			return timer
+
+	def cancel(self, name):
+		"""Cancel a timer; its heap entries are skipped when they come due"""
+		with self._lock:
+			return self.timers.pop(name, None) is not None
+
+	def every(self, name, interval, callback):
+		"""Call callback(scheduler) every interval seconds, aligned to the first call"""
+		with self._lock:
+			tick = (interval, callback)
+			self.ticks[name] = tick
+			self._push(self.clock(), TICK, name, tick)
+
+	def stop_ticking(self, name):
+		with self._lock:
+			return self.ticks.pop(name, None) is not None
+
+	def active(self):
+		"""Return [(timer, remaining_seconds)] ordered by deadline"""
+		with self._lock:
+			now = self.clock()
+			return [(timer, timer.remaining(now)) for timer in sorted(self.timers.values(), key=lambda t: t.deadline)]
+
+	def remaining(self, name):
+		with self._lock:
+			timer = self.timers.get(name)
+			return timer.remaining(self.clock()) if timer else None
+
+	def next_due(self):
+		"""Seconds until the next live heap entry, or None if nothing is scheduled"""
+		with self._lock:
+			while self._heap:
+				due, _, kind, name, owner, _ = self._heap[0]
+				if self._is_live(kind, name, owner):
+					return max(0.0, due - self.clock())
+				heapq.heappop(self._heap)
+			return None
+
+	def _is_live(self, kind, name, owner):
+		if kind == TICK:
+			return self.ticks.get(name) is owner
+		return self.timers.get(name) is owner
+
+	def run_due(self):
+		"""Fire everything that is due; returns the number of callbacks run"""
+		fired = []
+		with self._lock:
+			now = self.clock()
+			while self._heap and self._heap[0][0] <= now:
+				due, _, kind, name, owner, payload = heapq.heappop(self._heap)
+				if not self._is_live(kind, name, owner):
+					continue
+				if kind == TICK:
+					interval, callback = owner
+					# Stay on the original grid; skip ticks missed while busy
+					next_due = due + interval
+					if next_due <= now:
+						next_due = now + interval - ((now - due) % interval)
+					self._push(next_due, TICK, name, owner)
+					fired.append((callback, self))
+				elif kind == ALERT:
+					fired.append((payload, owner))
+				else:
+					del self.timers[name]
+					if payload:
+						fired.append((payload, owner))
+		for callback, arg in fired:
+			try:
+				callback(arg)
+			except Exception as e:
+				print(f"Error in timer callback: {e}")
+		return len(fired)
+
+	async def run_async(self, should_run=lambda: True):
+		"""Drive the scheduler from an asyncio loop until should_run() is false"""
+		loop = asyncio.get_running_loop()
+		wake = asyncio.Event()
+		self._wakeup = lambda: loop.call_soon_threadsafe(wake.set)
+		try:
+			while should_run():
+				wake.clear()
+				self.run_due()
+				delay = self.next_due()
+				try:
+					# Also wake once a second to notice should_run() flipping
+					await asyncio.wait_for(wake.wait(), 1.0 if delay is None else min(delay, 1.0))
+				except asyncio.TimeoutError:
+					pass
+		finally:
+			self._wakeup = None
+
+	def run_thread(self, stop_event):
+		"""Drive the scheduler from the calling thread until stop_event is set"""
+		wake = threading.Event()
+		self._wakeup = wake.set
+		self._stop_event = stop_event
+		try:
+			while not stop_event.is_set():
+				wake.clear()
+				self.run_due()
+				wake.wait(self.next_due())
+		finally:
+			self._wakeup = None
+
+	def start_thread(self):
+		"""Run the scheduler on a daemon thread until stop() is called"""
+		stop_event = threading.Event()
+		threading.Thread(target=self.run_thread, args=(stop_event,), daemon=True, name='timer-scheduler').start()
+		return stop_event
+
+	def stop(self):
+		"""Stop a scheduler started with start_thread()"""
+		if self._stop_event:
+			self._stop_event.set()
+		if self._wakeup:
+			self._wakeup()
+
+
+def format_remaining(remaining):
+	mins, secs = divmod(int(round(remaining)), 60)
+	return f"{mins:02d}:{secs:02d}"
@@ -0,0 +1,384 @@
+"""SQLite archive of saved code transcripts with full-text and event search.
+
+ingest() loads recordings/*_transcript.json files into one database: a
+sessions table, utterances with an FTS5 index over their text, detected
+events and per-session speakers. Every row carries its offset in seconds
+from the start of the code, so timing questions ("amiodarone within 5
+minutes of a shock") are indexed range joins instead of rescans. Sessions
+saved with sample offsets (start_sample / end_sample, see audio_archive.py)
+keep them on their rows and take offset_s from them. Ingest is
+incremental: files whose mtime and size are unchanged are skipped, changed
+files are replaced. Transcripts saved before events were recorded get their
+events detected with the PhraseMatcher on ingest.
+
+	python transcript_archive.py ingest
+	python transcript_archive.py search "amiodarone"
+	python transcript_archive.py events --event DEFIB_SHOCK
+	python transcript_archive.py within DEFIB_SHOCK MED_AMIODARONE --seconds 300
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from phrase_matcher import get_phrase_matcher
+from transcript_pipeline import sample_offsets
+
+ARCHIVE_FILE = os.path.join("recordings", "archive.sqlite3")
+DEFAULT_PATTERNS = [os.path.join("recordings", "*_transcript.json"), os.path.join("recordings", "*_recording.json")]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+	id INTEGER PRIMARY KEY,
+	path TEXT UNIQUE NOT NULL,
+	name TEXT NOT NULL,
+	mtime_ns INTEGER NOT NULL,
+	size INTEGER NOT NULL,
+	started_at TEXT,
+	recording_date TEXT,
+	duration_s REAL,
+	utterance_count INTEGER,
+	sample_rate INTEGER
+);
+CREATE TABLE IF NOT EXISTS utterances (
+	id INTEGER PRIMARY KEY,
+	session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+	seq INTEGER NOT NULL,
+	timestamp TEXT,
+	offset_s REAL,
+	speaker TEXT,
+	text TEXT NOT NULL,
+	confidence REAL,
+	start_sample INTEGER,
+	end_sample INTEGER
+);
+CREATE INDEX IF NOT EXISTS utterances_session ON utterances(session_id, offset_s);
+CREATE VIRTUAL TABLE IF NOT EXISTS utterances_fts USING fts5(
+	text, content='utterances', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS utterances_ai AFTER INSERT ON utterances BEGIN
+	INSERT INTO utterances_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS utterances_ad AFTER DELETE ON utterances BEGIN
+	INSERT INTO utterances_fts(utterances_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TABLE IF NOT EXISTS events (
+	id INTEGER PRIMARY KEY,
+	session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+	event TEXT NOT NULL,
+	phrase TEXT,
+	text TEXT,
+	timestamp TEXT,
+	offset_s REAL,
+	start_sample INTEGER,
+	end_sample INTEGER
+);
+CREATE INDEX IF NOT EXISTS events_by_type ON events(event, session_id, offset_s);
+CREATE TABLE IF NOT EXISTS speakers (
+	session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+	speaker TEXT NOT NULL,
+	name TEXT,
+	words INTEGER,
+	PRIMARY KEY (session_id, speaker)
+);
+"""
+
+# Columns added since the first schema; ALTERed into archives created before them
+ADDED_COLUMNS = {
+	'sessions': [('sample_rate', 'INTEGER')],
+	'utterances': [('start_sample', 'INTEGER'), ('end_sample', 'INTEGER')],
+	'events': [('start_sample', 'INTEGER'), ('end_sample', 'INTEGER')],
+}
+
+
+# "quoted phrases" or bare terms; a trailing * asks for a prefix match
+QUERY_TERM = re.compile(r'"([^"]*)"(\*?)|(\S+?)(\*?)(?=\s|$)')
+
+
+def fts_query(query):
+	"""Free text as an FTS5 query: every term and phrase quoted as a string, all required"""
+	terms = []
+	for match in QUERY_TERM.finditer(query):
+		text = match.group(1) if match.group(1) is not None else match.group(3)
+		prefix = match.group(2) or match.group(4) or ''
+		if text.strip():
+			terms.append('"' + text.replace('"', '""') + '"' + prefix)
+	return ' '.join(terms)
+
+
+def clock_seconds(timestamp):
+	hours, minutes, seconds = (int(part) for part in timestamp.split(':'))
+	return hours * 3600 + minutes * 60 + seconds
+
+
+def session_offset(timestamp, start_seconds):
+	"""Seconds from the session start to an HH:MM:SS timestamp, across midnight"""
+	if not timestamp or start_seconds is None:
+		return None
+	return float((clock_seconds(timestamp) - start_seconds) % 86400)
+
+
+def detect_events(messages, matcher):
+	"""Events for transcripts saved without detected_events, as the live pipeline records them"""
+	events = []
+	hits = matcher.match_many([msg.get('text', '') for msg in messages])
+	for msg, matches in zip(messages, hits):
+		for event, phrase, _ in matches:
+			detected = {'timestamp': msg.get('timestamp'), 'event': event, 'phrase': phrase, 'text': msg['text']}
+			detected.update(sample_offsets(msg))
+			events.append(detected)
+	return events
+
+
+class TranscriptArchive:
+	def __init__(self, path=ARCHIVE_FILE):
+		self.path = path
+		self.conn = sqlite3.connect(path)
+		self.conn.row_factory = sqlite3.Row
+		self.conn.execute("PRAGMA foreign_keys = ON")
+		self.conn.execute("PRAGMA journal_mode = WAL")
+		self.conn.execute("PRAGMA synchronous = NORMAL")
+		self._migrate()
+		self.conn.executescript(SCHEMA)
+		self._matcher = None
+
+	def _migrate(self):
+		for table, columns in ADDED_COLUMNS.items():
+			existing = {row['name'] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+			if not existing:
+				continue  # created by SCHEMA below
+			for column, kind in columns:
+				if column not in existing:
+					self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+
+	def close(self):
+		self.conn.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	@property
+	def matcher(self):
+		if self._matcher is None:
+			self._matcher = get_phrase_matcher()
+		return self._matcher
+
+	# Ingest
+
+	def ingest(self, patterns=DEFAULT_PATTERNS):
+		"""Add new and changed transcripts; returns (ingested, skipped) counts"""
+		files = sorted({os.path.abspath(f) for pattern in patterns
+						for f in (glob.glob(os.path.join(pattern, '*.json')) if os.path.isdir(pattern) else glob.glob(pattern))})
+		known = {row['path']: (row['mtime_ns'], row['size'])
+				for row in self.conn.execute("SELECT path, mtime_ns, size FROM sessions")}
+		ingested = skipped = 0
+		with self.conn:
+			for path in files:
+				stat = os.stat(path)
+				if known.get(path) == (stat.st_mtime_ns, stat.st_size):
+					skipped += 1
+					continue
+				try:
+					with open(path, 'r') as f:
+						data = json.load(f)
+				except (OSError, json.JSONDecodeError) as e:
+					print(f"Skipping {path}: {e}")
+					continue
+				if not isinstance(data, dict) or 'messages' not in data:
+					skipped += 1
+					continue
+				self._ingest_session(path, stat, data)
+				ingested += 1
+		return ingested, skipped
+
+	def _ingest_session(self, path, stat, data):
+		# Caller holds the transaction; a changed file replaces its old rows
+		self.conn.execute("DELETE FROM sessions WHERE path = ?", (path,))
+		messages = data.get('messages', [])
+		events = data['detected_events'] if 'detected_events' in data else detect_events(messages, self.matcher)
+		start = clock_seconds(messages[0]['timestamp']) if messages and messages[0].get('timestamp') else None
+		rate = data.get('sample_rate')
+		if rate and all(item.get('start_sample') is not None for item in messages + events):
+			# Sample offsets are exact and share one origin: the start of the recording
+			offsets = [msg['start_sample'] / rate for msg in messages]
+			event_offsets = [evt['start_sample'] / rate for evt in events]
+		else:
+			offsets = [session_offset(msg.get('timestamp'), start) for msg in messages]
+			event_offsets = [session_offset(evt.get('timestamp'), start) for evt in events]
+		started_at = None
+		if data.get('recording_date') and start is not None:
+			# recording_date is when the transcript was saved, at the end of the code
+			saved = datetime.strptime(data['recording_date'], "%Y-%m-%d %H:%M:%S")
+			started = saved.replace(hour=start // 3600, minute=start // 60 % 60, second=start % 60)
+			if started > saved:
+				started -= timedelta(days=1)
+			started_at = started.isoformat()
+		name = os.path.splitext(os.path.basename(path))[0].replace('_transcript', '')
+		cursor = self.conn.execute(
+			"INSERT INTO sessions (path, name, mtime_ns, size, started_at, recording_date, duration_s, utterance_count, "
+			"sample_rate) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+			(path, name, stat.st_mtime_ns, stat.st_size, started_at, data.get('recording_date'),
+			offsets[-1] if offsets else 0.0, len(messages), rate))
+		session_id = cursor.lastrowid
+		self.conn.executemany(
+			"INSERT INTO utterances (session_id, seq, timestamp, offset_s, speaker, text, confidence, start_sample, end_sample) "
+			"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+			[(session_id, seq, msg.get('timestamp'), offset, msg.get('speaker'), msg.get('text', ''), msg.get('confidence'),
+			msg.get('start_sample'), msg.get('end_sample'))
+			for seq, (msg, offset) in enumerate(zip(messages, offsets))])
+		self.conn.executemany(
+			"INSERT INTO events (session_id, event, phrase, text, timestamp, offset_s, start_sample, end_sample) "
+			"VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+			[(session_id, evt['event'], evt.get('phrase'), evt.get('text'), evt.get('timestamp'), offset,
+			evt.get('start_sample'), evt.get('end_sample')) for evt, offset in zip(events, event_offsets)])
+		names = data.get('speaker_names', {})
+		stats = data.get('speaker_statistics', {})
+		self.conn.executemany(
+			"INSERT INTO speakers (session_id, speaker, name, words) VALUES (?, ?, ?, ?)",
+			[(session_id, speaker, names.get(speaker), stats.get(speaker)) for speaker in set(stats) | set(names)])
+
+	def remove_missing(self):
+		"""Drop sessions whose transcript file no longer exists"""
+		missing = [row['path'] for row in self.conn.execute("SELECT path FROM sessions") if not os.path.exists(row['path'])]
+		with self.conn:
+			self.conn.executemany("DELETE FROM sessions WHERE path = ?", [(path,) for path in missing])
+		return len(missing)
+
+	# Queries
+
+	def search(self, query, limit=20, session=None):
+		"""Full-text search over utterances, best matches first.
+
+		Every word must appear; "quoted phrases" match in order and a
+		trailing * matches a prefix. Anything else (apostrophes, colons,
+		FTS5 operators) is searched for as plain text.
+		"""
+		sql = ("SELECT s.name AS session, u.timestamp, u.offset_s, u.speaker, u.text, "
+			"snippet(utterances_fts, 0, '[', ']', '...', 12) AS snippet "
+			"FROM utterances_fts JOIN utterances u ON u.id = utterances_fts.rowid "
+			"JOIN sessions s ON s.id = u.session_id WHERE utterances_fts MATCH ?")
+		query = fts_query(query)
+		if not query:
+			return []
+		params = [query]
+		if session:
+			sql += " AND s.name = ?"
+			params.append(session)
+		sql += " ORDER BY bm25(utterances_fts) LIMIT ?"
+		params.append(limit)
+		return [dict(row) for row in self.conn.execute(sql, params)]
+
+	def events(self, event=None, session=None, limit=None):
+		sql = ("SELECT s.name AS session, e.event, e.phrase, e.text, e.timestamp, e.offset_s, "
+			"e.start_sample, e.end_sample, s.sample_rate FROM events e JOIN sessions s ON s.id = e.session_id")
+		clauses, params = [], []
+		if event:
+			clauses.append("e.event = ?")
+			params.append(event)
+		if session:
+			clauses.append("s.name = ?")
+			params.append(session)
+		if clauses:
+			sql += " WHERE " + " AND ".join(clauses)
+		sql += " ORDER BY s.name, e.offset_s"
+		if limit:
+			sql += f" LIMIT {int(limit)}"
+		return [dict(row) for row in self.conn.execute(sql, params)]
+
+	def within(self, first, then, seconds):
+		"""Sessions where event `then` followed event `first` within `seconds`.
+
+		An event never pairs with itself. When first == then, each pair of
+		events appears once, the later one as `then` (ties go by row order).
+		"""
+		sql = ("SELECT s.name AS session, a.timestamp AS first_at, b.timestamp AS then_at, "
+			"b.offset_s - a.offset_s AS gap_s, b.text AS text "
+			"FROM events a JOIN events b ON b.session_id = a.session_id AND b.event = ? "
+			"AND b.id != a.id AND b.offset_s BETWEEN a.offset_s AND a.offset_s + ? "
+			"AND (b.offset_s > a.offset_s OR b.event != a.event OR b.id > a.id) "
+			"JOIN sessions s ON s.id = a.session_id WHERE a.event = ? "
+			"ORDER BY s.name, a.offset_s, b.offset_s")
+		return [dict(row) for row in self.conn.execute(sql, (then, seconds, first))]
+
+	def sessions_with(self, *events):
+		"""Names of sessions in which every one of events was detected"""
+		if not events:
+			return []
+		sql = ("SELECT s.name FROM sessions s WHERE " +
+			" AND ".join("EXISTS (SELECT 1 FROM events e WHERE e.session_id = s.id AND e.event = ?)" for _ in events) +
+			" ORDER BY s.name")
+		return [row['name'] for row in self.conn.execute(sql, events)]
+
+	def speakers(self, session):
+		sql = ("SELECT sp.speaker, sp.name, sp.words FROM speakers sp JOIN sessions s ON s.id = sp.session_id "
+			"WHERE s.name = ? ORDER BY sp.words DESC")
+		return [dict(row) for row in self.conn.execute(sql, (session,))]
+
+	def stats(self):
+		counts = {}
+		for table in ('sessions', 'utterances', 'events', 'speakers'):
+			counts[table] = self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+		return counts
+
+
+def print_rows(rows):
+	for row in rows:
+		print(json.dumps(row))
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Search the archive of saved code transcripts")
+	parser.add_argument('--db', default=ARCHIVE_FILE)
+	commands = parser.add_subparsers(dest='command', required=True)
+	ingest = commands.add_parser('ingest', help="add new or changed transcripts")
+	ingest.add_argument('paths', nargs='*', default=DEFAULT_PATTERNS, help="transcript files, globs or directories")
+	ingest.add_argument('--prune', action='store_true', help="drop sessions whose files were deleted")
+	search = commands.add_parser('search', help="full-text search over utterances")
+	search.add_argument('query')
+	search.add_argument('--session')
+	search.add_argument('--limit', type=int, default=20)
+	events = commands.add_parser('events', help="list detected events")
+	events.add_argument('--event')
+	events.add_argument('--session')
+	events.add_argument('--limit', type=int)
+	within = commands.add_parser('within', help="event B within N seconds after event A")
+	within.add_argument('first')
+	within.add_argument('then')
+	within.add_argument('--seconds', type=float, default=300)
+	having = commands.add_parser('sessions', help="sessions in which all given events occurred")
+	having.add_argument('events', nargs='+')
+	speakers = commands.add_parser('speakers', help="speakers of one session")
+	speakers.add_argument('session')
+	commands.add_parser('stats', help="row counts")
+	args = parser.parse_args()
+
+	with TranscriptArchive(args.db) as archive:
+		started = time.perf_counter()
+		if args.command == 'ingest':
+			ingested, skipped = archive.ingest(args.paths)
+			removed = archive.remove_missing() if args.prune else 0
+			print(f"Ingested {ingested}, unchanged {skipped}, removed {removed}")
+		elif args.command == 'search':
+			print_rows(archive.search(args.query, args.limit, args.session))
+		elif args.command == 'events':
+			print_rows(archive.events(args.event, args.session, args.limit))
+		elif args.command == 'within':
+			print_rows(archive.within(args.first, args.then, args.seconds))
+		elif args.command == 'sessions':
+			print("\n".join(archive.sessions_with(*args.events)))
+		elif args.command == 'speakers':
+			print_rows(archive.speakers(args.session))
+		elif args.command == 'stats':
+			print(json.dumps(archive.stats()))
+		print(f"({(time.perf_counter() - started) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,182 @@
+import time
+from datetime import datetime
+
+from event_store import EventStore
+from session_journal import SPEAKER_CHANGE, SPEAKER_NAME, EVENT, UTTERANCE
+from speaker_registry import SpeakerRegistry
+
+# Speaker change tuning (mirrors the realtime receive loop)
+SPEAKER_CHANGE_THRESHOLD = 0.2  # More sensitive threshold for speaker changes
+MIN_SEGMENT_DURATION = 1.0  # Minimum duration (seconds) before allowing speaker change
+
+
+def init_state(state):
+	"""Populate the keys the pipeline expects (works on dicts and st.session_state)"""
+	state.setdefault('text', [])
+	state.setdefault('speaker_registry', SpeakerRegistry())  # Letters, names and speaking stats per speaker ID
+	state.setdefault('detected_events', EventStore())  # Coalesced detections, indexed by type and time
+	return state
+
+
+def sample_offsets(result):
+	"""start_sample / end_sample of a result, when its recording position is known"""
+	return {key: result[key] for key in ('start_sample', 'end_sample') if result.get(key) is not None}
+
+
+class TranscriptPipeline:
+	"""Speaker assignment, name detection and event detection for one session.
+
+	This is the per-utterance hot path of the realtime receive loop, pulled out
+	so it can also be driven offline (see replay.py). UI side effects are left
+	to the caller through the on_name / on_event callbacks.
+
+	With detect_partials, events are also detected on PartialTranscript
+	messages. Partial revisions of one utterance record each (event, phrase)
+	once; the final's detections are always recorded, so they confirm (and
+	replace the text of) the record a partial opened.
+
+	Detections go to the session's EventStore, which coalesces repeats of an
+	event type within its window into one record (see event_store.py).
+	on_event fires with that record when a detection opens a new one, at
+	most once per event type per utterance, so a timer restarts only on the
+	first partial that mentions it. Every raw detection is still journaled.
+
+	Results carrying start_sample / end_sample (their position in the
+	recording, see audio_archive.AudioOffsetMap) pass them on to the
+	transcript message and to every event detected in it.
+	"""
+
+	def __init__(self, state, matcher, on_name=None, on_event=None, clock=time.time, log=print, journal=None,
+				metrics=None, detect_partials=False):
+		self.state = init_state(state)
+		self.speakers = self.state['speaker_registry']
+		self.matcher = matcher
+		self.on_name = on_name
+		self.on_event = on_event
+		self.clock = clock
+		self.log = log
+		self.journal = journal
+		self.metrics = metrics
+		self.detect_partials = detect_partials
+		self.current_speaker = None
+		self.last_change_time = clock()
+		# Detections already made for the utterance in flight
+		self.utterance_start = None
+		self.utterance_matches = set()
+		self.utterance_events = set()
+		self.last_partial_text = None
+
+	def _track_utterance(self, result):
+		audio_start = result.get('audio_start')
+		if audio_start is not None and audio_start != self.utterance_start:
+			# A new utterance began (possibly without a final for the last one)
+			self._end_utterance()
+			self.utterance_start = audio_start
+
+	def _end_utterance(self):
+		self.utterance_start = None
+		self.utterance_matches = set()
+		self.utterance_events = set()
+		self.last_partial_text = None
+
+	def _detect_events(self, text, now, partial=False, offsets=None):
+		match_started = time.perf_counter()
+		matches = self.matcher.match(text)
+		if self.metrics:
+			self.metrics.observe('match', time.perf_counter() - match_started)
+		for event, phrase, score in matches:
+			if partial and (event, phrase) in self.utterance_matches:
+				continue
+			self.utterance_matches.add((event, phrase))
+			detected = {
+				'timestamp': datetime.now().strftime("%H:%M:%S"),
+				'event': event,
+				'phrase': phrase,
+				'text': text
+			}
+			if offsets:
+				detected.update(offsets)
+			if partial:
+				detected['partial'] = True
+			record, created = self.state['detected_events'].add(detected, score, now)
+			if self.journal:
+				self.journal.append(EVENT, event=detected, score=score, at=now)
+			first_of_type = event not in self.utterance_events
+			self.utterance_events.add(event)
+			if self.on_event and created and first_of_type:
+				self.on_event(record, score)
+
+	def process(self, result, now=None):
+		"""Handle one realtime message; returns the transcript message for finals"""
+		message_type = result.get('message_type')
+		if message_type == 'PartialTranscript':
+			if self.detect_partials:
+				text = result.get('text', '').strip()
+				self._track_utterance(result)
+				if text and text != self.last_partial_text:
+					self.last_partial_text = text
+					self._detect_events(text, self.clock() if now is None else now, partial=True,
+										offsets=sample_offsets(result))
+			return None
+		if message_type != 'FinalTranscript':
+			return None
+		self._track_utterance(result)
+		state = self.state
+		text = result.get('text', '').strip()
+		speaker_id = result.get('speaker_id') or result.get('speaker') or 'Unknown'
+		confidence = result.get('confidence', 0)
+		current_time = self.clock() if now is None else now
+
+		# Enhanced speaker change logic
+		time_since_last_change = current_time - self.last_change_time
+		should_change_speaker = (
+			confidence > SPEAKER_CHANGE_THRESHOLD and
+			time_since_last_change >= MIN_SEGMENT_DURATION and
+			speaker_id != self.current_speaker
+		)
+
+		if should_change_speaker:
+			self.log(f"Speaker change: {self.current_speaker} -> {speaker_id} "
+					f"(conf: {confidence}, time: {time_since_last_change:.1f}s)")
+			if self.journal:
+				self.journal.append(SPEAKER_CHANGE, previous=self.current_speaker, speaker_id=speaker_id,
+									confidence=confidence)
+			self.current_speaker = speaker_id
+			self.last_change_time = current_time
+		elif self.current_speaker is None:
+			self.current_speaker = speaker_id
+			self.last_change_time = current_time
+
+		# Use the determined speaker
+		effective_speaker = self.current_speaker or speaker_id
+
+		# Get or assign the speaker's letter, then try to detect a name if not already known
+		speaker = self.speakers.get(effective_speaker)
+		detected_name = self.speakers.detect_name(speaker, text)
+		if detected_name and self.journal:
+			self.journal.append(SPEAKER_NAME, speaker_id=effective_speaker, name=detected_name)
+		if detected_name and self.on_name:
+			self.on_name(speaker.letter, detected_name)
+
+		# Update speaker statistics (talk time from the audio span when the ASR gives one)
+		audio_start, audio_end = result.get('audio_start'), result.get('audio_end')
+		talk_seconds = (audio_end - audio_start) / 1000 if audio_start is not None and audio_end is not None else 0.0
+		self.speakers.add_utterance(speaker, text, talk_seconds, current_time)
+
+		# Event detection logic
+		offsets = sample_offsets(result)
+		self._detect_events(text, current_time, offsets=offsets)
+		self._end_utterance()
+
+		# Create message with confidence score
+		message = {
+			'timestamp': datetime.now().strftime("%H:%M:%S"),
+			'speaker': speaker.label,
+			'text': text,
+			'confidence': confidence
+		}
+		message.update(offsets)
+		state['text'].append(message)
+		if self.journal:
+			self.journal.append(UTTERANCE, speaker_id=effective_speaker, message=message)
+		return message
@@ -0,0 +1,96 @@
+import time
+
+TRANSCRIPT_WINDOW = 10  # Show last 10 messages
+EVENT_WINDOW = 15  # Most recent detected events shown in the sidebar
+MAX_FPS = 4  # Cap on UI redraws per second during a live session
+
+
+def format_message(msg):
+	return f"<div style='font-size:1.5em;'>[{msg['timestamp']}]: {msg['text']}</div>"
+
+
+def format_event(evt):
+	repeats = f" (x{evt['count']})" if evt.get('count', 1) > 1 else ""
+	return f"[{evt['timestamp']}] **{evt['event']}**{repeats}: '{evt['phrase']}' in '{evt['text']}'"
+
+
+class RenderModel:
+	"""Append-only list of pre-formatted rows.
+
+	Each source item is formatted exactly once; sync() picks up only the
+	items appended since the last call, so keeping the model current costs
+	O(new rows) however long the session gets. Sources that change items in
+	place (an EventStore merging a detection) report them through
+	take_updates(), and only those rows are formatted again.
+	"""
+
+	def __init__(self, format_row):
+		self.format_row = format_row
+		self.rows = []
+		self.version = 0
+
+	def append(self, item):
+		self.rows.append(self.format_row(item))
+		self.version += 1
+
+	def sync(self, items):
+		if len(items) < len(self.rows):
+			# The source list was reset (new recording)
+			self.rows = []
+			self.version += 1
+		take_updates = getattr(items, 'take_updates', None)
+		if take_updates:
+			for index in take_updates():
+				if index < len(self.rows):
+					self.rows[index] = self.format_row(items[index])
+					self.version += 1
+		for item in items[len(self.rows):]:
+			self.append(item)
+		return self
+
+	def window(self, size):
+		return self.rows[-size:]
+
+
+class WindowedView:
+	"""Draws the last `window` rows of a RenderModel into one placeholder.
+
+	Redraws are coalesced: request as many as you like, flush() only draws
+	when the model changed and at most max_fps times per second. A draw
+	joins at most `window` cached rows, so its cost does not grow with the
+	session.
+	"""
+
+	def __init__(self, placeholder, model, window, separator="\n", max_fps=MAX_FPS,
+				unsafe_allow_html=False, header=None, footer=None, clock=time.monotonic):
+		self.placeholder = placeholder
+		self.model = model
+		self.window = window
+		self.separator = separator
+		self.min_interval = 1.0 / max_fps if max_fps else 0.0
+		self.unsafe_allow_html = unsafe_allow_html
+		self.header = header
+		self.footer = footer  # callable(hidden_rows) -> str, shown when rows are windowed out
+		self.clock = clock
+		self.drawn_version = -1
+		self.last_draw = float('-inf')
+		self.draws = 0
+
+	def flush(self, force=False):
+		"""Draw if anything changed; returns True when the placeholder was updated"""
+		if self.drawn_version == self.model.version or not self.model.rows:
+			return False
+		now = self.clock()
+		if not force and now - self.last_draw < self.min_interval:
+			return False
+		body = self.separator.join(self.model.window(self.window))
+		hidden = len(self.model.rows) - self.window
+		if self.footer and hidden > 0:
+			body = f"{body}{self.separator}{self.footer(hidden)}"
+		if self.header:
+			body = f"{self.header}{self.separator}{body}"
+		self.placeholder.markdown(body, unsafe_allow_html=self.unsafe_allow_html)
+		self.drawn_version = self.model.version
+		self.last_draw = now
+		self.draws += 1
+		return True
@@ -0,0 +1,103 @@
+from collections import deque
+
+import numpy as np
+
+SUBFRAME_SECONDS = 0.02  # Decisions are made on 20 ms slices of each chunk
+MIN_ENERGY_DB = -50.0  # Never treat audio quieter than this as speech
+NOISE_MARGIN_DB = 10.0  # Speech must be this far above the tracked noise floor
+NOISE_PERCENTILE = 50  # A chunk's background level: this percentile of its subframe energies
+NOISE_RISE = 0.02  # Per chunk, the floor rises this fraction of the way to a louder background
+NOISE_FALL = 0.5  # ...and falls this fraction of the way to a quieter one
+MIN_NOISE_FLOOR_DB = -90.0  # Digital silence must not drag the floor out of reach
+MAX_SPEECH_ZCR = 0.35  # Zero crossings per sample above this look like hiss, not voice
+LOUD_MARGIN_DB = 20.0  # Loud enough to count as speech whatever the ZCR (fricatives)
+HANGOVER_CHUNKS = 4  # Keep sending this many chunks after speech ends
+PREROLL_CHUNKS = 1  # Chunks held back and sent ahead of a speech onset
+
+
+class VoiceActivityGate:
+	"""Energy / zero-crossing VAD placed between capture and the websocket.
+
+	process() returns the chunks that should go upstream: speech chunks, the
+	pre-roll held back just before an onset (so first syllables are not
+	clipped) and a hangover tail after speech ends, which also gives the ASR
+	the trailing silence it needs to finalize an utterance. Local recording
+	should keep writing every chunk; only the upstream send is gated.
+
+	The noise floor is a minimum tracker updated on every chunk, whatever
+	the speech decision: each chunk's background level (its NOISE_PERCENTILE
+	subframe energy) pulls the floor down fast and up slowly. Pauses between
+	words keep pulling it back down, so talking barely moves it, while
+	steady room noise raises it within seconds and stops counting as speech.
+	"""
+
+	def __init__(self, rate, hangover_chunks=HANGOVER_CHUNKS, preroll_chunks=PREROLL_CHUNKS,
+				min_energy_db=MIN_ENERGY_DB, noise_margin_db=NOISE_MARGIN_DB):
+		self.subframe = max(1, int(rate * SUBFRAME_SECONDS))
+		self.hangover_chunks = hangover_chunks
+		self.min_energy_db = min_energy_db
+		self.noise_margin_db = noise_margin_db
+		self.noise_floor_db = min_energy_db
+		self.preroll = deque(maxlen=preroll_chunks) if preroll_chunks else None
+		self.hangover = 0
+		self.total_chunks = 0
+		self.sent_chunks = 0
+		self.speech_chunks = 0
+
+	def is_speech(self, data):
+		samples = np.frombuffer(data, dtype=np.int16)
+		usable = len(samples) - len(samples) % self.subframe
+		if usable == 0:
+			return False
+		frames = samples[:usable].astype(np.float32).reshape(-1, self.subframe) / 32768.0
+		rms = np.sqrt(np.mean(frames * frames, axis=1))
+		energy_db = 20.0 * np.log10(np.maximum(rms, 1e-9))
+		signs = np.signbit(frames)
+		zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self.subframe
+
+		threshold = max(self.min_energy_db, self.noise_floor_db + self.noise_margin_db)
+		voiced = (energy_db > threshold) & (
+			(zcr < MAX_SPEECH_ZCR) | (energy_db > threshold + LOUD_MARGIN_DB))
+		self._track_noise(float(np.percentile(energy_db, NOISE_PERCENTILE)))
+		return bool(voiced.any())
+
+	def _track_noise(self, background_db):
+		background_db = max(background_db, MIN_NOISE_FLOOR_DB)
+		rate = NOISE_FALL if background_db < self.noise_floor_db else NOISE_RISE
+		self.noise_floor_db += rate * (background_db - self.noise_floor_db)
+
+	def process(self, data):
+		"""Return the list of chunks to send upstream for this captured chunk"""
+		self.total_chunks += 1
+		if self.is_speech(data):
+			self.speech_chunks += 1
+			self.hangover = self.hangover_chunks
+			out = list(self.preroll) if self.preroll else []
+			if self.preroll:
+				self.preroll.clear()
+			out.append(data)
+		elif self.hangover > 0:
+			self.hangover -= 1
+			out = [data]
+		else:
+			if self.preroll is not None:
+				self.preroll.append(data)
+			out = []
+		self.sent_chunks += len(out)
+		return out
+
+	@property
+	def suppressed_fraction(self):
+		if not self.total_chunks:
+			return 0.0
+		# Pre-roll still waiting in the buffer counts as suppressed until sent
+		return 1.0 - self.sent_chunks / self.total_chunks
+
+	def stats(self):
+		return {
+			'total_chunks': self.total_chunks,
+			'sent_chunks': self.sent_chunks,
+			'speech_chunks': self.speech_chunks,
+			'suppressed_fraction': round(self.suppressed_fraction, 4),
+			'noise_floor_db': round(self.noise_floor_db, 1),
+		}